@@ -852,18 +852,72 @@ app.post('/api/voice/event', (req, res) => {
 });
 
 // Endpoint para subir audio raw y procesarlo con STT
-// (Para implementación futura con Whisper o similar)
-app.post('/api/voice/stt', async (req, res) => {
-  // Este endpoint recibiría audio raw del ESP32
-  // y lo procesaría con un servicio STT
-  
-  // Ejemplo con Whisper local:
-  // const audioBuffer = req.body;
-  // const transcript = await processWithWhisper(audioBuffer);
-  
-  res.status(501).json({
-    error: 'STT no implementado aún',
-    message: 'Por ahora, envía el texto transcrito directamente'
+// Recibe PCM 16 bits en streaming (Transfer-Encoding: chunked) mientras se
+// habla, desde stt/node_stream.py. La transcripción todavía es un stub
+// (para implementación futura con Whisper o similar)
+// El cliente reintenta desde el principio si se corta o si respondemos 5xx:
+// X-Utterance-Id identifica el enunciado para no procesarlo dos veces
+const sttDone = new Map();  // utteranceId -> respuesta ya enviada
+const STT_DONE_MAX = 200;
+
+app.post('/api/voice/stt', (req, res) => {
+  const deviceId = req.get('X-Device-Id') || 'ESP32_GATEWAY_01';
+  const traceId = req.get('X-Trace-Id') || null;
+  const utteranceId = req.get('X-Utterance-Id') || null;
+  const attempt = parseInt(req.get('X-Attempt') || '1');
+  const rate = parseInt(req.get('X-Sample-Rate') || '16000');
+  const started = Date.now();
+  const chunks = [];
+  let bytes = 0;
+  
+  // El audio se lee a medida que llega: si no damos abasto, TCP frena al cliente
+  req.on('data', (chunk) => {
+    chunks.push(chunk);
+    bytes += chunk.length;
+  });
+  
+  req.on('end', async () => {
+    if (utteranceId && sttDone.has(utteranceId)) {
+      console.log(`🔁 [${deviceId}] Enunciado ${utteranceId} repetido (intento ${attempt}), ya procesado`);
+      return res.json(sttDone.get(utteranceId));
+    }
+    
+    const seconds = bytes / 2 / rate;
+    console.log(`🎙️ [${deviceId}] Audio en streaming: ${(bytes / 1024).toFixed(0)} KB ` +
+                `(${seconds.toFixed(1)}s) en ${Date.now() - started} ms`);
+    
+    // Ejemplo con Whisper local:
+    // const transcript = await processWithWhisper(Buffer.concat(chunks), rate);
+    const transcript = null;
+    
+    io.emit('voice-audio', {
+      deviceId,
+      traceId,
+      seconds,
+      timestamp: new Date().toISOString()
+    });
+    
+    const reply = {
+      success: true,
+      deviceId,
+      traceId,
+      bytes,
+      seconds,
+      transcript,
+      message: 'Audio recibido; STT no implementado aún'
+    };
+    if (utteranceId) {
+      sttDone.set(utteranceId, reply);
+      if (sttDone.size > STT_DONE_MAX) {
+        sttDone.delete(sttDone.keys().next().value);  // El más viejo
+      }
+    }
+    res.json(reply);
+  });
+  
+  // Cliente cortó a mitad del audio: reintentará desde el principio
+  req.on('aborted', () => {
+    console.log(`🔌 [${deviceId}] Stream de audio cortado (${(bytes / 1024).toFixed(0)} KB)`);
   });
 });
 // =====================================================
@@ -919,6 +973,65 @@ app.post('/api/voice/transcript-drive', async (req, res) => {
   }
 });
 
+// =====================================================
+// ENDPOINT: Lote de transcripciones desde Drive/Colab
+// =====================================================
+
+app.post('/api/voice/transcript-drive/batch', async (req, res) => {
+  const { deviceId, source, transcripts } = req.body;
+  
+  if (!Array.isArray(transcripts) || transcripts.length === 0) {
+    return res.status(400).json({ error: 'Lista de transcripciones requerida' });
+  }
+  
+  console.log(`\n📝 Lote de ${transcripts.length} transcripciones desde ${source || 'Drive'}`);
+  
+  try {
+    let received = 0;
+    
+    for (const item of transcripts) {
+      if (!item || !item.transcript) continue;
+      
+      const itemDevice = item.deviceId || deviceId || 'ESP32_GATEWAY_01';
+      const timestamp = new Date().toISOString();
+      console.log(`   [${itemDevice}] "${item.transcript}"`);
+      
+      // Mismo flujo que /api/voice/transcript-drive, una emisión por transcripción
+      io.emit('voice-transcript-received', {
+        deviceId: itemDevice,
+        transcript: item.transcript,
+        timestamp,
+        source: source || 'google_drive'
+      });
+      
+      addToHistory({
+        type: 'voice_transcript',
+        deviceId: itemDevice,
+        transcript: item.transcript,
+        timestamp,
+        source: source || 'google_drive'
+      });
+      
+      received++;
+    }
+    
+    console.log(`✅ ${received} transcripciones reenviadas a clientes web`);
+    
+    res.json({
+      success: true,
+      received,
+      message: `${received} transcripciones enviadas a clientes web`
+    });
+    
+  } catch (error) {
+    console.error('❌ Error procesando lote de transcripciones:', error);
+    res.status(500).json({
+      success: false,
+      error: error.message
+    });
+  }
+});
+
 // =====================================================
 // ENDPOINT: Recibir transcripción y encolarla
 // =====================================================
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Archivo local de enunciados: segmentos grandes de solo-agregar + índice compacto
+En lugar de miles de audio_*.wav sueltos; lectura por mmap para el replay
+"""
+
+import os
+import re
+import time
+import threading
+import numpy as np
+
+from audio_source import AudioSource, EndOfAudio
+
+# Un registro por enunciado (56 bytes), en el mismo orden que el audio
+INDEX_DTYPE = np.dtype([
+    ("offset", "<u8"),     # Byte de inicio en el .pcm
+    ("samples", "<u4"),    # Largo en muestras int16
+    ("rate", "<u4"),
+    ("time", "<f8"),       # Epoch del fin del enunciado
+    ("level", "<f4"),      # Nivel que disparó la grabación
+    ("device", "S16"),     # Etiqueta del micrófono ("" = único)
+    ("trace", "S12"),      # Id de traza
+])
+
+SEGMENT_RE = re.compile(r"^segment_(\d{6})\.pcm$")
+
+
+def segment_paths(directory, number):
+    base = os.path.join(directory, f"segment_{number:06d}")
+    return base + ".pcm", base + ".idx"
+
+
+class UtteranceArchive:
+    """
+    Enunciados PCM int16 agregados uno tras otro a segment_NNNNNN.pcm;
+    por cada uno, un registro de INDEX_DTYPE en segment_NNNNNN.idx.
+
+    El audio se escribe antes que su registro: si el proceso muere entre
+    los dos, al reabrir se recorta el audio huérfano (y un registro a
+    medias) y el archivo queda consistente. Sin fsync: lo que importa es
+    no acumular archivos, no sobrevivir a un corte de luz.
+
+    Rotación: se abre un segmento nuevo al superar `segment_bytes` o
+    cuando el actual tiene más de `segment_age` segundos. Retención: se
+    borran los segmentos cerrados más viejos mientras el total supere
+    `max_bytes` o su último enunciado tenga más de `max_age` segundos.
+
+    Claves: (segmento, n). read() devuelve una vista de un np.memmap del
+    segmento, sin copiar ni abrir archivos por enunciado. `read_only`:
+    solo lectura (replay), no repara, no rota ni borra nada.
+    """
+
+    def __init__(self, directory, rate=16000, segment_bytes=64 << 20, segment_age=86400,
+                 max_bytes=2 << 30, max_age=30 * 86400, read_only=False):
+        self.directory = directory
+        self.rate = rate
+        self.segment_bytes = segment_bytes
+        self.segment_age = segment_age
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.read_only = read_only
+        if not read_only:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._index = {}     # segmento -> registros (np.ndarray de INDEX_DTYPE)
+        self._sizes = {}     # segmento -> bytes de audio
+        self._maps = {}      # segmento -> np.memmap del .pcm
+        self._active = None
+        self._pending = []   # Registros del segmento activo aún no pasados a _index
+        self._pcm = self._idx = None
+        self._last_retention = 0.0
+
+        self.appended = 0
+        self.deleted_segments = 0
+        self.append_time = 0.0
+
+        self._load()
+        if not read_only:
+            self._open_segment(self._active or 1)
+            self.enforce_retention()
+
+    # -------------------------------------------------
+    # Apertura
+    # -------------------------------------------------
+
+    def _load(self):
+        numbers = sorted(int(m.group(1)) for m in map(SEGMENT_RE.match, os.listdir(self.directory)) if m)
+        for number in numbers:
+            pcm_path, idx_path = segment_paths(self.directory, number)
+            records = np.fromfile(idx_path, dtype=INDEX_DTYPE) if os.path.exists(idx_path) \
+                else np.zeros(0, dtype=INDEX_DTYPE)
+            # Solo cuentan los enunciados con registro completo y audio completo
+            end = records["offset"] + records["samples"].astype(np.uint64) * 2
+            valid = int(np.searchsorted(end, os.path.getsize(pcm_path), side="right"))
+            records = records[:valid]
+            size = int(end[valid - 1]) if valid else 0
+            if not self.read_only:
+                self._repair(number, records, size)
+            self._index[number] = records
+            self._sizes[number] = size
+        if numbers:
+            self._active = numbers[-1]
+
+    def _repair(self, number, records, size):
+        pcm_path, idx_path = segment_paths(self.directory, number)
+        if os.path.getsize(pcm_path) != size:
+            os.truncate(pcm_path, size)
+        if not os.path.exists(idx_path) or os.path.getsize(idx_path) != records.nbytes:
+            records.tofile(idx_path)
+
+    def _open_segment(self, number):
+        if self._pcm:
+            self._pcm.close()
+            self._idx.close()
+        if self._pending:
+            self._index[self._active] = np.concatenate(
+                [self._index[self._active], np.array(self._pending, dtype=INDEX_DTYPE)])
+            self._pending = []
+        pcm_path, idx_path = segment_paths(self.directory, number)
+        self._pcm = open(pcm_path, "ab")
+        self._idx = open(idx_path, "ab")
+        self._index.setdefault(number, np.zeros(0, dtype=INDEX_DTYPE))
+        self._sizes.setdefault(number, 0)
+        self._active = number
+
+    # -------------------------------------------------
+    # Escritura
+    # -------------------------------------------------
+
+    def append(self, audio, device=None, level=0.0, trace=None, timestamp=None):
+        """Agrega un enunciado (int16); devuelve su clave (segmento, n)"""
+        start = time.perf_counter()
+        audio = np.ascontiguousarray(audio, dtype="<i2")
+        timestamp = time.time() if timestamp is None else timestamp
+
+        with self._lock:
+            if self._should_rotate(audio.nbytes, timestamp):
+                self._open_segment(self._active + 1)
+                self._last_retention = 0.0  # Un segmento más cerrado: revisar ya
+
+            number = self._active
+            offset = self._sizes[number]
+            self._pcm.write(memoryview(audio).cast("B"))
+            self._pcm.flush()
+            record = (offset, len(audio), self.rate, timestamp, level,
+                      (device or "").encode()[:16], (trace or "").encode()[:12])
+            self._idx.write(np.array([record], dtype=INDEX_DTYPE).tobytes())
+            self._idx.flush()
+            self._pending.append(record)
+            self._sizes[number] = offset + audio.nbytes
+            key = (number, len(self._index[number]) + len(self._pending) - 1)
+            self.appended += 1
+
+        if timestamp - self._last_retention >= 60:
+            self.enforce_retention(timestamp)
+        self.append_time += time.perf_counter() - start
+        return key
+
+    def _should_rotate(self, nbytes, now):
+        size = self._sizes[self._active]
+        if not size:
+            return False
+        if size + nbytes > self.segment_bytes:
+            return True
+        records = self._index[self._active]
+        first = records[0]["time"] if len(records) else self._pending[0][3]
+        return now - first > self.segment_age
+
+    def enforce_retention(self, now=None):
+        """Borra segmentos cerrados por tamaño total o antigüedad; devuelve cuántos"""
+        now = time.time() if now is None else now
+        deleted = 0
+        with self._lock:
+            self._last_retention = now
+            closed = sorted(n for n in self._index if n != self._active)
+            total = sum(self._sizes.values())
+            for number in closed:
+                records = self._index[number]
+                too_old = len(records) and now - records["time"][-1] > self.max_age
+                if total <= self.max_bytes and not too_old and len(records):
+                    break
+                total -= self._sizes[number]
+                self._delete_segment(number)
+                deleted += 1
+        if deleted:
+            print(f"🗑️ Archivo: {deleted} segmento(s) viejo(s) borrado(s)")
+        return deleted
+
+    def _delete_segment(self, number):
+        self._maps.pop(number, None)
+        del self._index[number]
+        del self._sizes[number]
+        for path in segment_paths(self.directory, number):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.deleted_segments += 1
+
+    # -------------------------------------------------
+    # Lectura
+    # -------------------------------------------------
+
+    def _records(self, number):
+        if number == self._active and self._pending:
+            self._index[number] = np.concatenate(
+                [self._index[number], np.array(self._pending, dtype=INDEX_DTYPE)])
+            self._pending = []
+        return self._index[number]
+
+    def _map(self, number, end):
+        """np.memmap del segmento; el activo se vuelve a mapear cuando crece"""
+        samples = self._maps.get(number)
+        if samples is None or len(samples) * 2 < end:
+            pcm_path, _ = segment_paths(self.directory, number)
+            samples = np.memmap(pcm_path, dtype="<i2", mode="r",
+                                shape=(self._sizes[number] // 2,))
+            self._maps[number] = samples
+        return samples
+
+    def entry(self, key):
+        number, n = key
+        with self._lock:
+            return self._records(number)[n]
+
+    def read(self, key):
+        """Audio de un enunciado: vista int16 de solo lectura, sin copia"""
+        number, n = key
+        with self._lock:
+            record = self._records(number)[n]
+            start = int(record["offset"]) // 2
+            end = start + int(record["samples"])
+            return self._map(number, end * 2)[start:end]
+
+    def find(self, since=None, until=None, device=None, min_level=None):
+        """Claves de los enunciados que cumplen los filtros, del más viejo al más nuevo"""
+        keys = []
+        with self._lock:
+            for number in sorted(self._index):
+                records = self._records(number)
+                mask = np.ones(len(records), dtype=bool)
+                if since is not None:
+                    mask &= records["time"] >= since
+                if until is not None:
+                    mask &= records["time"] < until
+                if device is not None:
+                    mask &= records["device"] == device.encode()
+                if min_level is not None:
+                    mask &= records["level"] >= min_level
+                keys.extend((number, int(n)) for n in np.flatnonzero(mask))
+        return keys
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(r) for r in self._index.values()) + len(self._pending)
+
+    def __iter__(self):
+        return iter(self.find())
+
+    def stats(self):
+        with self._lock:
+            records = [self._records(n) for n in sorted(self._index)]
+            times = [r["time"] for r in records if len(r)]
+            samples = sum(int(r["samples"].sum()) for r in records)
+            return {
+                "utterances": sum(len(r) for r in records),
+                "segments": len(records),
+                "bytes": sum(self._sizes.values()),
+                "audio_hours": samples / self.rate / 3600,
+                "oldest": float(times[0][0]) if times else None,
+                "newest": float(times[-1][-1]) if times else None,
+                "appended": self.appended,
+                "deleted_segments": self.deleted_segments,
+                "append_ms": self.append_time / max(self.appended, 1) * 1000,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._pcm:
+                self._pcm.close()
+                self._idx.close()
+                self._pcm = self._idx = None
+            self._maps.clear()
+
+
+class ArchiveSource(AudioSource):
+    """
+    Replay del archivo como una fuente más: los enunciados en orden,
+    separados por `gap` segundos de silencio para que el segmentador
+    cierre cada uno. speed=None: tan rápido como se consuma.
+    """
+
+    def __init__(self, directory, chunk=1024, speed=None, gap=2.0, device=None, since=None):
+        self.archive = UtteranceArchive(directory, read_only=True)
+        keys = self.archive.find(since=since, device=device)
+        rate = int(self.archive.entry(keys[0])["rate"]) if keys else self.archive.rate
+        super().__init__(rate, chunk)
+        self.keys = keys
+        self.gap = np.zeros(int(gap * rate), dtype=np.int16)
+        self.speed = speed
+        self.realtime = speed is not None
+        self._pieces = self._iter_pieces()
+        self._piece = np.zeros(0, dtype=np.int16)
+        self._start = None
+        self._sent = 0
+
+    def _iter_pieces(self):
+        for key in self.keys:
+            yield self.archive.read(key)
+            yield self.gap
+
+    def _pace(self):
+        if self.speed is None:
+            return
+        if self._start is None:
+            self._start = time.monotonic()
+        delay = self._start + self._sent / self.rate / self.speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def read(self):
+        parts, need = [], self.chunk
+        while need:
+            if not len(self._piece):
+                self._piece = next(self._pieces, None)
+                if self._piece is None:
+                    self._piece = np.zeros(0, dtype=np.int16)
+                    break
+            parts.append(self._piece[:need])
+            need -= len(parts[-1])
+            self._piece = self._piece[len(parts[-1]):]
+        if not parts:
+            raise EndOfAudio(self.archive.directory)
+        self._pace()
+        data = b"".join(p.tobytes() for p in parts)
+        self._sent += len(data) // 2
+        return data
+
+    def close(self):
+        self.archive.close()
+
+
+# =====================================================
+# BENCHMARK: archivo por segmentos contra WAV sueltos
+# =====================================================
+
+def benchmark(n=2000, reads=500, seed=0):
+    """
+    `n` enunciados de 0.5-2.5 s escritos de las dos formas:
+    - Escritura: enunciados por segundo y MB/s.
+    - Apertura: cargar el índice contra listar y leer las cabeceras.
+    - Lectura al azar: `reads` enunciados (caché del SO caliente en
+      ambos casos), mmap contra abrir cada WAV.
+    - Retención: con un tope de 1/4 del total, cuánto queda.
+    """
+    import shutil
+    import tempfile
+    import wave
+    from audio_source import memmap_wav
+
+    rate = 16000
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(int(0.5 * rate), int(2.5 * rate), n)
+    pool = rng.normal(0, 2000, int(lengths.max())).astype(np.int16)
+    root = tempfile.mkdtemp(prefix="archive_bench_")
+    loose_dir = os.path.join(root, "wav")
+    seg_dir = os.path.join(root, "segments")
+    os.makedirs(loose_dir)
+    total_mb = lengths.sum() * 2 / 1e6
+    results = {}
+    print(f"📊 {n} enunciados ({total_mb:.0f} MB de PCM) en {root}\n")
+
+    try:
+        t0 = time.time() - n
+        start = time.perf_counter()
+        paths = []
+        for i, length in enumerate(lengths):
+            path = os.path.join(loose_dir, f"audio_{i:06d}.wav")
+            with wave.open(path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(rate)
+                wf.writeframes(pool[:length].tobytes())
+            paths.append(path)
+        loose_write = time.perf_counter() - start
+
+        archive = UtteranceArchive(seg_dir, rate, segment_bytes=16 << 20, max_bytes=1 << 40)
+        start = time.perf_counter()
+        keys = [archive.append(pool[:length], "cocina", 900.0, f"{i:08x}", t0 + i)
+                for i, length in enumerate(lengths)]
+        seg_write = time.perf_counter() - start
+        archive.close()
+        results["write"] = {"wav_per_s": n / loose_write, "archive_per_s": n / seg_write}
+        print(f"   Escritura:  WAV {n / loose_write:8.0f} enunciados/s ({total_mb / loose_write:5.0f} MB/s)"
+              f"   archivo {n / seg_write:8.0f}/s ({total_mb / seg_write:5.0f} MB/s)")
+
+        start = time.perf_counter()
+        names = sorted(os.listdir(loose_dir))
+        for name in names:
+            with wave.open(os.path.join(loose_dir, name), "rb") as wf:
+                wf.getnframes()
+        loose_open = time.perf_counter() - start
+        start = time.perf_counter()
+        archive = UtteranceArchive(seg_dir, rate, segment_bytes=16 << 20, max_bytes=1 << 40)
+        seg_open = time.perf_counter() - start
+        results["open_ms"] = {"wav": loose_open * 1000, "archive": seg_open * 1000}
+        print(f"   Apertura:   WAV {loose_open * 1000:8.1f} ms ({len(names)} archivos)"
+              f"        archivo {seg_open * 1000:8.1f} ms "
+              f"({len(os.listdir(seg_dir))} archivos, {len(archive)} enunciados)")
+
+        picks = rng.integers(0, n, reads)
+        start = time.perf_counter()
+        check = 0
+        for i in picks:
+            samples, _ = memmap_wav(paths[i])
+            check += int(samples[::512].sum())
+            del samples
+        loose_read = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in picks:
+            check -= int(archive.read(keys[i])[::512].sum())
+        seg_read = time.perf_counter() - start
+        assert check == 0, "el archivo no devuelve el mismo audio"
+        results["read_us"] = {"wav": loose_read / reads * 1e6, "archive": seg_read / reads * 1e6}
+        print(f"   Lectura:    WAV {loose_read / reads * 1e6:8.1f} µs/enunciado"
+              f"         archivo {seg_read / reads * 1e6:8.1f} µs/enunciado")
+
+        start = time.perf_counter()
+        found = archive.find(since=t0 + n / 2, device="cocina")
+        results["find_ms"] = (time.perf_counter() - start) * 1000
+        print(f"   Búsqueda:   {len(found)} enunciados de la segunda mitad en "
+              f"{results['find_ms']:.1f} ms (sin abrir audio)")
+
+        archive.max_bytes = archive.stats()["bytes"] // 4
+        archive.enforce_retention()
+        s = results["retention"] = archive.stats()
+        print(f"   Retención:  tope {archive.max_bytes / 1e6:.0f} MB -> {s['segments']} segmentos, "
+              f"{s['utterances']} enunciados, {s['bytes'] / 1e6:.0f} MB")
+        archive.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    # python archive.py bench
+    # python archive.py list <carpeta>
+    import sys
+    from datetime import datetime
+
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark()
+    elif len(sys.argv) > 2 and sys.argv[1] == "list":
+        archive = UtteranceArchive(sys.argv[2])
+        for key in archive:
+            record = archive.entry(key)
+            print(f"{key[0]:6d}:{key[1]:<6d} {datetime.fromtimestamp(record['time']):%Y-%m-%d %H:%M:%S} "
+                  f"{record['samples'] / record['rate']:5.1f}s  nivel {record['level']:6.0f}  "
+                  f"{record['device'].decode() or '-':16s} {record['trace'].decode()}")
+        s = archive.stats()
+        print(f"\n{s['utterances']} enunciados, {s['audio_hours']:.2f} h, "
+              f"{s['bytes'] / 1e6:.0f} MB en {s['segments']} segmentos")
+    else:
+        print("Uso: python archive.py bench")
+        print("     python archive.py list <carpeta>")
@@ -0,0 +1,336 @@
+"""
+Fuentes de audio intercambiables para VoiceRecorder
+Micrófono (PyAudio), archivo WAV, PCM crudo por stdin y generador sintético
+"""
+
+import os
+import sys
+import time
+import queue
+import wave
+import struct
+import numpy as np
+from resample import PolyphaseResampler
+
+try:
+    import pyaudio  # pip install pyaudio (solo para el micrófono)
+except ImportError:
+    pyaudio = None
+
+
+def memmap_wav(path):
+    """
+    Mapea en memoria los datos PCM int16 de un WAV, sin leerlo entero.
+    Devuelve (muestras, rate). Tolera el tamaño "desconocido" de los WAV
+    escritos en streaming (lee hasta el final del archivo).
+    """
+    channels = rate = bits = None
+    with open(path, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError(f"{path}: no es un WAV")
+
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path}: falta el bloque 'data'")
+            chunk_id, size = struct.unpack('<4sI', header)
+
+            if chunk_id == b'fmt ':
+                fmt = f.read(size)
+                _, channels, rate, _, _, bits = struct.unpack('<HHIIHH', fmt[:16])
+                f.seek(size & 1, 1)
+            elif chunk_id == b'data':
+                offset = f.tell()
+                size = min(size, os.path.getsize(path) - offset)
+                break
+            else:
+                f.seek(size + (size & 1), 1)
+
+    if bits != 16 or channels != 1:
+        raise ValueError(f"{path}: se esperaba PCM 16 bits mono")
+
+    samples = np.memmap(path, dtype='<i2', mode='r', offset=offset, shape=(size // 2,))
+    return samples, rate
+
+
+class EndOfAudio(Exception):
+    """La fuente no tiene más audio (fin de archivo / pipe cerrado)"""
+
+
+class AudioSource:
+    """
+    Interfaz común: read() devuelve un chunk de PCM int16 mono (bytes),
+    b'' si por ahora no hay datos, y lanza EndOfAudio al terminar.
+
+    `realtime` indica si la fuente entrega audio al ritmo del reloj
+    (micrófono) o tan rápido como se consuma (replay).
+    """
+
+    realtime = False
+    overflows = 0
+
+    def __init__(self, rate=16000, chunk=1024):
+        self.rate = rate
+        self.chunk = chunk
+
+    def read(self):
+        raise NotImplementedError
+
+    def drain(self):
+        """Chunks ya capturados y pendientes de leer (solo fuentes en vivo)"""
+        return []
+
+    def close(self):
+        pass
+
+
+class PyAudioSource(AudioSource):
+    """
+    Micrófono en modo callback: el callback solo encola, nunca bloquea.
+
+    `capture_rate`: None abre el dispositivo a `rate`; "native" usa su
+    tasa por defecto (muchos USB solo aceptan 44.1/48 kHz) y un número
+    fuerza esa tasa. Si difiere de `rate`, `self.rate` queda en la tasa
+    real y el chunk se escala para mantener la misma duración; el
+    remuestreo lo hace ResampledSource (ver open_source).
+    """
+
+    realtime = True
+
+    def __init__(self, rate=16000, chunk=1024, channels=1, device=None, buffer_seconds=30,
+                 capture_rate=None):
+        if pyaudio is None:
+            raise RuntimeError("PyAudio no instalado (pip install pyaudio)")
+
+        self.audio = pyaudio.PyAudio()
+        if capture_rate == "native":
+            info = (self.audio.get_device_info_by_index(device) if device is not None
+                    else self.audio.get_default_input_device_info())
+            capture_rate = int(info['defaultSampleRate'])
+        if capture_rate and capture_rate != rate:
+            chunk = int(round(chunk * capture_rate / rate))
+            rate = capture_rate
+        super().__init__(rate, chunk)
+
+        self.chunks = queue.Queue(maxsize=rate * buffer_seconds // chunk)
+        self.overflows = 0
+
+        # Listar dispositivos
+        print("🎤 Dispositivos de audio disponibles:\n")
+        for i in range(self.audio.get_device_count()):
+            info = self.audio.get_device_info_by_index(i)
+            if info['maxInputChannels'] > 0:
+                print(f"   [{i}] {info['name']}")
+                print(f"       Canales: {info['maxInputChannels']}")
+                print(f"       Sample Rate: {int(info['defaultSampleRate'])}")
+                print()
+
+        # Abrir stream
+        self.stream = self.audio.open(
+            format=pyaudio.paInt16,
+            channels=channels,
+            rate=rate,
+            input=True,
+            input_device_index=device,
+            frames_per_buffer=chunk,
+            stream_callback=self._on_audio
+        )
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """Callback de PyAudio: solo encola, nunca bloquea"""
+        try:
+            self.chunks.put_nowait(in_data)
+        except queue.Full:
+            self.overflows += 1
+        return (None, pyaudio.paContinue)
+
+    def read(self):
+        try:
+            return self.chunks.get(timeout=1)
+        except queue.Empty:
+            return b''
+
+    def drain(self):
+        pending = []
+        while True:
+            try:
+                pending.append(self.chunks.get_nowait())
+            except queue.Empty:
+                return pending
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+        self.audio.terminate()
+
+
+class WavFileSource(AudioSource):
+    """
+    Replay de un WAV (PCM 16 bits, mono).
+    rate=None: a la tasa del archivo (open_source lo remuestrea si hace falta).
+    speed=None: tan rápido como se consuma; speed=1.0: tiempo real.
+    """
+
+    def __init__(self, path, rate=None, chunk=1024, speed=None):
+        self.path = path
+        self.wf = wave.open(path, 'rb')
+        if self.wf.getsampwidth() != 2 or self.wf.getnchannels() != 1:
+            raise ValueError(f"{path}: se esperaba PCM 16 bits mono")
+        if rate is not None and self.wf.getframerate() != rate:
+            raise ValueError(f"{path}: {self.wf.getframerate()} Hz, se esperaba {rate} Hz")
+        super().__init__(self.wf.getframerate(), chunk)
+        self.speed = speed
+        self.realtime = speed is not None
+        self._start = None
+        self._sent = 0
+
+    def _pace(self):
+        if self.speed is None:
+            return
+        if self._start is None:
+            self._start = time.monotonic()
+        due = self._start + self._sent / self.rate / self.speed
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def read(self):
+        data = self.wf.readframes(self.chunk)
+        if not data:
+            raise EndOfAudio(self.path)
+        self._pace()
+        self._sent += len(data) // 2
+        return data
+
+    def close(self):
+        self.wf.close()
+
+
+class PipeSource(AudioSource):
+    """PCM crudo int16 mono por stdin (p. ej. `arecord -f S16_LE -r 16000 | ...`)"""
+
+    def __init__(self, rate=16000, chunk=1024, stream=None):
+        super().__init__(rate, chunk)
+        self.stream = stream or sys.stdin.buffer
+
+    def read(self):
+        data = self.stream.read(self.chunk * 2)
+        if not data:
+            raise EndOfAudio("stdin")
+        if len(data) % 2:
+            data = data[:-1]
+        return data
+
+
+class SyntheticSource(AudioSource):
+    """Audio generado (corpus sintético del VAD o las muestras dadas), sin reloj"""
+
+    def __init__(self, rate=16000, chunk=1024, samples=None, seed=0):
+        super().__init__(rate, chunk)
+        if samples is None:
+            from vad import synthetic_corpus
+            samples = synthetic_corpus(rate, seed)[0][1]
+        self.samples = np.ascontiguousarray(samples, dtype=np.int16)
+        self.pos = 0
+
+    def read(self):
+        if self.pos >= len(self.samples):
+            raise EndOfAudio("synthetic")
+        data = self.samples[self.pos:self.pos + self.chunk].tobytes()
+        self.pos += self.chunk
+        return data
+
+
+class ResampledSource(AudioSource):
+    """
+    Envuelve una fuente a otra tasa (p. ej. micrófono a 48 kHz) y entrega
+    chunks de exactamente `chunk` muestras a `rate`, como las demás fuentes.
+    """
+
+    def __init__(self, source, rate=16000, chunk=1024):
+        super().__init__(rate, chunk)
+        self.source = source
+        self.realtime = source.realtime
+        self.resampler = PolyphaseResampler(source.rate, rate, max_chunk=source.chunk)
+        self._pending = np.zeros(chunk + self.resampler.max_out, dtype=np.int16)
+        self._fill = 0
+
+    @property
+    def overflows(self):
+        return self.source.overflows
+
+    def _push(self, data):
+        out = self.resampler.process(np.frombuffer(data, dtype=np.int16))
+        self._pending[self._fill:self._fill + len(out)] = out
+        self._fill += len(out)
+
+    def _pop(self, n):
+        data = self._pending[:n].tobytes()
+        rest = self._fill - n
+        self._pending[:rest] = self._pending[n:self._fill]
+        self._fill = rest
+        return data
+
+    def read(self):
+        while self._fill < self.chunk:
+            try:
+                data = self.source.read()
+            except EndOfAudio:
+                if self._fill:
+                    return self._pop(self._fill)  # Último trozo incompleto
+                raise
+            if not data:
+                return b''
+            self._push(data)
+        return self._pop(self.chunk)
+
+    def drain(self):
+        pending = []
+        for data in self.source.drain():
+            self._push(data)
+            while self._fill >= self.chunk:
+                pending.append(self._pop(self.chunk))
+        return pending
+
+    def close(self):
+        self.source.close()
+
+
+def open_source(spec, rate=16000, chunk=1024, channels=1, buffer_seconds=30, capture_rate=None):
+    """
+    Crea una fuente a partir de un texto:
+      mic | mic:<índice> | wav:<ruta> | wav:<ruta>@<velocidad> | pipe | synthetic
+      archive:<carpeta>[@<velocidad>]  (enunciados de archive.UtteranceArchive)
+    Micrófono, WAV y archivo a otra tasa (ver `capture_rate`) se remuestrean a `rate`.
+    """
+    spec = spec or "mic"
+    kind, _, arg = spec.partition(":")
+
+    if kind == "mic":
+        device = int(arg) if arg else None
+        source = PyAudioSource(rate, chunk, channels, device, buffer_seconds, capture_rate)
+    elif kind in ("wav", "archive"):
+        path, speed = arg, None
+        if "@" in arg:
+            path, _, speed = arg.rpartition("@")
+        speed = float(speed) if speed else None
+        if kind == "wav":
+            source = WavFileSource(path, None, chunk, speed)
+        else:
+            from archive import ArchiveSource  # archive importa este módulo
+            source = ArchiveSource(path, chunk, speed)
+    else:
+        source = None
+
+    if source is not None:
+        if source.rate == rate:
+            return source
+        print(f"🔁 Captura a {source.rate} Hz, remuestreo a {rate} Hz")
+        return ResampledSource(source, rate, chunk)
+    if kind == "pipe":
+        return PipeSource(rate, chunk)
+    if kind == "synthetic":
+        return SyntheticSource(rate, chunk, seed=int(arg) if arg else 0)
+
+    raise ValueError(f"Fuente de audio desconocida: {spec}")
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Benchmarks del pipeline de captura
+Nivel, VAD, segmentación, buffer, codificación WAV/FLAC y subida (Drive falso)
+Guarda los resultados en JSON para comparar entre cambios
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+import server
+from vad import EnergyVAD, MultiFeatureVAD, synthetic_corpus
+from ring_buffer import AudioRingBuffer
+from encoding import encode_wav, encode_flac, sf
+from audio_source import memmap_wav
+from resample import PolyphaseResampler
+
+RATE = server.RATE
+CHUNK = server.CHUNK
+
+
+# =====================================================
+# AUDIO DE ENTRADA
+# =====================================================
+
+def load_audio(path=None, repeat=6):
+    """Audio de prueba: WAV(s) grabados o el corpus sintético repetido"""
+    if path is None:
+        samples = synthetic_corpus(RATE)[0][1]
+        return np.tile(samples, repeat), "sintético"
+
+    files = [path]
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.wav'))
+
+    parts = []
+    for f in files:
+        samples, rate = memmap_wav(f)
+        if rate != RATE:
+            samples = PolyphaseResampler(rate, RATE).resample(samples)
+        parts.append(np.asarray(samples))
+    return np.concatenate(parts), f"{len(parts)} archivo(s)"
+
+
+# =====================================================
+# MEDICIÓN
+# =====================================================
+
+def summarize(name, latencies, audio_seconds, units, unit_name="chunks"):
+    """Métricas de una etapa a partir de las latencias por llamada (s)"""
+    lat = np.asarray(latencies)
+    total = float(lat.sum())
+    return {
+        "stage": name,
+        "calls": len(lat),
+        f"{unit_name}_per_s": units / total if total else None,
+        "audio_seconds": audio_seconds,
+        "rtf": total / audio_seconds if audio_seconds else None,  # < 1 = más rápido que tiempo real
+        "speed_x": audio_seconds / total if total else None,
+        "p50_ms": float(np.percentile(lat, 50) * 1000),
+        "p95_ms": float(np.percentile(lat, 95) * 1000),
+        "p99_ms": float(np.percentile(lat, 99) * 1000),
+        "max_ms": float(lat.max() * 1000),
+    }
+
+
+def run_chunks(fn, samples, chunk=CHUNK):
+    """Llama fn(chunk) sobre todo el audio y devuelve la latencia de cada llamada"""
+    latencies = []
+    clock = time.perf_counter
+    for pos in range(0, len(samples) - chunk + 1, chunk):
+        block = samples[pos:pos + chunk]
+        start = clock()
+        fn(block)
+        latencies.append(clock() - start)
+    return latencies
+
+
+def peak_memory(fn):
+    """Pico de memoria Python (KB) durante fn(), medido aparte del tiempo"""
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+# =====================================================
+# ETAPAS
+# =====================================================
+
+def chunk_stage(name, factory, samples):
+    """Etapa que procesa chunk a chunk; `factory()` crea la función con estado nuevo"""
+    latencies = run_chunks(factory(), samples)
+    result = summarize(name, latencies, len(samples) / RATE, len(latencies))
+    result["peak_kb"] = peak_memory(lambda: run_chunks(factory(), samples))
+    return result
+
+
+def segmentation_stage(samples):
+    """Detección + reglas de silencio, igual que en vivo (create_segmenter)"""
+    def factory():
+        segmenter = server.create_segmenter()
+        state = {"pos": 0, "recording": False}
+
+        def step(block):
+            state["pos"] += len(block)
+            speech, _ = segmenter.detect(block)
+            if not state["recording"]:
+                if speech:
+                    segmenter.start(state["pos"])
+                    state["recording"] = True
+            elif segmenter.update(speech, state["pos"]):
+                state["recording"] = False
+        return step
+
+    return chunk_stage("segmentation", factory, samples)
+
+
+def find_utterances(samples):
+    return [(s, e) for s, e, _ in server.create_segmenter().segments(samples, CHUNK)]
+
+
+def utterance_stage(name, fn, samples, utterances):
+    """Etapa por enunciado (codificación, subida)"""
+    latencies = []
+    for start, end in utterances:
+        t0 = time.perf_counter()
+        fn(samples[start:end])
+        latencies.append(time.perf_counter() - t0)
+    audio = sum(e - s for s, e in utterances) / RATE
+    result = summarize(name, latencies, audio, len(utterances), "utterances")
+    result["peak_kb"] = peak_memory(lambda: [fn(samples[s:e]) for s, e in utterances])
+    return result
+
+
+def upload_stage(samples, utterances):
+    """Codificación + subida en memoria contra el Drive falso local"""
+    from fake_drive import start_fake_drive
+    from drive_upload import DriveUploader
+    from encoding import encode_audio
+
+    fake, endpoint = start_fake_drive()
+    uploader = DriveUploader(api_endpoint=endpoint)
+    uploader.upload_bytes(b"\0", "calentar.wav", "audio/wav")
+
+    def upload(audio):
+        data, mimetype, ext = encode_audio(audio, RATE, server.CODEC)
+        uploader.upload_bytes(data, f"bench.{ext}", mimetype)
+
+    try:
+        return utterance_stage("upload_stub", upload, samples, utterances)
+    finally:
+        fake.shutdown()
+
+
+def run_all(samples):
+    results = [
+        chunk_stage("level", lambda: EnergyVAD(RATE).process, samples),
+        chunk_stage("vad_multi", lambda: MultiFeatureVAD(RATE).process, samples),
+        segmentation_stage(samples),
+        chunk_stage("ring_buffer", lambda: AudioRingBuffer(RATE * server.BUFFER_SECONDS).write, samples),
+    ]
+
+    utterances = find_utterances(samples)
+    if utterances:
+        results.append(utterance_stage(
+            "encode_wav", lambda a: encode_wav(a, RATE), samples, utterances))
+        if sf is not None:
+            results.append(utterance_stage(
+                "encode_flac", lambda a: encode_flac(a, RATE), samples, utterances))
+        try:
+            results.append(upload_stage(samples, utterances))
+        except Exception as e:
+            print(f"⚠️ Etapa de subida omitida: {e}")
+
+    return results, len(utterances)
+
+
+# =====================================================
+# REPORTE
+# =====================================================
+
+def max_rss_kb():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 1024 if sys.platform == "darwin" else rss
+    except ImportError:
+        return None  # Windows
+
+
+def print_results(results):
+    print(f"   {'etapa':14s} {'unid/s':>10s} {'x t.real':>9s} {'p50 ms':>8s} "
+          f"{'p95 ms':>8s} {'p99 ms':>8s} {'pico KB':>8s}")
+    for r in results:
+        rate = r.get("chunks_per_s") or r.get("utterances_per_s") or 0
+        print(f"   {r['stage']:14s} {rate:10.0f} {r['speed_x']:9.0f} {r['p50_ms']:8.3f} "
+              f"{r['p95_ms']:8.3f} {r['p99_ms']:8.3f} {r['peak_kb']:8.0f}")
+
+
+def compare(results, previous_path, tolerance=0.10):
+    """Compara speed_x con una ejecución anterior; marca regresiones > tolerancia"""
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = {r["stage"]: r for r in json.load(f)["stages"]}
+
+    print(f"\n📈 Comparación con {previous_path}:")
+    regressions = 0
+    for r in results:
+        old = previous.get(r["stage"])
+        if not old or not old.get("speed_x"):
+            continue
+        change = r["speed_x"] / old["speed_x"] - 1
+        mark = "❌" if change < -tolerance else "✅"
+        regressions += change < -tolerance
+        print(f"   {mark} {r['stage']:14s} {old['speed_x']:9.0f}x → {r['speed_x']:9.0f}x ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline de captura")
+    parser.add_argument("--audio", help="WAV o carpeta de WAV (por defecto: sintético)")
+    parser.add_argument("--out", default="bench_results.json", help="Archivo JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Caída de velocidad tolerada antes de marcar regresión (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    samples, description = load_audio(args.audio)
+    audio_seconds = len(samples) / RATE
+    print(f"📊 Benchmark: {audio_seconds:.0f}s de audio ({description}), chunk {CHUNK}\n")
+
+    results, n_utterances = run_all(samples)
+    print_results(results)
+    print(f"\n   Enunciados: {n_utterances}   Memoria máxima del proceso: {max_rss_kb() or 0:.0f} KB")
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "audio": description,
+        "audio_seconds": audio_seconds,
+        "utterances": n_utterances,
+        "max_rss_kb": max_rss_kb(),
+        "stages": results,
+    }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Resultados: {args.out}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    # python benchmark.py [--audio carpeta] [--out res.json] [--compare anterior.json]
+    main()
@@ -0,0 +1,115 @@
+"""
+Debounce de archivos: espera a que un archivo deje de cambiar antes de procesarlo
+Un solo hilo con un heap de plazos; quien avisa (p. ej. watchdog) nunca se bloquea
+"""
+
+import os
+import time
+import heapq
+import threading
+
+
+class SettleScheduler:
+    """
+    `touch(ruta)` en cada evento; `on_ready(ruta)` se llama una sola vez
+    cuando el tamaño y el mtime llevan `window` segundos sin cambiar.
+
+    Los eventos repetidos solo mueven el plazo, así una ráfaga de
+    modificaciones se coalesce en una llamada. Un archivo que no deja
+    de cambiar se entrega igual tras `max_wait` segundos.
+    """
+
+    def __init__(self, on_ready, window=0.5, max_wait=10.0):
+        self.on_ready = on_ready
+        self.window = window
+        self.max_wait = max_wait
+        self.pending = {}  # ruta -> [plazo, primer evento, (mtime, tamaño)]
+        self.fired = 0
+        self.coalesced = 0
+        self._heap = []
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="settle", daemon=True)
+        self._thread.start()
+
+    def touch(self, path):
+        """Avisa que el archivo cambió (O(log n), sin I/O)"""
+        now = time.monotonic()
+        deadline = now + self.window
+        with self._cond:
+            entry = self.pending.get(path)
+            if entry is None:
+                self.pending[path] = [deadline, now, None]
+            else:
+                # Una ráfaga que no termina tampoco pasa de `max_wait`
+                deadline = min(deadline, entry[1] + self.max_wait)
+                entry[0] = deadline
+                self.coalesced += 1
+            heapq.heappush(self._heap, (deadline, path))
+            self._cond.notify()
+
+    def _signature(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def _check(self, path, entry, now):
+        """¿Está listo? Si no, devuelve el nuevo plazo (None = descartar)"""
+        signature = self._signature(path)
+        if signature is None:
+            return None  # Borrado antes de asentarse
+        # Estable si no cambió desde la última mirada o si su mtime ya es viejo
+        stable = signature == entry[2] or time.time() - signature[0] >= self.window
+        if stable or now - entry[1] >= self.max_wait:
+            return True
+        entry[2] = signature
+        return now + self.window
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                if not self._running:
+                    return
+                deadline, path = heapq.heappop(self._heap)
+                entry = self.pending.get(path)
+                if entry is None or entry[0] != deadline:
+                    continue  # Plazo viejo: hubo un evento posterior
+
+            # El stat va fuera del lock para no frenar a touch()
+            result = self._check(path, entry, time.monotonic())
+
+            with self._cond:
+                if self.pending.get(path) is not entry or entry[0] != deadline:
+                    continue  # Llegó otro evento mientras tanto
+                if result is True or result is None:
+                    del self.pending[path]
+                else:
+                    entry[0] = result
+                    heapq.heappush(self._heap, (result, path))
+                    continue
+
+            if result is True:
+                self.fired += 1
+                try:
+                    self.on_ready(path)
+                except Exception as e:
+                    print(f"❌ Error entregando {os.path.basename(path)}: {e}")
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": len(self.pending),
+                "fired": self.fired,
+                "coalesced": self.coalesced,
+            }
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join()
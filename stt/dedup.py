@@ -0,0 +1,115 @@
+"""
+Deduplicación de enunciados entre varios micrófonos
+Si dos micrófonos oyen la misma frase, se sube solo la mejor toma
+"""
+
+import time
+import threading
+
+
+def overlap_ratio(a, b):
+    """Solapamiento de dos intervalos (inicio, fin) relativo al más corto"""
+    shared = min(a[1], b[1]) - max(a[0], b[0])
+    shortest = min(a[1] - a[0], b[1] - b[0])
+    return shared / shortest if shortest > 0 else 0.0
+
+
+class UtteranceDeduper:
+    """
+    Cada enunciado espera `window` segundos antes de subirse. Los que
+    llegan de otros micrófonos en ese tiempo y se solapan al menos
+    `min_overlap` forman un grupo; del grupo se entrega solo el de mayor
+    `score` (relación señal/ruido) y el resto se descarta.
+
+    Los intervalos son en tiempo de reloj (epoch), comunes a todas las
+    fuentes. Una toma que llega después de que su grupo ya salió también
+    se descarta.
+    """
+
+    def __init__(self, submit, window=0.4, min_overlap=0.5, on_drop=None, keep=32):
+        self.submit = submit
+        self.on_drop = on_drop
+        self.window = window
+        self.min_overlap = min_overlap
+        self.keep = keep
+        self.groups = []     # [{"interval", "deadline", "best": (score, device, item), "devices"}]
+        self.recent = []     # Intervalos de grupos ya entregados
+        self.offered = 0
+        self.duplicates = 0
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="dedup", daemon=True)
+        self._thread.start()
+
+    def offer(self, device, start, end, score, item):
+        """Propone un enunciado de `device` que ocupó [start, end] (epoch)"""
+        interval = (start, end)
+        with self._cond:
+            self.offered += 1
+            for done in self.recent:
+                if overlap_ratio(done, interval) >= self.min_overlap:
+                    self.duplicates += 1
+                    late = item
+                    break
+            else:
+                late = None
+                for group in self.groups:
+                    if device not in group["devices"] and \
+                            overlap_ratio(group["interval"], interval) >= self.min_overlap:
+                        group["devices"].add(device)
+                        group["interval"] = (min(group["interval"][0], start),
+                                             max(group["interval"][1], end))
+                        self.duplicates += 1
+                        if score > group["best"][0]:
+                            late, group["best"] = group["best"][2], (score, device, item)
+                        else:
+                            late = item
+                        break
+                else:
+                    self.groups.append({
+                        "interval": interval,
+                        "deadline": time.monotonic() + self.window,
+                        "best": (score, device, item),
+                        "devices": {device},
+                    })
+                    self._cond.notify()
+        if late is not None and self.on_drop:
+            self.on_drop(late)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._due():
+                    timeout = min(g["deadline"] for g in self.groups) - time.monotonic() \
+                        if self.groups else None
+                    self._cond.wait(timeout)
+                if not self._running and not self.groups:
+                    return
+                now = time.monotonic()
+                ready = [g for g in self.groups if g["deadline"] <= now or not self._running]
+                self.groups = [g for g in self.groups if g not in ready]
+                for group in ready:
+                    self.recent.append(group["interval"])
+                del self.recent[:-self.keep]
+
+            for group in ready:
+                self.submit(group["best"][2])
+
+    def _due(self):
+        now = time.monotonic()
+        return any(g["deadline"] <= now for g in self.groups)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "offered": self.offered,
+                "duplicates": self.duplicates,
+                "pending": len(self.groups),
+            }
+
+    def close(self):
+        """Entrega lo pendiente y termina"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join()
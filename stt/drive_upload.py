@@ -1,45 +1,383 @@
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from google.auth.credentials import AnonymousCredentials
+from datetime import datetime, timedelta, timezone
+import threading
+import queue
 import pickle
+import io
+import json
+import time
 import os
 
 SCOPES = ['https://www.googleapis.com/auth/drive.file']
 FOLDER_ID = "1CiauMvZxDbhv9rfAXBL3CTkKpVw3ZI8Q"
+TOKEN_PATH = "token.pickle"
+CREDENTIALS_PATH = "credentials.json"
+REFRESH_MARGIN = 300  # Renovar el token 5 min antes de que expire
+DRIVE_ROOT = "https://www.googleapis.com/"
+RESUMABLE_CHUNK = 256 * 1024  # Drive exige trozos múltiplos de 256 KiB
 
-def upload_file(filename):
-    creds = None
 
-    if os.path.exists("token.pickle"):
-        with open("token.pickle", "rb") as f:
-            creds = pickle.load(f)
+class DriveUploader:
+    """
+    Cliente de Drive de larga duración.
 
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                "credentials.json", SCOPES
-            )
-            creds = flow.run_local_server(port=0)
+    Carga las credenciales una vez, las renueva antes de que expiren y
+    reutiliza los servicios (y sus conexiones HTTP) entre subidas.
+
+    httplib2 no es seguro entre hilos, así que cada petición toma un
+    servicio libre del pool (o crea uno) y lo devuelve al terminar: los
+    workers del pipeline y las subidas reanudables suben en paralelo,
+    cada uno con su conexión. El lock solo cubre las credenciales, el
+    pool y las métricas, nunca la red.
+
+    `api_endpoint` permite apuntar a un Drive falso local (ver fake_drive.py).
+    """
+
+    def __init__(self, folder_id=FOLDER_ID, token_path=TOKEN_PATH,
+                 credentials_path=CREDENTIALS_PATH, api_endpoint=None):
+        self.folder_id = folder_id
+        self.token_path = token_path
+        self.credentials_path = credentials_path
+        self.api_endpoint = api_endpoint
+
+        self._lock = threading.Lock()
+        self._creds = AnonymousCredentials() if api_endpoint else None
+        self._idle = []  # Servicios libres (uno por petición en curso como máximo)
+
+        # Métricas
+        self.uploads = 0
+        self.setup_time = 0.0
+        self.upload_time = 0.0
+
+    def _load_credentials(self):
+        creds = None
+
+        if os.path.exists(self.token_path):
+            with open(self.token_path, "rb") as f:
+                creds = pickle.load(f)
 
-        with open("token.pickle", "wb") as f:
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                creds.refresh(Request())
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    self.credentials_path, SCOPES
+                )
+                creds = flow.run_local_server(port=0)
+
+            self._save_credentials(creds)
+
+        return creds
+
+    def _save_credentials(self, creds):
+        with open(self.token_path, "wb") as f:
             pickle.dump(creds, f)
 
-    service = build("drive", "v3", credentials=creds)
+    def _needs_refresh(self):
+        creds = self._creds
+        if not getattr(creds, "refresh_token", None):
+            return False
+        if not creds.valid:
+            return True
+        if creds.expiry is None:
+            return False
+        # google-auth guarda la expiración como UTC sin zona horaria
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return creds.expiry - now < timedelta(seconds=REFRESH_MARGIN)
+
+    def _ensure_credentials(self):
+        if self._creds is None:
+            self._creds = self._load_credentials()
+        elif self._needs_refresh():
+            # Se renueva en el mismo objeto, el servicio sigue siendo válido
+            self._creds.refresh(Request())
+            self._save_credentials(self._creds)
+
+    def _build_service(self):
+        if self.api_endpoint:
+            # Documento de discovery incluido en la librería, apuntando al
+            # endpoint local (api_endpoint solo cambia el host, no el esquema)
+            doc = json.loads(get_static_doc("drive", "v3"))
+            doc["rootUrl"] = self.api_endpoint
+            return build_from_document(doc, credentials=self._creds)
+        return build("drive", "v3", credentials=self._creds)
+
+    def _acquire(self):
+        """Credenciales al día y un servicio para este hilo (del pool o nuevo)"""
+        with self._lock:
+            self._ensure_credentials()
+            if self._idle:
+                return self._idle.pop()
+        # Las credenciales son compartidas: renovarlas las actualiza para todos
+        return self._build_service()
+
+    def _release(self, service):
+        with self._lock:
+            self._idle.append(service)
+
+    def upload(self, filename, mimetype="audio/wav"):
+        """Sube un archivo a la carpeta de Drive y devuelve su id"""
+        media = MediaFileUpload(filename, mimetype=mimetype)
+        return self._create(os.path.basename(filename), media)
+
+    def upload_bytes(self, data, name, mimetype="audio/flac"):
+        """Sube un buffer en memoria (sin pasar por disco) y devuelve su id"""
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mimetype)
+        return self._create(name, media)
+
+    def _create(self, name, media):
+        file_metadata = {
+            "name": name,
+            "parents": [self.folder_id]
+        }
+
+        start = time.perf_counter()
+        service = self._acquire()
+        ready = time.perf_counter()
+        try:
+            result = service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields="id"
+            ).execute()
+        finally:
+            self._release(service)
+
+        with self._lock:
+            self.uploads += 1
+            self.setup_time += ready - start
+            self.upload_time += time.perf_counter() - ready
+
+        return result.get("id")
+
+    def _request(self, uri, method, body=None, headers=None):
+        """Petición HTTP cruda con una conexión autorizada del pool"""
+        service = self._acquire()
+        try:
+            return service._http.request(uri, method, body=body, headers=headers)
+        finally:
+            self._release(service)
+
+    def start_resumable(self, name, mimetype="audio/wav", chunk_size=RESUMABLE_CHUNK):
+        """Abre una subida reanudable que se alimenta con write()"""
+        return ResumableUpload(self, name, mimetype, chunk_size)
+
+    def stats(self):
+        """Tiempos acumulados de preparación (credenciales/servicio) y subida"""
+        with self._lock:
+            n = max(self.uploads, 1)
+            return {
+                "uploads": self.uploads,
+                "setup_ms_avg": self.setup_time / n * 1000,
+                "upload_ms_avg": self.upload_time / n * 1000,
+            }
+
+
+class ResumableUpload:
+    """
+    Subida reanudable de Drive alimentada mientras se graba.
+
+    La sesión se abre en cuanto se crea el objeto y un thread propio
+    envía cada trozo de `chunk_size` bytes a medida que se completa.
+    write() y close() nunca bloquean: al cerrar solo queda por enviar
+    el último trozo (menos de `chunk_size` bytes).
+
+    Si al cerrar todavía no se envió nada, `header` reemplaza el inicio
+    del buffer (p. ej. la cabecera WAV con el tamaño real).
+    """
+
+    def __init__(self, uploader, name, mimetype, chunk_size=RESUMABLE_CHUNK):
+        self.uploader = uploader
+        self.name = name
+        self.mimetype = mimetype
+        self.chunk_size = chunk_size
+
+        self.file_id = None
+        self.error = None
+        self.done = threading.Event()
+
+        # Métricas
+        self.sent = 0
+        self.sent_before_close = 0
+        self.overlap_time = 0.0  # Tiempo de red mientras aún se grababa
+        self.tail_time = 0.0     # Desde close() hasta la confirmación
+        self._closed_at = None
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
 
-    file_metadata = {
-        "name": filename,
-        "parents": [FOLDER_ID]
-    }
+    def write(self, data):
+        """Agrega bytes a la subida (copia, el llamador puede reutilizar su buffer)"""
+        self._queue.put(bytes(data))
 
-    media = MediaFileUpload(filename, mimetype="audio/wav")
+    def close(self, header=None):
+        """Termina la subida (no bloquea, ver wait())"""
+        self._closed_at = time.perf_counter()
+        self._queue.put(("close", header))
 
-    service.files().create(
-        body=file_metadata,
-        media_body=media,
-        fields="id"
-    ).execute()
+    def abort(self):
+        """Cancela la sesión sin crear el archivo"""
+        self._closed_at = time.perf_counter()
+        self._queue.put(("abort", None))
 
+    def wait(self, timeout=None):
+        """Espera a que termine; devuelve el id del archivo (o None)"""
+        self.done.wait(timeout)
+        return self.file_id
+
+    def _timed(self, uri, method, body=None, headers=None):
+        start = time.perf_counter()
+        resp, content = self.uploader._request(uri, method, body, headers)
+        if self._closed_at is None:
+            self.overlap_time += time.perf_counter() - start
+        return resp, content
+
+    def _open_session(self):
+        root = self.uploader.api_endpoint or DRIVE_ROOT
+        uri = f"{root}upload/drive/v3/files?uploadType=resumable&fields=id"
+        metadata = {"name": self.name, "parents": [self.uploader.folder_id]}
+        resp, _ = self._timed(uri, "POST", json.dumps(metadata), {
+            "Content-Type": "application/json; charset=UTF-8",
+            "X-Upload-Content-Type": self.mimetype,
+        })
+        if resp.status != 200:
+            raise RuntimeError(f"No se pudo abrir la sesión ({resp.status})")
+        return resp["location"]
+
+    def _put(self, session, data, total=None):
+        end = self.sent + len(data)
+        if data:
+            content_range = f"bytes {self.sent}-{end - 1}/{total or '*'}"
+        else:
+            content_range = f"bytes */{total}"
+
+        resp, content = self._timed(session, "PUT", bytes(data), {
+            "Content-Range": content_range,
+        })
+        if total is None and resp.status != 308:
+            raise RuntimeError(f"Trozo rechazado ({resp.status})")
+        if total is not None and resp.status not in (200, 201):
+            raise RuntimeError(f"Subida no completada ({resp.status})")
+
+        self.sent = end
+        if self._closed_at is None:
+            self.sent_before_close = end
+        return content
+
+    def _run(self):
+        pending = bytearray()
+        try:
+            session = self._open_session()
+
+            while True:
+                item = self._queue.get()
+
+                if isinstance(item, tuple):
+                    action, header = item
+                    if action == "abort":
+                        self.uploader._request(session, "DELETE")
+                        return
+                    if header and self.sent == 0:
+                        pending[:len(header)] = header
+                    content = self._put(session, pending, self.sent + len(pending))
+                    self.file_id = json.loads(content).get("id")
+                    self.tail_time = time.perf_counter() - self._closed_at
+                    return
+
+                pending += item
+                # Mientras se graba, solo trozos completos
+                while len(pending) >= self.chunk_size:
+                    self._put(session, pending[:self.chunk_size])
+                    del pending[:self.chunk_size]
+        except Exception as e:
+            self.error = e
+            print(f"❌ Error en subida reanudable: {e}")
+        finally:
+            self.done.set()
+
+    def stats(self):
+        """Latencia de la subida en streaming"""
+        return {
+            "bytes": self.sent,
+            "bytes_before_close": self.sent_before_close,
+            "overlap_ms": self.overlap_time * 1000,
+            "tail_ms": self.tail_time * 1000,
+        }
+
+
+_default_uploader = None
+_default_lock = threading.Lock()
+
+
+def get_uploader():
+    """Uploader compartido por todo el proceso"""
+    global _default_uploader
+    with _default_lock:
+        if _default_uploader is None:
+            _default_uploader = DriveUploader()
+        return _default_uploader
+
+
+def upload_file(filename):
+    file_id = get_uploader().upload(filename)
+    print("☁ Subido a Drive (carpeta ESP32_AUDIO)")
+    return file_id
+
+
+def upload_bytes(data, name, mimetype="audio/flac"):
+    file_id = get_uploader().upload_bytes(data, name, mimetype)
     print("☁ Subido a Drive (carpeta ESP32_AUDIO)")
+    return file_id
+
+
+def start_resumable(name, mimetype="audio/wav"):
+    return get_uploader().start_resumable(name, mimetype)
+
+
+def benchmark(n=20):
+    """Compara un cliente nuevo por subida contra el cliente cacheado (Drive falso local)"""
+    import tempfile
+    from fake_drive import start_fake_drive
+
+    server, endpoint = start_fake_drive()
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.write(fd, b"\0" * 32000)
+    os.close(fd)
+
+    try:
+        start = time.perf_counter()
+        for _ in range(n):
+            DriveUploader(api_endpoint=endpoint).upload(path)
+        fresh = (time.perf_counter() - start) / n
+
+        uploader = DriveUploader(api_endpoint=endpoint)
+        uploader.upload(path)  # Calentar (construcción del servicio)
+        start = time.perf_counter()
+        for _ in range(n):
+            uploader.upload(path)
+        cached = (time.perf_counter() - start) / n
+    finally:
+        server.shutdown()
+        os.remove(path)
+
+    print(f"📊 Subidas: {n} (Drive falso en {endpoint})")
+    print(f"   Cliente nuevo por subida: {fresh * 1000:.1f} ms/subida")
+    print(f"   Cliente cacheado:         {cached * 1000:.1f} ms/subida")
+    print(f"   Ahorro por subida:        {(fresh - cached) * 1000:.1f} ms")
+    return {"fresh_ms": fresh * 1000, "cached_ms": cached * 1000}
+
+
+if __name__ == "__main__":
+    # python drive_upload.py bench
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark()
+    else:
+        print("Uso: python drive_upload.py bench")
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Pre-proceso del audio antes del VAD y la subida (por bloques, con estado)
+Pasa-altos (continua y retumbe), supresión de ruido espectral y control de ganancia
+"""
+
+import math
+import time
+import numpy as np
+
+from vad import NoiseFloorTracker
+
+
+class DSPStage:
+    """
+    Interfaz común: process(float32) -> float32 del mismo largo, con el
+    estado necesario para continuar entre chunks. `latency`: retardo
+    fijo en muestras.
+    """
+
+    name = "stage"
+    latency = 0
+
+    def process(self, x):
+        raise NotImplementedError
+
+    def reset(self):
+        pass
+
+
+class HighPass(DSPStage):
+    """
+    Pasa-altos de primer orden y[n] = x[n] - x[n-1] + a·y[n-1]: quita la
+    continua (DC) y el retumbe por debajo de `cutoff` Hz.
+
+    La recursión se resuelve por bloques de `block` muestras sin bucle
+    por muestra: dentro del bloque, y = a^n · cumsum(d · a^-n) (respuesta
+    desde cero), y solo el valor final pasa de un bloque al siguiente.
+    Bloques cortos mantienen a^-n acotado (precisión en float64).
+    """
+
+    name = "highpass"
+
+    def __init__(self, rate=16000, cutoff=80.0, block=256):
+        self.a = math.exp(-2 * math.pi * cutoff / rate)
+        self.block = block
+        n = np.arange(block)
+        self._pow = self.a ** n
+        self._inv = self.a ** -n
+        self._carry = self.a ** (n + 1)  # Efecto de y[-1] sobre cada muestra del bloque
+        self.reset()
+
+    def reset(self):
+        self._x_prev = 0.0
+        self._y_prev = 0.0
+
+    def process(self, x):
+        n = len(x)
+        if n == 0:
+            return x
+        m = self.block
+        blocks = -(-n // m)
+        d = np.zeros(blocks * m)
+        d[0] = x[0] - self._x_prev
+        d[1:n] = np.diff(x)
+        d = d.reshape(blocks, m)
+
+        y = np.cumsum(d * self._inv, axis=1)
+        y *= self._pow
+        y_prev = self._y_prev
+        for row in y:  # Solo n/block iteraciones (4 por chunk de 1024)
+            row += self._carry * y_prev
+            y_prev = row[-1]
+
+        y = y.reshape(-1)[:n]
+        self._x_prev = float(x[-1])
+        self._y_prev = float(y[-1])
+        return y.astype(np.float32)
+
+
+class NoiseSuppressor(DSPStage):
+    """
+    Resta espectral sobre una STFT (ventana raíz de Hann, 50% de solape).
+
+    Ruido por banda: el mismo seguimiento asimétrico que NoiseFloorTracker,
+    pero por bin: baja rápido (`fall_time`) y sube lento (`rise_time`), así
+    la voz apenas lo mueve y un ventilador que arranca se aprende en
+    unos segundos. Ganancia: sqrt(1 - `over` · ruido / potencia), nunca
+    por debajo de `floor` (evita el "ruido musical" de apagar bins).
+
+    Todas las tramas completas de un chunk se transforman juntas; el
+    solape se suma con dos vistas desplazadas. Retardo fijo: `frame`.
+    """
+
+    name = "denoise"
+
+    def __init__(self, rate=16000, frame=512, over=2.0, floor=0.15, fall_time=0.1, rise_time=2.0):
+        self.frame = frame
+        self.hop = frame // 2
+        self.over = over
+        self.floor = floor
+        self.window = np.sqrt(np.hanning(frame + 1)[:frame]).astype(np.float32)
+        hop_seconds = self.hop / rate
+        self.fall = 1 - math.exp(-hop_seconds / fall_time)
+        self.rise = 1 - math.exp(-hop_seconds / rise_time)
+        self.latency = frame
+        self.reset()
+
+    def reset(self):
+        self.noise = None
+        self._pending = np.zeros(self.frame - self.hop, dtype=np.float32)
+        self._tail = np.zeros(self.hop, dtype=np.float32)
+        self._out = np.zeros(self.hop, dtype=np.float32)
+
+    def process(self, x):
+        pending = np.concatenate([self._pending, x])
+        count = (len(pending) - (self.frame - self.hop)) // self.hop
+        if count <= 0:
+            self._pending = pending
+            return self._emit(len(x), None)
+
+        frames = np.lib.stride_tricks.sliding_window_view(pending, self.frame)[::self.hop][:count]
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+
+        noise = np.empty_like(power)
+        if self.noise is None:
+            self.noise = power[0].copy()
+        for i, p in enumerate(power):  # Recursivo por trama, vectorizado por bin
+            rate = np.where(p < self.noise, self.fall, self.rise)
+            self.noise += rate * (p - self.noise)
+            noise[i] = self.noise
+
+        gain = np.sqrt(np.clip(1 - self.over * noise / (power + 1e-9), self.floor ** 2, 1.0))
+        y = np.fft.irfft(spectrum * gain, self.frame, axis=1).astype(np.float32) * self.window
+
+        # Solape-suma: primera mitad de cada trama + segunda mitad de la anterior
+        previous = np.vstack([self._tail[None, :], y[:-1, self.hop:]])
+        out = (y[:, :self.hop] + previous).reshape(-1)
+        self._tail = y[-1, self.hop:].copy()
+        self._pending = pending[count * self.hop:]
+        return self._emit(len(x), out)
+
+    def _emit(self, n, out):
+        """Salida de exactamente `n` muestras (la cola arranca con `hop` ceros)"""
+        if out is not None:
+            self._out = np.concatenate([self._out, out])
+        result, self._out = self._out[:n], self._out[n:]
+        return result
+
+
+class AGC(DSPStage):
+    """
+    Control automático de ganancia hacia un nivel de voz `target` (misma
+    unidad que el nivel del VAD: amplitud media absoluta).
+
+    Por sub-bloques de `block` muestras: la ganancia solo se ajusta cuando
+    el sub-bloque supera `gate_ratio` × el piso de ruido (NoiseFloorTracker),
+    así el silencio no se amplifica; baja rápido (`attack`) y sube lento
+    (`release`), entre `min_gain` y `max_gain`. Un pico que saturaría baja
+    la ganancia en el acto. Dentro de cada sub-bloque la ganancia va en
+    rampa desde la anterior (sin escalones audibles). Los sub-bloques
+    empiezan con cada chunk: con chunks de otro largo la ganancia sigue
+    la misma curva, pero muestreada en otros puntos.
+    """
+
+    name = "agc"
+
+    def __init__(self, rate=16000, target=2000.0, max_gain=8.0, min_gain=0.1,
+                 attack=0.02, release=1.0, block=160, gate_ratio=2.5):
+        self.rate = rate
+        self.target = target
+        self.max_gain = max_gain
+        self.min_gain = min_gain
+        self.block = block
+        self.gate_ratio = gate_ratio
+        seconds = block / rate
+        self.attack = 1 - math.exp(-seconds / attack)
+        self.release = 1 - math.exp(-seconds / release)
+        self._ramp = (np.arange(1, block + 1) / block).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        self.gain = 1.0
+        self.noise = NoiseFloorTracker(self.block / self.rate, initial=self.target / 10)
+
+    def process(self, x):
+        n = len(x)
+        if n == 0:
+            return x
+        m = self.block
+        blocks = -(-n // m)
+        padded = np.zeros(blocks * m, dtype=np.float32)
+        padded[:n] = x
+        padded = padded.reshape(blocks, m)
+        levels = np.abs(padded).mean(axis=1)
+        peaks = np.abs(padded).max(axis=1)
+
+        gains = np.empty(blocks + 1, dtype=np.float32)
+        gains[0] = gain = self.gain
+        for i, (level, peak) in enumerate(zip(levels.tolist(), peaks.tolist())):
+            self.noise.update(level)
+            if level > self.noise.floor * self.gate_ratio:
+                desired = min(max(self.target / level, self.min_gain), self.max_gain)
+                gain += (self.attack if desired < gain else self.release) * (desired - gain)
+            if peak * gain > 32000:
+                gain = 32000 / peak
+            gains[i + 1] = gain
+        self.gain = gain
+
+        ramp = gains[:-1, None] + (gains[1:] - gains[:-1])[:, None] * self._ramp
+        return (padded * ramp).reshape(-1)[:n]
+
+
+STAGES = {
+    "highpass": HighPass,
+    "denoise": NoiseSuppressor,
+    "agc": AGC,
+}
+
+
+class DSPChain:
+    """
+    Etapas en serie sobre int16: convierte a float32 una vez, pasa por
+    cada etapa y vuelve a int16 (redondeo y saturación). Mide el tiempo
+    de cada etapa por chunk.
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.times = [0.0] * len(stages)
+        self.chunks = 0
+        self.samples = 0
+
+    @property
+    def latency(self):
+        return sum(stage.latency for stage in self.stages)
+
+    def describe(self):
+        return " → ".join(stage.name for stage in self.stages)
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def process(self, samples):
+        x = np.asarray(samples, dtype=np.float32)
+        for i, stage in enumerate(self.stages):
+            start = time.perf_counter()
+            x = stage.process(x)
+            self.times[i] += time.perf_counter() - start
+        self.chunks += 1
+        self.samples += len(samples)
+        return np.clip(np.rint(x), -32768, 32767).astype(np.int16)
+
+    def apply(self, samples, chunk=16000):
+        """Todo un array (p. ej. un WAV), alineado con la entrada (sin el retardo)"""
+        self.reset()
+        delay = self.latency
+        padded = np.concatenate([samples, np.zeros(delay, dtype=np.int16)])
+        out = [self.process(padded[i:i + chunk]) for i in range(0, len(padded), chunk)]
+        return np.concatenate(out)[delay:] if out else np.zeros(0, dtype=np.int16)
+
+    def stats(self, rate=16000):
+        chunks = max(self.chunks, 1)
+        audio_seconds = max(self.samples / rate, 1e-9)
+        return {
+            "latency_ms": self.latency / rate * 1000,
+            "stages": [{
+                "name": stage.name,
+                "us_per_chunk": seconds / chunks * 1e6,
+                "cpu_pct": 100 * seconds / audio_seconds,
+            } for stage, seconds in zip(self.stages, self.times)],
+        }
+
+
+def create_dsp(spec, rate=16000):
+    """Cadena a partir de un texto, p. ej. "highpass,denoise,agc" (None/"" = sin DSP)"""
+    if not spec:
+        return None
+    stages = []
+    for name in spec.split(","):
+        name = name.strip()
+        if name not in STAGES:
+            raise ValueError(f"Etapa DSP desconocida: {name}")
+        stages.append(STAGES[name](rate=rate))
+    return DSPChain(stages)
+
+
+# =====================================================
+# BENCHMARK: costo por etapa y disparos falsos del VAD
+# =====================================================
+
+def _variants(corpus, rate, seed=0):
+    """
+    Cada grabación como la oiría otro micrófono / cuarto: sensibilidad
+    ×0.25 y ×4, un offset de continua y ruido de cocina (extractor
+    de banda ancha + zumbido de 100 Hz) por encima del umbral.
+    """
+    rng = np.random.default_rng(seed)
+    for name, samples, file_rate, segments in corpus:
+        x = samples.astype(np.float32)
+        t = np.arange(len(x)) / file_rate
+        kitchen = rng.normal(0, 900, len(x)) + 1200 * np.sin(2 * np.pi * 100 * t)
+        for label, y in (("original", x), ("x0.25", x * 0.25), ("x4", x * 4),
+                         ("dc+1500", x + 1500), ("cocina", x + kitchen)):
+            yield name, label, np.clip(np.rint(y), -32768, 32767).astype(np.int16), file_rate, segments
+
+
+def benchmark(directory=None, threshold=800, chunk=1024, seconds=60):
+    """
+    - Costo: µs por chunk de cada etapa sobre `seconds` s de audio.
+    - Disparos falsos: el corpus etiquetado de vad.py (o el sintético) con
+      variantes de micrófono y ruido, con el mismo THRESHOLD fijo, sin y
+      con la cadena completa, para los dos motores de VAD.
+    """
+    from vad import create_vad, evaluate, load_corpus, synthetic_corpus, VAD_ENGINES
+    from segmenter import Segmenter
+
+    class Tracked:
+        """Como en server.py por defecto: VAD multi + piso de ruido adaptativo"""
+        def __init__(self, rate):
+            self.rate = rate
+
+        def reset(self):
+            noise = NoiseFloorTracker(chunk / self.rate, initial=threshold / 3)
+            self.segmenter = Segmenter(create_vad("multi", self.rate, threshold), noise, self.rate)
+
+        def process(self, samples):
+            return self.segmenter.detect(samples)
+
+    detectors = {engine: (lambda r, e=engine: create_vad(e, r, threshold)) for engine in VAD_ENGINES}
+    detectors["adaptive"] = Tracked
+
+    rate = 16000
+    corpus = load_corpus(directory) if directory else synthetic_corpus(rate)
+    if not corpus:
+        print(f"❌ No hay pares .wav/.txt en {directory}")
+        return {}
+    results = {}
+
+    # Costo por etapa
+    audio = np.concatenate([c[1] for c in corpus] * int(math.ceil(seconds * rate / sum(len(c[1]) for c in corpus))))
+    audio = audio[:seconds * rate]
+    chain = create_dsp("highpass,denoise,agc", rate)
+    worst = 0.0
+    for i in range(0, len(audio) - chunk + 1, chunk):
+        start = time.perf_counter()
+        chain.process(audio[i:i + chunk])
+        worst = max(worst, time.perf_counter() - start)
+    s = results["cost"] = chain.stats(rate)
+    s["worst_chunk_us"] = worst * 1e6
+    print(f"📊 DSP por chunk de {chunk} muestras ({chunk / rate * 1000:.0f} ms), {seconds}s de audio\n")
+    for stage in s["stages"]:
+        print(f"   {stage['name']:9s} {stage['us_per_chunk']:7.1f} µs/chunk  "
+              f"({stage['cpu_pct']:.2f}% del tiempo de audio)")
+    total = sum(stage["us_per_chunk"] for stage in s["stages"])
+    print(f"   {'total':9s} {total:7.1f} µs/chunk  (peor chunk {worst * 1e6:.0f} µs, "
+          f"retardo {s['latency_ms']:.0f} ms)\n")
+
+    # Disparos falsos, mismo umbral fijo en todas las variantes
+    print(f"   VAD con umbral fijo {threshold} ({'sintético' if not directory else directory}):")
+    print(f"   {'variante':10s} {'motor':9s} {'disparos falsos':>16s} {'recall':>14s} {'precisión':>14s}")
+    print(f"   {'':10s} {'':9s} {'crudo → DSP':>16s} {'crudo → DSP':>14s} {'crudo → DSP':>14s}")
+    rows = []
+    for name, label, samples, file_rate, segments in _variants(corpus, rate):
+        processed = create_dsp("highpass,denoise,agc", file_rate).apply(samples)
+        for engine, create in detectors.items():
+            raw = evaluate(create(file_rate), samples, file_rate, segments, chunk)
+            dsp = evaluate(create(file_rate), processed, file_rate, segments, chunk)
+            rows.append({"file": name, "variant": label, "engine": engine, "raw": raw, "dsp": dsp})
+            print(f"   {label:10s} {engine:9s} {raw['false_triggers']:7d} → {dsp['false_triggers']:<6d} "
+                  f"{raw['recall']:6.2f} → {dsp['recall']:<5.2f} {raw['precision']:6.2f} → {dsp['precision']:<5.2f}")
+    results["vad"] = rows
+
+    print("\n   Totales por motor (todas las variantes):")
+    for engine in detectors:
+        mine = [r for r in rows if r["engine"] == engine]
+        total = {key: {
+            "false_triggers": sum(r[key]["false_triggers"] for r in mine),
+            "recall": float(np.mean([r[key]["recall"] for r in mine])),
+        } for key in ("raw", "dsp")}
+        results[engine] = total
+        print(f"   {engine:9s} disparos falsos {total['raw']['false_triggers']:3d} → "
+              f"{total['dsp']['false_triggers']:<3d} recall medio {total['raw']['recall']:.2f} → "
+              f"{total['dsp']['recall']:.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    # python dsp.py bench [carpeta_con_wav_y_txt]
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark(sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        print("Uso: python dsp.py bench [carpeta]")
+        print("  Mismo corpus que vad.py: audio.wav con audio.txt ('inicio fin' por línea)")
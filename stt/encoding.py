@@ -0,0 +1,87 @@
+"""
+Codificación de enunciados en memoria
+FLAC (sin pérdida, ~50% del WAV) si está soundfile, si no WAV
+"""
+
+import io
+import wave
+import struct
+
+try:
+    import soundfile as sf  # pip install soundfile
+except ImportError:
+    sf = None
+
+# codec -> (mimetype, extensión)
+CODECS = {
+    "wav": ("audio/wav", "wav"),
+    "flac": ("audio/flac", "flac"),
+}
+
+_warned = False
+
+
+def encode_wav(samples, rate, channels=1):
+    """PCM int16 -> bytes WAV"""
+    buf = io.BytesIO()
+    wf = wave.open(buf, 'wb')
+    wf.setnchannels(channels)
+    wf.setsampwidth(2)
+    wf.setframerate(rate)
+    wf.writeframes(samples)
+    wf.close()
+    return buf.getvalue()
+
+
+def wav_header(rate, channels=1, nframes=None):
+    """
+    Cabecera WAV de 44 bytes para PCM int16.
+    Con nframes=None usa el tamaño "desconocido" (0xFFFFFFFF) de los WAV
+    en streaming, que ffmpeg/Whisper leen hasta el final del archivo.
+    """
+    block = channels * 2
+    if nframes is None:
+        data_size = 0xFFFFFFFF - 36
+    else:
+        data_size = nframes * block
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', data_size + 36, b'WAVE',
+        b'fmt ', 16, 1, channels, rate, rate * block, block, 16,
+        b'data', data_size
+    )
+
+
+def encode_flac(samples, rate, channels=1):
+    """PCM int16 -> bytes FLAC (requiere soundfile)"""
+    buf = io.BytesIO()
+    if channels > 1:
+        samples = samples.reshape(-1, channels)
+    sf.write(buf, samples, rate, format="FLAC", subtype="PCM_16")
+    return buf.getvalue()
+
+
+def resolve_codec(codec):
+    """Codec realmente disponible (FLAC cae a WAV si falta soundfile)"""
+    global _warned
+    if codec not in CODECS:
+        raise ValueError(f"Codec no soportado: {codec}")
+    if codec == "flac" and sf is None:
+        if not _warned:
+            print("⚠️ soundfile no instalado, se usará WAV (pip install soundfile)")
+            _warned = True
+        return "wav"
+    return codec
+
+
+def encode_audio(samples, rate, codec="flac", channels=1):
+    """Codifica en memoria. Devuelve (bytes, mimetype, extensión)"""
+    codec = resolve_codec(codec)
+    mimetype, ext = CODECS[codec]
+
+    if codec == "flac":
+        data = encode_flac(samples, rate, channels)
+    else:
+        data = encode_wav(samples, rate, channels)
+
+    return data, mimetype, ext
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Drive falso local para pruebas y benchmarks
+Acepta subidas de la API de Drive v3 (multipart y reanudables)
+y responde con un id inventado
+"""
+
+import json
+import time
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeDriveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como el Drive real
+    disable_nagle_algorithm = True  # Sin esperas de 40 ms por ACK retardado
+
+    def log_message(self, format, *args):
+        pass  # Silencioso
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _reply(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self._read_body()
+        self.server.record(len(body))
+
+        if "uploadType=resumable" in self.path:
+            session = self.server.new_session()
+            location = f"http://{self.headers['Host']}/upload/session/{session}"
+            self._reply(200, headers={"Location": location})
+        else:
+            self._reply(200, {"id": self.server.new_id()})
+
+    def do_PUT(self):
+        body = self._read_body()
+        self.server.record(len(body))
+
+        session = self.path.rsplit("/", 1)[-1]
+        match = re.match(r"bytes (\*|(\d+)-(\d+))/(\*|\d+)",
+                         self.headers.get("Content-Range", ""))
+        if session not in self.server.sessions or not match:
+            self._reply(400, {"error": "sesión o Content-Range inválido"})
+            return
+
+        received = self.server.sessions[session]
+        if match.group(2) is not None and int(match.group(2)) != received:
+            self._reply(400, {"error": "offset inesperado"})
+            return
+        received += len(body)
+        self.server.sessions[session] = received
+        if self.server.keep_data:
+            self.server.session_data.setdefault(session, bytearray()).extend(body)
+
+        total = match.group(4)
+        if total != "*" and int(total) == received:
+            del self.server.sessions[session]
+            file_id = self.server.new_id()
+            if self.server.keep_data:
+                self.server.uploaded[file_id] = bytes(self.server.session_data.pop(session, b""))
+            self._reply(200, {"id": file_id})
+        else:
+            self._reply(308, headers={"Range": f"bytes=0-{received - 1}"})
+
+    def do_DELETE(self):
+        session = self.path.rsplit("/", 1)[-1]
+        self.server.sessions.pop(session, None)
+        self.server.session_data.pop(session, None)
+        self._reply(204)
+
+
+class FakeDriveServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, FakeDriveHandler)
+        self._lock = threading.Lock()
+        self.files = 0
+        self.requests = 0
+        self.bytes_received = 0
+        self.sessions = {}  # id de sesión reanudable -> bytes recibidos
+        self.session_count = 0
+        self.delay = 0.0  # Segundos que tarda cada petición (red lenta)
+        self.keep_data = False  # Guardar el contenido de las subidas reanudables (pruebas)
+        self.session_data = {}  # sesión -> bytes recibidos hasta ahora
+        self.uploaded = {}      # id -> contenido completo
+
+    def record(self, nbytes):
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += nbytes
+        if self.delay:
+            time.sleep(self.delay)
+
+    def new_session(self):
+        with self._lock:
+            self.session_count += 1
+            session = str(self.session_count)
+            self.sessions[session] = 0
+            return session
+
+    def new_id(self):
+        with self._lock:
+            self.files += 1
+            return f"fake-{self.files}"
+
+
+def start_fake_drive(host="127.0.0.1", port=0):
+    """Arranca el servidor en un thread. Devuelve (server, url_base)"""
+    server = FakeDriveServer((host, port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/"
+
+
+if __name__ == "__main__":
+    server = FakeDriveServer(("127.0.0.1", 8089))
+    print("☁ Drive falso en http://127.0.0.1:8089/")
+    server.serve_forever()
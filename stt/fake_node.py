@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Servidor Node.js falso para probar el monitor sin la casa real
+Acepta /api/status, /api/voice/transcript y /api/voice/transcript-drive (simple y por lotes)
+y audio en streaming (chunked) en /api/voice/stt
+Se puede poner en modo "caído", lento o cortar conexiones para probar reintentos
+"""
+
+import json
+import time
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeNodeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass  # Silencioso
+
+    def _reply(self, status, payload):
+        body = b"" if status == 204 else json.dumps(payload).encode()
+        self.send_response(status)
+        if body:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/status":
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": "no encontrado"})
+
+    def _read_chunked(self):
+        """Cuerpo chunked trozo a trozo; None si la conexión se cortó (de un lado u otro)"""
+        stream = {"bytes": 0, "chunks": 0, "trace": self.headers.get("X-Trace-Id"),
+                  "started": time.perf_counter()}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return None  # El cliente cortó a mitad del audio
+            size = int(line.strip(), 16)
+            data = self.rfile.read(size + 2)[:size]
+            if size == 0:
+                break
+            stream["bytes"] += len(data)
+            stream["chunks"] += 1
+            if self.server.take_drop():
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return None
+            if self.server.stt_delay:
+                time.sleep(self.server.stt_delay)
+        stream["elapsed"] = time.perf_counter() - stream["started"]
+        return stream
+
+    def _stt(self):
+        if self.server.stt_delay:
+            # Servidor lento: ventana TCP chica para que el cliente lo note enseguida
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024)
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            stream = self._read_chunked()
+            if stream is None:
+                return
+        else:
+            length = int(self.headers.get("Content-Length", 0))
+            stream = {"bytes": len(self.rfile.read(length)), "chunks": 1,
+                      "trace": self.headers.get("X-Trace-Id")}
+        rate = int(self.headers.get("X-Sample-Rate", 16000))
+        utterance = self.headers.get("X-Utterance-Id")
+        stream["attempt"] = int(self.headers.get("X-Attempt", 1))
+        reply = self.server.stt_done.get(utterance)
+        if reply is not None:
+            # Reintento de un enunciado ya procesado: misma respuesta, sin entregarlo otra vez
+            self.server.stt_duplicates += 1
+        else:
+            reply = {"success": True, "bytes": stream["bytes"],
+                     "seconds": stream["bytes"] / 2 / rate,
+                     "transcript": self.server.stt_text}
+            self.server.stt_streams.append(stream)
+            if utterance:
+                self.server.stt_done[utterance] = reply
+        if self.server.take_error():
+            self._reply(503, {"error": "servidor no disponible"})
+            return
+        self._reply(200, reply)
+
+    def do_POST(self):
+        if self.path == "/api/voice/stt":
+            self._stt()
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        data = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.server.status != 200:
+            self._reply(self.server.status, {"error": "servidor no disponible"})
+            return
+
+        if self.path == "/api/voice/transcript-drive/batch":
+            items = [(data["deviceId"], t["transcript"]) for t in data.get("transcripts", [])]
+        elif self.path in ("/api/voice/transcript-drive", "/api/voice/transcript"):
+            items = [(data["deviceId"], data["transcript"])]
+        else:
+            self._reply(404, {"error": "no encontrado"})
+            return
+
+        self.server.record(items)
+        self._reply(self.server.ok_status, {"success": True, "received": len(items),
+                          "message": f"{len(items)} transcripción(es) recibidas"})
+
+
+class FakeNodeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, FakeNodeHandler)
+        self.status = 200   # != 200: responde ese código a todo POST (p. ej. 503)
+        self.ok_status = 200  # Código de éxito (201/202/204 para probar otros 2xx)
+        self.received = []  # [(deviceId, transcript)] en orden de llegada
+        self.requests = 0
+        self.stt_text = None   # Lo que "transcribe" /api/voice/stt
+        self.stt_delay = 0.0   # Segundos de espera por chunk leído (servidor lento)
+        self.stt_drop = 0      # Conexiones de /api/voice/stt a cortar a mitad del audio
+        self.stt_errors = 0    # Streams completos a los que se responde 503 igual (ya procesados)
+        self.stt_streams = []  # [{bytes, chunks, trace, elapsed, attempt}] procesados
+        self.stt_done = {}     # {X-Utterance-Id: respuesta} para reconocer reintentos
+        self.stt_duplicates = 0
+        self._lock = threading.Lock()
+
+    def take_drop(self):
+        with self._lock:
+            if self.stt_drop:
+                self.stt_drop -= 1
+                return True
+            return False
+
+    def take_error(self):
+        with self._lock:
+            if self.stt_errors:
+                self.stt_errors -= 1
+                return True
+            return False
+
+    def record(self, items):
+        with self._lock:
+            self.requests += 1
+            self.received.extend(items)
+
+
+def start_fake_node(host="127.0.0.1", port=0):
+    """Levanta el servidor falso en un hilo; devuelve (server, url)"""
+    server = FakeNodeServer((host, port))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    server = FakeNodeServer(("127.0.0.1", 5000))
+    print("🏠 Servidor Node falso en http://127.0.0.1:5000")
+    server.serve_forever()
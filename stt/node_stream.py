@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Audio en streaming al servidor Node.js (/api/voice/stt) mientras se habla
+POST con Transfer-Encoding: chunked de PCM crudo; alternativa a subir a Drive
+"""
+
+import json
+import time
+import uuid
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+from outbox import backoff_delay
+
+STT_PATH = "/api/voice/stt"
+
+
+class StreamOverrun(Exception):
+    """El servidor no consume el audio tan rápido como se graba"""
+
+
+class _Aborted(Exception):
+    pass
+
+
+class AudioStream:
+    """
+    Un enunciado como un POST chunked, con la misma forma que
+    drive_upload.ResumableUpload: write() y close() nunca bloquean, un
+    hilo propio envía lo acumulado y wait() devuelve la respuesta.
+
+    Contrapresión: el socket bloquea al hilo de envío, no a la captura.
+    Si lo pendiente supera `max_lag` segundos de audio (None = sin
+    límite, p. ej. un archivo), el stream se da por perdido (StreamOverrun) y quien lo usa sube el enunciado por
+    otro camino.
+
+    Reconexión: el audio del enunciado queda en memoria, así que si se
+    corta la conexión (o el servidor responde 429/5xx) se reabre y se
+    reenvía desde el principio, hasta `retries` veces con espera
+    exponencial. Cada intento lleva el mismo X-Utterance-Id y un
+    X-Attempt creciente: si el servidor ya había procesado un intento
+    anterior (p. ej. respondió 5xx después de recibirlo) lo reconoce y
+    no lo entrega dos veces. El historial que se reenvía no cuenta como
+    atraso: `max_lag` se mide desde lo más lejos que se llegó a enviar.
+    """
+
+    def __init__(self, url, device_id="ESP32_GATEWAY_01", trace=None, rate=16000, channels=1,
+                 max_lag=5.0, retries=3, write_size=8192, timeout=10, sndbuf=32 * 1024):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path if parts.path not in ("", "/") else STT_PATH
+        self.headers = {
+            "Content-Type": f"audio/L16; rate={rate}; channels={channels}",
+            "Transfer-Encoding": "chunked",
+            "X-Device-Id": device_id,
+            "X-Sample-Rate": str(rate),
+        }
+        if trace:
+            self.headers["X-Trace-Id"] = trace
+        self.utterance_id = uuid.uuid4().hex
+        self.headers["X-Utterance-Id"] = self.utterance_id
+        self.max_lag_bytes = int(max_lag * rate * channels * 2) if max_lag else None
+        self.retries = retries
+        self.write_size = write_size
+        self.timeout = timeout
+        self.sndbuf = sndbuf
+
+        self.data = bytearray()  # Todo el enunciado (para reenviar si se corta)
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        self._closed = False
+        self._aborted = False
+        self._cond = threading.Condition()
+
+        # Métricas
+        self.sent = 0
+        self.sent_max = 0        # Lo más lejos que se envió en cualquier intento
+        self.sent_before_close = 0
+        self.reconnects = 0
+        self.max_lag = 0         # Bytes grabados y nunca enviados (pico)
+        self.first_byte_time = None  # Desde el primer write() hasta el primer byte enviado
+        self.tail_time = 0.0     # Desde close() hasta la respuesta
+        self.send_time = 0.0
+        self._first_write = None
+        self._closed_at = None
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, data):
+        """Agrega PCM al stream (copia, el llamador puede reutilizar su buffer)"""
+        with self._cond:
+            if self._first_write is None:
+                self._first_write = time.perf_counter()
+            self.data += memoryview(data).cast("B")  # bytes o un array de numpy
+            self._cond.notify()
+
+    def close(self, header=None):
+        """Termina el enunciado (no bloquea, ver wait()). `header` se ignora: es PCM crudo"""
+        with self._cond:
+            self._closed_at = time.perf_counter()
+            self._closed = True
+            self._cond.notify()
+
+    def abort(self):
+        """Corta la conexión sin completar el pedido (el servidor lo descarta)"""
+        with self._cond:
+            self._closed_at = time.perf_counter()
+            self._aborted = True
+            self._cond.notify()
+
+    def wait(self, timeout=None):
+        """Espera a que termine; devuelve la respuesta del servidor (dict) o None"""
+        self.done.wait(timeout)
+        return self.result
+
+    def _connect(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        conn.connect()
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.sndbuf:
+            # Buffer del kernel chico: el atraso se ve (y se mide) en `data`, no escondido en el socket
+            conn.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf)
+        conn.putrequest("POST", self.path, skip_accept_encoding=True)
+        for key, value in self.headers.items():
+            conn.putheader(key, value)
+        conn.putheader("X-Attempt", str(self.reconnects + 1))
+        conn.endheaders()
+        return conn
+
+    def _next_piece(self, offset):
+        """Bloquea hasta que haya audio nuevo; None cuando ya se envió todo"""
+        with self._cond:
+            while True:
+                if self._aborted:
+                    raise _Aborted()
+                pending = len(self.data) - offset
+                # Atraso respecto de la captura en vivo: al reconectar, reenviar
+                # lo que ya había salido no es atraso (un enunciado largo no
+                # debe caer en StreamOverrun apenas se reabre la conexión)
+                lag = len(self.data) - max(offset, self.sent_max)
+                self.max_lag = max(self.max_lag, lag)
+                if self.max_lag_bytes is not None and lag > self.max_lag_bytes:
+                    raise StreamOverrun(f"{lag / 1024:.0f} KB sin enviar")
+                if pending:
+                    return bytes(self.data[offset:offset + self.write_size])
+                if self._closed:
+                    return None
+                self._cond.wait()
+
+    def _send_body(self, conn):
+        offset = 0
+        while True:
+            piece = self._next_piece(offset)
+            if piece is None:
+                conn.send(b"0\r\n\r\n")
+                return
+            start = time.perf_counter()
+            conn.send(b"%X\r\n%s\r\n" % (len(piece), piece))
+            if self.first_byte_time is None:
+                self.first_byte_time = time.perf_counter() - self._first_write
+            self.send_time += time.perf_counter() - start
+            offset += len(piece)
+            self.sent = offset
+            self.sent_max = max(self.sent_max, offset)
+            if self._closed_at is None:
+                self.sent_before_close = offset
+
+    def _run(self):
+        attempt = 0
+        conn = None
+        try:
+            while True:
+                try:
+                    conn = self._connect()
+                    self._send_body(conn)
+                    response = conn.getresponse()
+                    body = response.read()
+                    if response.status == 429 or response.status >= 500:
+                        raise http.client.HTTPException(f"servidor respondió {response.status}")
+                    self.tail_time = time.perf_counter() - self._closed_at
+                    if not 200 <= response.status < 300:
+                        raise RuntimeError(f"Stream rechazado ({response.status}): {body[:200]!r}")
+                    self.result = json.loads(body or b"{}")
+                    return
+                except (OSError, http.client.HTTPException) as e:
+                    if conn:
+                        conn.close()
+                    attempt += 1
+                    if attempt > self.retries:
+                        raise
+                    self.reconnects += 1
+                    delay = backoff_delay(attempt, 0.2, 2.0)
+                    print(f"🔌 Stream cortado ({e}), reconectando en {delay:.1f}s")
+                    time.sleep(delay)
+        except _Aborted:
+            pass
+        except Exception as e:
+            self.error = e
+            print(f"❌ Error en el stream al servidor: {e}")
+        finally:
+            if conn:
+                conn.close()
+            self.done.set()
+
+    def stats(self):
+        return {
+            "bytes": self.sent,
+            "bytes_before_close": self.sent_before_close,
+            "reconnects": self.reconnects,
+            "max_lag_kb": self.max_lag / 1024,
+            "first_byte_ms": (self.first_byte_time or 0.0) * 1000,
+            "tail_ms": self.tail_time * 1000,
+            "throughput_mb_s": self.sent / max(self.send_time, 1e-9) / 1e6,
+        }
+
+
+def stream_file(filename, url, device_id="ESP32_GATEWAY_01", trace=None, chunk=4096):
+    """Como drive_upload.upload_file pero al servidor: envía un WAV y devuelve la respuesta"""
+    from audio_source import memmap_wav
+
+    samples, rate = memmap_wav(filename)
+    stream = AudioStream(url, device_id, trace, rate, max_lag=None)
+    for i in range(0, len(samples), chunk):
+        stream.write(samples[i:i + chunk].tobytes())
+    stream.close()
+    return stream.wait()
+
+
+# =====================================================
+# BENCHMARK: contra el servidor Node falso
+# =====================================================
+
+def benchmark(seconds=3.0, chunk_ms=64):
+    """
+    - Throughput: 60 s de audio escritos de golpe.
+    - Tiempo real: un enunciado escrito al ritmo de la captura; primer
+      byte en la red y respuesta tras el fin de la voz, contra mandar
+      todo el audio recién al final.
+    - Reconexión: el servidor corta la primera conexión.
+    - Contrapresión: 10 s de voz a un servidor que lee a la mitad del
+      tiempo real, con max_lag de 1 s.
+    """
+    import numpy as np
+    from fake_node import start_fake_node
+
+    rate = 16000
+    node, url = start_fake_node()
+    node.stt_text = "enciende la luz"
+    audio = np.random.default_rng(0).normal(0, 2000, int(60 * rate)).astype(np.int16).tobytes()
+    chunk = int(rate * chunk_ms / 1000) * 2
+    utterance = audio[:int(seconds * rate) * 2]
+    results = {}
+
+    print(f"📊 Stream a {url}{STT_PATH}\n")
+
+    stream = AudioStream(url, max_lag=None)
+    start = time.perf_counter()
+    stream.write(audio)
+    stream.close()
+    stream.wait()
+    elapsed = time.perf_counter() - start
+    results["bulk"] = stream.stats()
+    assert node.stt_streams[-1]["bytes"] == len(audio)
+    print(f"   Throughput:   {len(audio) / elapsed / 1e6:6.1f} MB/s  "
+          f"({60 / elapsed:.0f}x tiempo real, 60 s en {elapsed * 1000:.0f} ms)")
+
+    def realtime(stream, data):
+        for i in range(0, len(data), chunk):
+            stream.write(data[i:i + chunk])
+            time.sleep(chunk_ms / 1000)
+        stream.close()
+        return stream.wait()
+
+    stream = AudioStream(url, trace="bench001")
+    ok = realtime(stream, utterance)
+    s = results["realtime"] = stream.stats()
+    print(f"   Tiempo real:  primer byte {s['first_byte_ms']:5.1f} ms tras el primer chunk, "
+          f"respuesta {s['tail_ms']:5.1f} ms tras el fin de la voz "
+          f"({s['bytes_before_close'] / 1024:.0f}/{s['bytes'] / 1024:.0f} KB antes del fin) "
+          f"-> {ok.get('transcript')!r}")
+
+    stream = AudioStream(url)
+    time.sleep(seconds)  # Grabar primero, enviar después
+    start = time.perf_counter()
+    stream.write(utterance)
+    stream.close()
+    stream.wait()
+    results["after_end_ms"] = (time.perf_counter() - start) * 1000
+    print(f"   Todo al final: respuesta {results['after_end_ms']:5.1f} ms tras el fin de la voz")
+
+    node.stt_drop = 1
+    stream = AudioStream(url)
+    ok = realtime(stream, utterance[:rate])
+    s = results["reconnect"] = stream.stats()
+    print(f"   Reconexión:   {s['reconnects']} reconexión, entregado: {ok is not None} "
+          f"({node.stt_streams[-1]['bytes'] / 1024:.0f} KB recibidos)")
+
+    node.stt_delay = 2 * chunk_ms / 1000  # Lee un chunk cada dos chunks grabados
+    stream = AudioStream(url, max_lag=1.0, write_size=chunk)
+    ok = realtime(stream, audio[:int(10 * rate) * 2])
+    s = results["slow_server"] = stream.stats()
+    print(f"   Servidor lento: pico de {s['max_lag_kb']:.0f} KB sin enviar, "
+          f"{'entregado' if ok else 'abandonado (' + type(stream.error).__name__ + ')'}")
+    node.stt_delay = 0
+    node.shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    # python node_stream.py bench
+    # python node_stream.py send archivo.wav http://servidor:5000
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark()
+    elif len(sys.argv) > 3 and sys.argv[1] == "send":
+        print(stream_file(sys.argv[2], sys.argv[3]))
+    else:
+        print("Uso: python node_stream.py bench")
+        print("     python node_stream.py send archivo.wav http://servidor:5000")
@@ -0,0 +1,109 @@
+"""
+Bandeja de salida persistente (SQLite) para las transcripciones
+Lo que no se pudo entregar sobrevive caídas del servidor y reinicios del monitor
+"""
+
+import time
+import random
+import sqlite3
+import threading
+
+
+def backoff_delay(attempts, base=1.0, maximum=60.0):
+    """Espera exponencial con jitter ("equal jitter"): entre la mitad y el total"""
+    delay = min(maximum, base * 2 ** max(0, attempts - 1))
+    return random.uniform(delay / 2, delay)
+
+
+class Outbox:
+    """
+    Cola FIFO en disco por dispositivo.
+
+    `put()` vuelve solo cuando la transcripción ya está en disco, así
+    quien la encola puede darla por procesada. Las filas se borran
+    recién con `ack()`, después de que el servidor respondió 2xx.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")  # Un fsync por put, sin bloquear lecturas
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                device TEXT NOT NULL,
+                transcript TEXT NOT NULL,
+                created REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                trace TEXT
+            )
+        """)
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(outbox)")]
+        if "trace" not in columns:  # Bandeja creada por una versión anterior
+            self._db.execute("ALTER TABLE outbox ADD COLUMN trace TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_device ON outbox (device, id)")
+        self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def put(self, device, transcript, created=None, trace=None):
+        """Guarda una transcripción; `created` (epoch) cuenta para el TTL"""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (device, transcript, created, trace) VALUES (?, ?, ?, ?)",
+                (device, transcript, created or time.time(), trace)
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def devices(self):
+        """Dispositivos con transcripciones pendientes"""
+        with self._lock:
+            return [d for (d,) in self._db.execute("SELECT DISTINCT device FROM outbox")]
+
+    def head(self, device, limit):
+        """Las `limit` más viejas del dispositivo, en orden: [(id, texto, creada, intentos, traza)]"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT id, transcript, created, attempts, trace FROM outbox "
+                "WHERE device = ? ORDER BY id LIMIT ?", (device, limit)
+            ).fetchall()
+
+    def ack(self, ids):
+        """Entregadas: se borran"""
+        with self._lock:
+            self._db.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in ids])
+            self._db.commit()
+
+    def retry(self, ids):
+        """Falló el intento: quedan en su lugar con un intento más"""
+        with self._lock:
+            self._db.executemany(
+                "UPDATE outbox SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in ids])
+            self._db.commit()
+
+    def expire(self, ttl):
+        """Borra y devuelve las más viejas que `ttl` segundos: [(dispositivo, texto, edad, traza)]"""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, device, transcript, created, trace FROM outbox WHERE created < ?",
+                (now - ttl,)
+            ).fetchall()
+            if rows:
+                self._db.executemany("DELETE FROM outbox WHERE id = ?", [(r[0],) for r in rows])
+                self._db.commit()
+        return [(device, text, now - created, trace) for _, device, text, created, trace in rows]
+
+    def oldest_age(self):
+        """Segundos desde la transcripción pendiente más vieja (0 si no hay)"""
+        with self._lock:
+            created = self._db.execute("SELECT MIN(created) FROM outbox").fetchone()[0]
+        return time.time() - created if created else 0.0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
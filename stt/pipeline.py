@@ -0,0 +1,85 @@
+"""
+Pipeline productor/consumidor para codificar y subir enunciados
+La captura solo encola; un pool de workers hace el I/O
+"""
+
+import queue
+import threading
+
+
+class UploadPipeline:
+    """
+    Cola acotada + pool de workers.
+
+    `submit()` nunca bloquea: si la cola está llena el enunciado se
+    descarta y se cuenta en `dropped`, así el loop de captura no se
+    detiene nunca por I/O.
+    """
+
+    def __init__(self, handler, workers=2, maxsize=8, name="upload"):
+        self.handler = handler
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.maxsize = maxsize
+        self.submitted = 0
+        self.dropped = 0
+        self.processed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._threads = []
+
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, item):
+        """Encola un trabajo. Devuelve False si se descartó por cola llena"""
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            try:
+                self.handler(item)
+                with self._lock:
+                    self.processed += 1
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"❌ Error en worker: {e}")
+            finally:
+                self.queue.task_done()
+
+    def stats(self):
+        """Contadores actuales (profundidad de cola, descartes, etc.)"""
+        with self._lock:
+            return {
+                "depth": self.queue.qsize(),
+                "maxsize": self.maxsize,
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "processed": self.processed,
+                "failed": self.failed,
+            }
+
+    def close(self, wait=True):
+        """Termina los workers (espera a vaciar la cola si wait=True)"""
+        if wait:
+            self.queue.join()
+        for _ in self._threads:
+            self.queue.put(None)
+        if wait:
+            for t in self._threads:
+                t.join()
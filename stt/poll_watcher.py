@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Watcher por escaneo periódico para carpetas en unidades de red / FUSE
+(Google Drive montado), donde los eventos de inotify se pierden o llegan tarde
+Misma interfaz que el Observer de watchdog: schedule(), start(), stop(), join()
+"""
+
+import os
+import time
+import threading
+
+COARSE_MTIME_NS = 2_000_000_000  # Peor caso de granularidad (FAT: 2 s); ver ScanWatcher.scan
+
+
+def scan_directory(directory, suffix='.txt'):
+    """{ruta: (mtime, tamaño)} de los archivos del directorio, en una pasada de scandir"""
+    snapshot = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith(suffix) and entry.is_file():
+                stat = entry.stat()
+                snapshot[entry.path] = (stat.st_mtime, stat.st_size)
+    return snapshot
+
+
+class FileEvent:
+    """Evento mínimo compatible con los handlers de watchdog"""
+
+    is_directory = False
+
+    def __init__(self, event_type, src_path):
+        self.event_type = event_type
+        self.src_path = src_path
+
+
+class ScanWatcher:
+    """
+    Compara el directorio contra un índice (ruta -> mtime, tamaño) y solo
+    avisa de los archivos nuevos o modificados; nunca abre los demás.
+
+    Para que 100k+ archivos no cuesten CPU en cada vuelta:
+    - Siempre: stat solo de los archivos "calientes" (cambiados hace menos
+      de `hot_seconds`), que son los que todavía se pueden estar escribiendo.
+    - Si cambió el mtime del directorio (hay archivos nuevos o borrados):
+      se listan los nombres, sin stat, y solo se hace stat de los nuevos.
+    - Cada `full_scan_every` segundos, stat de todo, por si algún archivo
+      viejo se reescribe.
+    - Intervalo adaptativo: `min_interval` mientras hay actividad y crece
+      hasta `max_interval` cuando la carpeta está quieta.
+
+    Granularidad del mtime: en montajes que guardan segundos enteros
+    (FAT, muchos FUSE/SMB) dos archivos creados en el mismo segundo dejan
+    el directorio con el mismo mtime, y el segundo no se vería hasta el
+    escaneo completo. Por eso, si el mtime del directorio es grueso y es
+    de hace menos de COARSE_MTIME_NS cuando se listó, la vuelta siguiente
+    lista de nuevo aunque no haya cambiado ("racy", como el índice de git).
+    Un montaje que nunca actualiza el mtime del directorio depende solo
+    del escaneo completo: ahí conviene bajar `full_scan_every`.
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=5.0, full_scan_every=30.0,
+                 hot_seconds=60.0, suffix='.txt'):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.full_scan_every = full_scan_every
+        self.hot_seconds = hot_seconds
+        self.suffix = suffix
+        self.interval = min_interval
+        self.handler = None
+        self.directory = None
+        self.snapshot = None
+        self.hot = {}  # ruta -> instante del último cambio visto
+        self.scans = 0
+        self.full_scans = 0
+        self.last_scan_ms = 0.0
+        self._dir_mtime = None
+        self._racy = False  # El último listado pudo perderse un archivo del mismo segundo
+        self._last_full = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def schedule(self, handler, path, recursive=False):
+        if recursive:
+            raise ValueError("ScanWatcher solo vigila un directorio (recursive=False)")
+        self.handler = handler
+        self.directory = path
+
+    def seed(self, entries):
+        """Parte de un escaneo ya hecho [(ruta, mtime, tamaño)] sin volver a listar"""
+        self.snapshot = {path: (mtime, size) for path, mtime, size in entries}
+        self._dir_mtime = None  # La primera vuelta lista, por si algo llegó entre medio
+        self._last_full = time.monotonic()
+
+    def start(self):
+        if self.snapshot is None:
+            self.seed((p, m, s) for p, (m, s) in scan_directory(self.directory, self.suffix).items())
+        self._thread = threading.Thread(target=self._run, name="scan-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _emit(self, event_type, path):
+        callback = getattr(self.handler, f"on_{event_type}", None)
+        if callback is not None:
+            callback(FileEvent(event_type, path))
+
+    def _full_scan(self, now):
+        current = scan_directory(self.directory, self.suffix)
+        changes = 0
+        for path, signature in current.items():
+            old = self.snapshot.get(path)
+            if old != signature:
+                self._emit("created" if old is None else "modified", path)
+                self.hot[path] = now
+                changes += 1
+        for path in self.snapshot.keys() - current.keys():
+            self._emit("deleted", path)
+            self.hot.pop(path, None)
+            changes += 1
+        self.snapshot = current
+        self.full_scans += 1
+        self._last_full = now
+        return changes
+
+    def _list_scan(self, now):
+        names = set()
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix):
+                    names.add(entry.path)
+        changes = 0
+        for path in names - self.snapshot.keys():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self.snapshot[path] = (stat.st_mtime, stat.st_size)
+            self.hot[path] = now
+            self._emit("created", path)
+            changes += 1
+        for path in self.snapshot.keys() - names:
+            del self.snapshot[path]
+            self.hot.pop(path, None)
+            self._emit("deleted", path)
+            changes += 1
+        return changes
+
+    def _hot_scan(self, now):
+        changes = 0
+        for path in list(self.hot):
+            if now - self.hot[path] > self.hot_seconds:
+                del self.hot[path]
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Borrado: lo confirma el próximo listado
+            signature = (stat.st_mtime, stat.st_size)
+            if self.snapshot.get(path) != signature:
+                self.snapshot[path] = signature
+                self.hot[path] = now
+                self._emit("modified", path)
+                changes += 1
+        return changes
+
+    def scan(self):
+        """Una vuelta (completa, listado o solo calientes). Devuelve los cambios vistos"""
+        start = time.perf_counter()
+        now = time.monotonic()
+        dir_mtime = os.stat(self.directory).st_mtime_ns
+        if now - self._last_full >= self.full_scan_every:
+            self._dir_mtime = dir_mtime
+            changes = self._full_scan(now)
+            self._racy = self._is_racy(dir_mtime)
+        else:
+            changes = self._hot_scan(now)
+            if dir_mtime != self._dir_mtime or self._racy:
+                self._dir_mtime = dir_mtime
+                changes += self._list_scan(now)
+                self._racy = self._is_racy(dir_mtime)
+        self.scans += 1
+        self.last_scan_ms = (time.perf_counter() - start) * 1000
+        return changes
+
+    @staticmethod
+    def _is_racy(dir_mtime):
+        """¿Un archivo creado después de listar podría no cambiar el mtime del directorio?"""
+        if dir_mtime % 1_000_000_000:
+            return False  # mtime con fracción: el montaje tiene granularidad fina
+        return time.time_ns() - dir_mtime < COARSE_MTIME_NS
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                changes = self.scan()
+            except OSError as e:
+                print(f"⚠️ No se pudo escanear {self.directory}: {e}")
+                changes = 0
+            if changes:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * 1.5)
+
+    def stats(self):
+        return {
+            "files": len(self.snapshot or ()),
+            "hot": len(self.hot),
+            "scans": self.scans,
+            "full_scans": self.full_scans,
+            "last_scan_ms": self.last_scan_ms,
+            "interval": self.interval,
+        }
+
+
+# =====================================================
+# BENCHMARK: escaneo vs. observer de eventos
+# =====================================================
+
+def _make_directory(directory, n):
+    os.makedirs(directory, exist_ok=True)
+    for i in range(n):
+        with open(os.path.join(directory, f"transcript_{i:06d}.txt"), 'w', encoding='utf-8') as f:
+            f.write(f"prender la luz {i}")
+
+
+class _LatencyHandler:
+    """Registra el instante en que se avisa de cada archivo"""
+
+    def __init__(self):
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def _record(self, event):
+        with self.lock:
+            self.seen.setdefault(event.src_path, time.perf_counter())
+
+    on_created = on_modified = _record
+
+    def dispatch(self, event):
+        if event.event_type in ("created", "modified"):
+            self._record(event)
+
+
+def _measure(name, observer, directory, idle=3.0, files=20, gap=0.25):
+    """CPU en reposo y latencia de detección de archivos nuevos"""
+    handler = _LatencyHandler()
+    t0 = time.perf_counter()
+    observer.schedule(handler, directory, recursive=False)
+    observer.start()
+    startup = time.perf_counter() - t0
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    time.sleep(idle)
+    idle_cpu = (time.process_time() - cpu0) / (time.perf_counter() - wall0)
+
+    written = {}
+    for i in range(files):
+        path = os.path.join(directory, f"nuevo_{name}_{i}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("apagar la luz")
+        written[path] = time.perf_counter()
+        time.sleep(gap)
+    time.sleep(2 * getattr(observer, "max_interval", 1.0))
+
+    observer.stop()
+    observer.join()
+    latencies = sorted((handler.seen[p] - t) * 1000 for p, t in written.items() if p in handler.seen)
+    return {
+        "backend": name,
+        "startup_s": startup,
+        "idle_cpu_pct": idle_cpu * 100,
+        "detected": f"{len(latencies)}/{files}",
+        "latency_p50_ms": latencies[len(latencies) // 2] if latencies else None,
+        "latency_max_ms": latencies[-1] if latencies else None,
+    }
+
+
+def benchmark(n=100000):
+    import tempfile
+    import shutil
+
+    directory = tempfile.mkdtemp(prefix="transcripts_bench_")
+    try:
+        print(f"📁 Creando {n} transcripciones en {directory}...")
+        _make_directory(directory, n)
+
+        t0 = time.perf_counter()
+        cpu0 = time.process_time()
+        snapshot = scan_directory(directory)
+        print(f"   Escaneo completo: {(time.perf_counter() - t0) * 1000:.0f} ms, "
+              f"CPU {(time.process_time() - cpu0) * 1000:.0f} ms ({len(snapshot)} archivos)")
+
+        watcher = ScanWatcher()
+        watcher.schedule(_LatencyHandler(), directory)
+        watcher.seed((p, m, s) for p, (m, s) in snapshot.items())
+        t0 = time.perf_counter()
+        for _ in range(100):
+            watcher.scan()
+        print(f"   Escaneo liviano (sin cambios): {(time.perf_counter() - t0) * 10:.3f} ms\n")
+
+        backends = [("scan", ScanWatcher(min_interval=0.25, max_interval=1.0))]
+        try:
+            from watchdog.observers import Observer
+            from watchdog.observers.polling import PollingObserver
+            backends.append(("watchdog", Observer()))
+            backends.append(("watchdog_poll", PollingObserver(timeout=1)))
+        except ImportError:
+            print("⚠️ watchdog no instalado, solo se mide el escaneo")
+
+        print(f"   {'backend':14s} {'inicio s':>9s} {'CPU reposo':>11s} {'detectados':>11s} "
+              f"{'p50 ms':>8s} {'máx ms':>8s}")
+        results = []
+        for name, observer in backends:
+            r = _measure(name, observer, directory)
+            results.append(r)
+            p50 = f"{r['latency_p50_ms']:8.0f}" if r['latency_p50_ms'] is not None else "       -"
+            top = f"{r['latency_max_ms']:8.0f}" if r['latency_max_ms'] is not None else "       -"
+            print(f"   {name:14s} {r['startup_s']:9.2f} {r['idle_cpu_pct']:10.1f}% "
+                  f"{r['detected']:>11s} {p50} {top}")
+        return results
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # python poll_watcher.py bench [n_archivos]
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
+    else:
+        print("Uso: python poll_watcher.py bench [n_archivos]")
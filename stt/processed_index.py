@@ -0,0 +1,155 @@
+"""
+Índice persistente de transcripciones ya enviadas (SQLite)
+Clave: ruta; guarda mtime, tamaño y hash del contenido
+"""
+
+import os
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def path_key(path):
+    """Misma clave para la ruta del escaneo inicial y la de los eventos"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class LRUDict(OrderedDict):
+    """Dict acotado: al superar `maxsize` descarta las entradas menos usadas"""
+
+    def __init__(self, maxsize=1000):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+class ProcessedIndex:
+    """
+    Qué archivos ya se enviaron, en disco para sobrevivir reinicios.
+
+    Un archivo se considera procesado si su mtime y tamaño coinciden con
+    lo guardado, o si cambiaron pero el contenido (hash) es el mismo
+    (p. ej. Drive vuelve a sincronizarlo). Un caché LRU acotado evita ir
+    a SQLite en los eventos repetidos.
+
+    `first_open` es True solo la primera vez que se abre el índice (no
+    existía): un índice vacío no alcanza para saberlo, porque la carpeta
+    pudo estar vacía o el usuario pudo borrar todo lo anterior.
+    """
+
+    def __init__(self, path, cache_size=1000):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS processed (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                processed_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        created = self._db.execute(
+            "INSERT OR IGNORE INTO meta VALUES ('created', ?)", (str(time.time()),)
+        ).rowcount == 1
+        # Índice de una versión sin `meta`: si ya tiene filas, no es nuevo
+        self.first_open = created and not self._db.execute(
+            "SELECT COUNT(*) FROM processed").fetchone()[0]
+        self._db.commit()
+        self._cache = LRUDict(cache_size)  # ruta -> (mtime, size, hash)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+
+    def _get(self, path):
+        path = path_key(path)
+        if path in self._cache:
+            return self._cache[path]
+        row = self._db.execute(
+            "SELECT mtime, size, hash FROM processed WHERE path = ?", (path,)
+        ).fetchone()
+        if row:
+            self._cache[path] = row
+        return row
+
+    def is_current(self, path, mtime, size):
+        """¿Ya se procesó este archivo con este mtime y tamaño?"""
+        with self._lock:
+            row = self._get(path)
+        return row is not None and row[0] == mtime and row[1] == size
+
+    def same_content(self, path, digest):
+        """¿Ya se procesó este archivo con el mismo contenido?"""
+        with self._lock:
+            row = self._get(path)
+        return row is not None and row[2] == digest
+
+    def mark(self, path, mtime, size, digest):
+        """Registra el archivo como procesado"""
+        path = path_key(path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?)",
+                (path, mtime, size, digest, time.time())
+            )
+            self._db.commit()
+            self._cache[path] = (mtime, size, digest)
+
+    def mark_many(self, entries):
+        """Registra varios (ruta, mtime, tamaño, hash) en una transacción"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?, ?)",
+                [(path_key(p), m, s, h, now) for p, m, s, h in entries]
+            )
+            self._db.commit()
+
+    def changed(self, entries):
+        """
+        Dado [(ruta, mtime, tamaño)] del directorio, devuelve los nuevos
+        o modificados desde la última vez (una sola consulta).
+        """
+        with self._lock:
+            known = {
+                path: (mtime, size)
+                for path, mtime, size in self._db.execute("SELECT path, mtime, size FROM processed")
+            }
+        return [e for e in entries if known.get(path_key(e[0])) != (e[1], e[2])]
+
+    def prune(self, existing):
+        """Borra del índice los archivos que ya no existen"""
+        existing = {path_key(p) for p in existing}
+        with self._lock:
+            gone = [
+                (path,) for (path,) in self._db.execute("SELECT path FROM processed")
+                if path not in existing
+            ]
+            self._db.executemany("DELETE FROM processed WHERE path = ?", gone)
+            self._db.commit()
+            for (path,) in gone:
+                self._cache.pop(path, None)
+        return len(gone)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,77 @@
+"""
+Buffer circular de audio preasignado (NumPy)
+Captura continua con pre-roll y vistas sin copia de cada enunciado
+"""
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Buffer circular de muestras int16 de tamaño fijo.
+
+    Las muestras se escriben dos veces (posición p y p + capacidad), así
+    cualquier ventana de hasta `capacity` muestras es un slice contiguo y
+    se puede entregar como vista, sin concatenar ni copiar.
+
+    Las posiciones son absolutas: `total` es el número de muestras
+    escritas desde el inicio, y `view(start, end)` usa esas posiciones.
+    """
+
+    def __init__(self, capacity, dtype=np.int16):
+        self.capacity = int(capacity)
+        self.total = 0
+        self._buf = np.zeros(self.capacity * 2, dtype=dtype)
+
+    def write(self, samples):
+        """Agrega muestras al buffer (sobrescribe las más antiguas)"""
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.capacity:
+            # Solo caben las últimas `capacity` muestras
+            self.total += n - self.capacity
+            samples = samples[-self.capacity:]
+            n = self.capacity
+
+        cap = self.capacity
+        pos = self.total % cap
+        first = min(n, cap - pos)
+        self._buf[pos:pos + first] = samples[:first]
+        self._buf[pos + cap:pos + cap + first] = samples[:first]
+
+        rest = n - first
+        if rest:
+            self._buf[:rest] = samples[first:]
+            self._buf[cap:cap + rest] = samples[first:]
+
+        self.total += n
+
+    @property
+    def nbytes(self):
+        """Memoria reservada (incluye la copia espejo)"""
+        return self._buf.nbytes
+
+    @property
+    def oldest(self):
+        """Posición absoluta de la muestra más antigua disponible"""
+        return max(0, self.total - self.capacity)
+
+    def position(self, seconds_back, rate):
+        """Posición absoluta `seconds_back` segundos antes de ahora"""
+        return max(self.oldest, self.total - int(seconds_back * rate))
+
+    def view(self, start, end=None):
+        """
+        Vista (sin copia) de las muestras [start, end).
+        Válida hasta que el buffer vuelva a sobrescribir esa zona.
+        """
+        if end is None:
+            end = self.total
+        end = min(end, self.total)
+        start = max(start, self.oldest)
+        if end <= start:
+            return self._buf[:0]
+
+        pos = start % self.capacity
+        return self._buf[pos:pos + (end - start)]
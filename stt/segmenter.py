@@ -0,0 +1,84 @@
+"""
+Segmentación voz/silencio en enunciados
+La misma lógica para la captura en vivo (VoiceRecorder) y el modo batch
+"""
+
+
+class Segmenter:
+    """
+    Detección (VAD + piso de ruido) y fin de enunciado por silencio.
+
+    Todas las posiciones son en muestras, así el resultado no depende
+    del reloj: en vivo, en replay o sobre un archivo da lo mismo.
+    """
+
+    def __init__(self, vad, noise=None, rate=16000, silence_duration=1.5,
+                 min_duration=0.5, pre_roll=0.0):
+        self.vad = vad
+        self.noise = noise
+        self.rate = rate
+        self.silence_samples = int(silence_duration * rate)
+        self.min_samples = int(min_duration * rate)
+        self.pre_roll_samples = int(pre_roll * rate)
+        self.record_start = None
+        self.silence_start = None
+
+    def detect(self, samples):
+        """VAD sobre un chunk; actualiza el piso de ruido y los umbrales"""
+        speech, level = self.vad.process(samples)
+        if self.noise is not None:
+            self.noise.update(level)
+            self.vad.set_thresholds(self.noise.trigger_threshold,
+                                    self.noise.silence_threshold)
+        return speech, level
+
+    def start(self, position):
+        """Comienza un enunciado en `position` (sin contar el pre-roll)"""
+        self.record_start = position
+        self.silence_start = None
+
+    def update(self, speech, position):
+        """True cuando el silencio ya duró lo suficiente para cerrar el enunciado"""
+        if speech:
+            self.silence_start = None
+            return False
+        if self.silence_start is None:
+            self.silence_start = position
+        return position - self.silence_start >= self.silence_samples
+
+    def duration(self, position):
+        """Segundos grabados desde start() (sin pre-roll)"""
+        return (position - self.record_start) / self.rate
+
+    def accept(self, position):
+        """¿El enunciado alcanza la duración mínima?"""
+        return position - self.record_start >= self.min_samples
+
+    def segments(self, samples, chunk=1024):
+        """
+        Recorre un array completo (p. ej. un WAV mapeado en memoria) y
+        devuelve (inicio, fin, nivel_pico) de cada enunciado, con pre-roll.
+        """
+        self.vad.reset()
+        start = None
+        peak = 0.0
+
+        for pos in range(0, len(samples) - chunk + 1, chunk):
+            end = pos + chunk
+            speech, level = self.detect(samples[pos:end])
+
+            if start is None:
+                if speech:
+                    start = max(0, end - self.pre_roll_samples)
+                    self.start(end)
+                    peak = level
+                continue
+
+            peak = max(peak, level)
+            if self.update(speech, end):
+                if self.accept(end):
+                    yield start, end, peak
+                start = None
+
+        if start is not None and self.accept(len(samples)):
+            yield start, len(samples), peak
@@ -4,13 +4,33 @@ Grabador de Audio desde Micrófono de Laptop
 Detecta voz y sube a Google Drive para Whisper
 """
 
-import pyaudio
-import wave
+import threading
+import os
 import numpy as np
 import time
 from datetime import datetime
-from drive_upload import upload_file
-import keyboard  # Para hotkey opcional
+from drive_upload import upload_bytes, start_resumable
+from node_stream import AudioStream, STT_PATH
+from encoding import encode_audio, wav_header
+from ring_buffer import AudioRingBuffer
+from transcriber import DriveTranscriber, LocalTranscriber
+from vad import create_vad, NoiseFloorTracker
+from audio_source import open_source, memmap_wav, EndOfAudio
+from resample import PolyphaseResampler
+from segmenter import Segmenter
+from tracing import Tracer
+from dedup import UtteranceDeduper
+from wakeword import WakeWordFilter, load_templates
+from archive import UtteranceArchive
+from dsp import create_dsp
+from outbox import Outbox
+from concurrent.futures import ProcessPoolExecutor
+import json
+
+try:
+    import keyboard  # Para hotkey opcional
+except ImportError:
+    keyboard = None
 
 # =====================================================
 # CONFIGURACIÓN
@@ -19,116 +39,329 @@ import keyboard  # Para hotkey opcional
 # Audio
 RATE = 16000           # 16kHz (óptimo para Whisper)
 CHANNELS = 1           # Mono
-CHUNK = 1024           # Buffer
-FORMAT = pyaudio.paInt16
+CHUNK = 1024           # Buffer (PCM int16)
+SOURCE = "mic"         # mic | mic:<índice> | wav:<ruta>[@velocidad] | archive:<carpeta> | pipe | synthetic
+CAPTURE_RATE = "native"  # Tasa del micrófono: "native" (la del dispositivo), un número, o None (= RATE)
 
 # Detección de voz
 THRESHOLD = 800        # Ajustar según tu micrófono
+VAD_ENGINE = "multi"   # "multi" (nivel + ZCR + espectro + hangover) o "energy" (solo umbral)
+ADAPTIVE_THRESHOLD = True  # Seguir el piso de ruido (THRESHOLD pasa a ser el valor inicial)
+TRIGGER_RATIO = 3.0    # Umbral de disparo = piso de ruido × 3
+SILENCE_RATIO = 2.0    # Umbral de silencio = piso de ruido × 2
+NOISE_LOG_INTERVAL = 60  # Segundos entre registros del piso de ruido
 SILENCE_DURATION = 1.5 # Segundos de silencio para terminar
 MIN_RECORD_DURATION = 0.5  # Mínimo 0.5s para grabar
+PRE_ROLL = 0.3         # Segundos previos al disparo que se incluyen (evita cortar la primera sílaba)
+DSP_STAGES = None      # Antes del VAD y la subida, p. ej. "highpass,denoise,agc" (None = audio crudo, ver dsp.py)
+
+# Buffer de captura
+BUFFER_SECONDS = 30    # Capacidad del buffer circular (máxima duración de un enunciado)
+
+# Subida en segundo plano
+UPLOAD_WORKERS = 2     # Threads que guardan y suben
+UPLOAD_QUEUE_SIZE = 8  # Enunciados en espera antes de descartar
+CODEC = "flac"         # "flac" (sin pérdida, ~mitad de bytes) o "wav"
+ARCHIVE_DIR = None     # Carpeta para guardar copia local (None = no tocar disco)
+ARCHIVE_MODE = "files"  # "files" (un archivo por enunciado) o "segments" (segmentos grandes + índice, ver archive.py)
+ARCHIVE_SEGMENT_MB = 64  # Tamaño de cada segmento (modo "segments")
+ARCHIVE_MAX_MB = 2048  # Retención: se borran los segmentos más viejos por encima de este total
+ARCHIVE_MAX_DAYS = 30  # ... o con más de estos días
+
+# Transcripción
+TRANSCRIBER = "drive"  # "drive" (Drive + Colab + monitor) o "local" (modelo en esta máquina, directo al servidor)
+LOCAL_MODEL = "faster-whisper:base"  # o "whisper:base"; "stub" para pruebas sin modelo
+LOCAL_BATCH = 4        # Máximo de enunciados por lote cuando se acumulan
+LOCAL_OUTBOX_PATH = "local_outbox.db"  # Textos que el servidor no recibió, esperando reintento
+LOCAL_OUTBOX_TTL = 120  # Segundos desde la grabación: un comando más viejo ya no se envía
+NODE_URL = "http://10.134.23.93:5000"  # Servidor Node.js (solo TRANSCRIBER = "local")
+DEVICE_ID = "ESP32_GATEWAY_01"
+STREAM_UPLOAD = False  # Subir mientras se habla (sesión reanudable, WAV, sin archivo local)
+STREAM_TARGET = "drive"  # "drive" (sesión reanudable) o "node" (PCM a /api/voice/stt de NODE_URL)
+STREAM_MAX_LAG = 5.0   # Segundos de audio sin enviar antes de abandonar el stream (y usar el pipeline)
+STREAM_DRAIN_TIMEOUT = 30  # Al salir: segundos de espera por las subidas en streaming en curso
+
+# Modo batch (segmentar grabaciones largas)
+BATCH_WORKERS = None   # Procesos (None = uno por núcleo)
+
+# Trazas de latencia por enunciado (ver tracing.py report)
+TRACE_FILE = "traces.jsonl"  # None = sin exportar (los histogramas se muestran igual al salir)
+
+# Varios micrófonos en un solo proceso (modo multi)
+DEVICES = None         # {etiqueta: fuente}, p. ej. {"living": "mic:1", "cocina": "mic:3"}
+DEDUP_WINDOW = 0.4     # Segundos que espera un enunciado por tomas de otros micrófonos
+DEDUP_OVERLAP = 0.5    # Solapamiento mínimo para considerarlas la misma frase
+STATS_INTERVAL = 60    # Segundos entre reportes de CPU/memoria por micrófono
+
+# Palabra clave (modos auto y multi): solo se suben enunciados que empiezan con ella
+WAKE_WORD_DIR = None   # Carpeta con 3-5 WAV de la palabra clave dicha sola (None = subir todo)
+WAKE_THRESHOLD = None  # Distancia máxima (None = calibrada con las plantillas)
 
 # Modos
 MODE = "auto"  # "auto" o "hotkey"
 HOTKEY = "ctrl+space"  # Solo si MODE = "hotkey"
 
+tracer = Tracer(TRACE_FILE, "capture")
+wake_filter = None  # WakeWordFilter si hay WAKE_WORD_DIR (ver setup_wake_filter)
+utterance_archive = None  # UtteranceArchive si ARCHIVE_MODE = "segments" (ver setup_archive)
+stream_reports = []  # Hilos de report_stream_upload en curso (ver wait_streams)
+
+# =====================================================
+# SEGMENTACIÓN (compartida entre vivo y batch)
+# =====================================================
+
+def create_segmenter():
+    """VAD + piso de ruido + reglas de silencio según la configuración"""
+    noise = None
+    if ADAPTIVE_THRESHOLD:
+        # Piso de ruido en línea (reemplaza la calibración manual)
+        noise = NoiseFloorTracker(
+            CHUNK / RATE,
+            initial=THRESHOLD / TRIGGER_RATIO,
+            trigger_ratio=TRIGGER_RATIO,
+            silence_ratio=SILENCE_RATIO
+        )
+    return Segmenter(
+        create_vad(VAD_ENGINE, RATE, THRESHOLD),
+        noise,
+        rate=RATE,
+        silence_duration=SILENCE_DURATION,
+        min_duration=MIN_RECORD_DURATION,
+        pre_roll=PRE_ROLL
+    )
+
+def setup_wake_filter():
+    """Carga las plantillas de la palabra clave, si está configurada"""
+    global wake_filter
+    if WAKE_WORD_DIR and wake_filter is None:
+        wake_filter = WakeWordFilter(load_templates(WAKE_WORD_DIR, RATE), RATE, WAKE_THRESHOLD)
+        print(f"🔑 Palabra clave: {len(wake_filter.templates)} plantilla(s), "
+              f"umbral {wake_filter.threshold:.2f}\n")
+    return wake_filter
+
+def passes_wake_word(audio, trace=None, device=None):
+    """Entre la segmentación y la subida: ¿empieza con la palabra clave?"""
+    if wake_filter is None:
+        return True
+    accepted, distance = wake_filter.check(audio)
+    if accepted:
+        tracer.mark(trace, "wake_word")
+    else:
+        tracer.discard(trace)
+        print(f"\n🔇 {f'[{device}] ' if device else ''}Sin palabra clave "
+              f"(distancia {distance:.2f} > {wake_filter.threshold:.2f}), no se sube")
+    return accepted
+
+def print_wake_stats():
+    if wake_filter is None:
+        return
+    s = wake_filter.stats()
+    print(f"🔑 Palabra clave: {s['passed']}/{s['checked']} enunciados pasaron, "
+          f"{s['avoided_pct']:.0f}% de subidas evitadas, "
+          f"CPU {s['cpu_ms_per_audio_s']:.1f} ms por segundo de audio")
+
+def setup_archive():
+    """Abre el archivo por segmentos, si está configurado (si no, copia en archivos sueltos)"""
+    global utterance_archive
+    if ARCHIVE_DIR and ARCHIVE_MODE == "segments" and utterance_archive is None:
+        utterance_archive = UtteranceArchive(
+            ARCHIVE_DIR, RATE,
+            segment_bytes=ARCHIVE_SEGMENT_MB << 20,
+            max_bytes=ARCHIVE_MAX_MB << 20,
+            max_age=ARCHIVE_MAX_DAYS * 86400
+        )
+        s = utterance_archive.stats()
+        print(f"🗄️ Archivo: {ARCHIVE_DIR} ({s['utterances']} enunciados, "
+              f"{s['bytes'] / 1e6:.0f} MB en {s['segments']} segmentos)\n")
+    return utterance_archive
+
+def print_archive_stats():
+    if utterance_archive is None:
+        return
+    s = utterance_archive.stats()
+    print(f"🗄️ Archivo: {s['appended']} enunciados agregados ({s['append_ms']:.2f} ms c/u), "
+          f"{s['utterances']} en total, {s['bytes'] / 1e6:.0f} MB en {s['segments']} segmentos")
+
+def audio_basename(trace=None, device=None, when=None):
+    """
+    audio_<fecha>_<hora>[_<micrófono>][_<id de traza>]
+    La fecha es la de captura (`when`, epoch; ahora si no se da): el
+    monitor la usa para no ejecutar tarde un comando viejo.
+    """
+    stamp = datetime.fromtimestamp(when) if when is not None else datetime.now()
+    parts = ["audio", stamp.strftime('%Y%m%d_%H%M%S'), device, trace]
+    return "_".join(p for p in parts if p)
+
+def encode_utterance(audio, trace=None, device=None, when=None):
+    """(nombre, bytes, mimetype) en memoria según CODEC; el id de traza va en el nombre"""
+    data, mimetype, ext = encode_audio(audio, RATE, CODEC, CHANNELS)
+    return f"{audio_basename(trace, device, when)}.{ext}", data, mimetype
+
 # =====================================================
 # CLASE RECORDER
 # =====================================================
 
 class VoiceRecorder:
-    def __init__(self):
-        self.audio = pyaudio.PyAudio()
+    def __init__(self, source=None, device=None):
         self.is_recording = False
-        self.frames = []
+        self.device = device  # Etiqueta del micrófono (modo multi)
         
-        # Listar dispositivos
-        print("🎤 Dispositivos de audio disponibles:\n")
-        for i in range(self.audio.get_device_count()):
-            info = self.audio.get_device_info_by_index(i)
-            if info['maxInputChannels'] > 0:
-                print(f"   [{i}] {info['name']}")
-                print(f"       Canales: {info['maxInputChannels']}")
-                print(f"       Sample Rate: {int(info['defaultSampleRate'])}")
-                print()
+        # Buffer circular: captura continua, sin listas de chunks
+        self.buffer = AudioRingBuffer(RATE * BUFFER_SECONDS)
+        self.utterance_start = 0
+        self.utterance_end = 0
+        self.last_level = 0.0
+        self.trigger_level = 0.0  # Nivel del chunk que disparó el enunciado actual
         
-        # Abrir stream
-        self.stream = self.audio.open(
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RATE,
-            input=True,
-            frames_per_buffer=CHUNK
-        )
+        # Pre-proceso (pasa-altos, ruido, ganancia) antes de todo lo demás
+        self.dsp = create_dsp(DSP_STAGES, RATE)
+        
+        # Detector de voz y reglas de silencio
+        self.segmenter = create_segmenter()
+        self.vad = self.segmenter.vad
+        self.noise = self.segmenter.noise
+        self.chunks_read = 0
         
-        print(f"✓ Micrófono inicializado")
+        # Fuente de audio (micrófono por defecto, o replay de archivo/pipe)
+        if source is None or isinstance(source, str):
+            source = open_source(source or SOURCE, RATE, CHUNK, CHANNELS, BUFFER_SECONDS,
+                                 CAPTURE_RATE)
+        self.source = source
+        
+        print(f"✓ Fuente de audio inicializada ({type(source).__name__}"
+              f"{f', {device}' if device else ''})")
         print(f"   Sample Rate: {RATE} Hz")
         print(f"   Canales: {CHANNELS}")
-        print(f"   Umbral: {THRESHOLD}\n")
+        print(f"   Umbral: {THRESHOLD}")
+        if self.dsp:
+            print(f"   DSP: {self.dsp.describe()} (+{self.dsp.latency / RATE * 1000:.0f} ms)")
+        print(f"   VAD: {VAD_ENGINE}\n")
     
-    def get_audio_level(self):
-        """Lee un chunk y calcula el nivel de audio"""
+    @property
+    def overflows(self):
+        return self.source.overflows
+    
+    def listen(self):
+        """Lee un chunk y decide si hay voz (motor VAD)"""
         try:
-            data = self.stream.read(CHUNK, exception_on_overflow=False)
+            data = self.source.read()
+            if not data:
+                return False, 0, b''
             audio_data = np.frombuffer(data, dtype=np.int16)
-            level = np.abs(audio_data).mean()
-            return level, data
+            if self.dsp:
+                # El buffer, el VAD y el streaming reciben el audio ya procesado
+                audio_data = self.dsp.process(audio_data)
+                data = audio_data.tobytes()
+            self.buffer.write(audio_data)
+            speech, level = self.segmenter.detect(audio_data)
+            self.last_level = level
+            self.log_noise()
+            return speech, level, data
+        except EndOfAudio:
+            raise
         except Exception as e:
             print(f"⚠️ Error leyendo audio: {e}")
-            return 0, b''
+            return False, 0, b''
+    
+    def log_noise(self):
+        """Registra periódicamente el piso de ruido y los umbrales"""
+        self.chunks_read += 1
+        if self.noise is None:
+            return
+        
+        if self.chunks_read % int(NOISE_LOG_INTERVAL * RATE / CHUNK) == 0:
+            print(f"\n🔇 {f'[{self.device}] ' if self.device else ''}{self.noise_status()}")
+    
+    def noise_status(self):
+        """Piso de ruido y umbrales actuales, para logs"""
+        if self.noise is None:
+            return f"Umbral fijo: {THRESHOLD}"
+        stats = self.noise.stats()
+        return (f"Piso: {stats['noise_floor']:.0f}  "
+                f"Disparo: {stats['trigger_threshold']:.0f}  "
+                f"Silencio: {stats['silence_threshold']:.0f}")
+    
+    def get_audio_level(self):
+        """Lee un chunk y calcula el nivel de audio"""
+        _, level, data = self.listen()
+        return level, data
+    
+    def drain(self):
+        """Pasa al buffer los chunks pendientes sin analizarlos"""
+        for data in self.source.drain():
+            audio_data = np.frombuffer(data, dtype=np.int16)
+            self.buffer.write(self.dsp.process(audio_data) if self.dsp else audio_data)
+    
+    def start_utterance(self, pre_roll=0.0):
+        """Marca el inicio del enunciado, incluyendo `pre_roll` segundos previos"""
+        self.utterance_start = self.buffer.position(pre_roll, RATE)
+        self.utterance_end = self.utterance_start
+        self.trigger_level = self.last_level
+    
+    def end_utterance(self):
+        """Marca el final del enunciado en la posición actual del buffer"""
+        self.utterance_end = self.buffer.total
+    
+    def get_utterance(self):
+        """Devuelve el último enunciado como vista int16 (sin copia)"""
+        return self.buffer.view(self.utterance_start, self.utterance_end)
     
-    def record_until_silence(self):
-        """Graba hasta detectar silencio prolongado"""
+    def record_until_silence(self, pre_roll=0.0, on_audio=None):
+        """
+        Graba hasta detectar silencio prolongado.
+        Si se pasa `on_audio`, recibe el audio (pre-roll incluido) a medida que llega.
+        """
         print("🔴 GRABANDO... (habla ahora)")
         
-        self.frames = []
-        silence_start = None
-        record_start = time.time()
+        self.start_utterance(pre_roll)
+        # Tiempos contados en muestras, no en reloj: igual en vivo que en replay
+        self.segmenter.start(self.buffer.total)
+        
+        if on_audio:
+            on_audio(self.buffer.view(self.utterance_start))
         
         while True:
-            level, data = self.get_audio_level()
+            try:
+                speech, level, data = self.listen()
+            except EndOfAudio:
+                # Fin del replay: cerrar el enunciado con lo grabado
+                return self.finish_recording(self.segmenter.duration(self.buffer.total))
+            self.end_utterance()
             
-            if len(data) > 0:
-                self.frames.append(data)
+            if on_audio and len(data) > 0:
+                on_audio(data)
             
-            # Detectar voz/silencio
-            if level > THRESHOLD:
-                silence_start = None  # Resetear contador de silencio
-                
-                # Mostrar nivel visual
+            # Mostrar nivel visual
+            if speech:
                 bars = int(level / 100)
                 print(f"🔴 {'█' * min(bars, 40)} {level:.0f}", end="\r")
-            else:
-                # Silencio detectado
-                if silence_start is None:
-                    silence_start = time.time()
-                
-                # Verificar si el silencio es suficiente
-                silence_duration = time.time() - silence_start
-                if silence_duration >= SILENCE_DURATION:
-                    record_duration = time.time() - record_start
-                    
-                    # Verificar duración mínima
-                    if record_duration >= MIN_RECORD_DURATION:
-                        print(f"\n⏹️ Grabación completa ({record_duration:.1f}s)")
-                        return True
-                    else:
-                        print(f"\n⚠️ Audio muy corto ({record_duration:.1f}s), cancelando")
-                        return False
+            
+            # Verificar si el silencio es suficiente
+            if self.segmenter.update(speech, self.buffer.total):
+                return self.finish_recording(self.segmenter.duration(self.buffer.total))
+    
+    def finish_recording(self, record_duration):
+        """Verifica la duración mínima del enunciado"""
+        if record_duration >= MIN_RECORD_DURATION:
+            print(f"\n⏹️ Grabación completa ({record_duration:.1f}s)")
+            return True
+        else:
+            print(f"\n⚠️ Audio muy corto ({record_duration:.1f}s), cancelando")
+            return False
     
     def record_fixed_duration(self, duration=3):
         """Graba por tiempo fijo"""
         print(f"🔴 GRABANDO {duration} segundos...")
         
-        self.frames = []
-        start = time.time()
+        self.start_utterance()
+        start = self.buffer.total
+        elapsed = 0
         
-        while time.time() - start < duration:
+        while elapsed < duration:
             level, data = self.get_audio_level()
+            self.end_utterance()
             
-            if len(data) > 0:
-                self.frames.append(data)
-            
-            elapsed = time.time() - start
+            elapsed = (self.buffer.total - start) / RATE
             progress = int((elapsed / duration) * 20)
             bar = "█" * progress + "░" * (20 - progress)
             print(f"🔴 [{bar}] {elapsed:.1f}s", end="\r")
@@ -136,82 +369,324 @@ class VoiceRecorder:
         print(f"\n⏹️ Grabación completa")
         return True
     
-    def save_recording(self):
-        """Guarda la grabación como WAV"""
-        if not self.frames:
+    def encode_recording(self, audio=None, trace=None):
+        """
+        Codifica la grabación (o `audio`, si se pasa) en memoria.
+        El id de traza va en el nombre para que la transcripción lo herede.
+        """
+        if audio is None:
+            audio = self.get_utterance()
+        if len(audio) == 0:
             print("⚠️ No hay audio para guardar")
-            return None
+            return None, None, None
         
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"audio_{timestamp}.wav"
-        
-        # Guardar WAV
-        wf = wave.open(filename, 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(self.audio.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(self.frames))
-        wf.close()
+        return encode_utterance(audio, trace, self.device)
+    
+    def save_recording(self, audio=None, directory=None):
+        """Guarda la grabación en disco (modo archivo, o en el archivo por segmentos)"""
+        if utterance_archive is not None and directory is None:
+            return self.archive_utterance(audio)
+        filename, data, _ = self.encode_recording(audio)
+        if filename is None:
+            return None
+        return self.archive_recording(filename, data, directory)
+    
+    def archive_recording(self, filename, data, directory=None):
+        """Escribe bytes ya codificados en la carpeta de archivo"""
+        path = os.path.join(directory or ARCHIVE_DIR or ".", filename)
+        with open(path, 'wb') as f:
+            f.write(data)
         
-        print(f"💾 Guardado: {filename}")
-        return filename
+        print(f"💾 Guardado: {path}")
+        return path
+    
+    def archive_utterance(self, audio=None, trace=None):
+        """
+        Agrega el PCM al archivo por segmentos (si está activo) desde el
+        hilo de captura: es una escritura a la caché del SO, sin codificar.
+        Devuelve la clave (segmento, n) o None.
+        """
+        if utterance_archive is None:
+            return None
+        if audio is None:
+            audio = self.get_utterance()
+        if len(audio) == 0:
+            return None
+        key = utterance_archive.append(audio, self.device, self.trigger_level, trace)
+        tracer.mark(trace, "archived")
+        print(f"🗄️ Archivado: segmento {key[0]}, #{key[1]}")
+        return key
     
     def close(self):
-        """Cierra el stream de audio"""
-        self.stream.stop_stream()
-        self.stream.close()
-        self.audio.terminate()
+        """Cierra la fuente de audio"""
+        self.source.close()
+
+# =====================================================
+# SUBIDA EN SEGUNDO PLANO
+# =====================================================
+
+def upload_utterance(recorder, item):
+    """Worker: codifica el enunciado (audio, id de traza) en memoria y lo sube a Drive"""
+    audio, trace = item
+    filename, data, mimetype = recorder.encode_recording(audio, trace)
+    
+    if not filename:
+        tracer.discard(trace)
+        return
+    tracer.mark(trace, "encoded")
+    
+    if ARCHIVE_DIR and utterance_archive is None:
+        recorder.archive_recording(filename, data)
+    
+    upload_encoded(filename, data, mimetype, trace)
+
+def upload_encoded(filename, data, mimetype, trace=None):
+    """
+    Sube a Drive un enunciado ya codificado y cierra su traza.
+    Un error se propaga: el pipeline lo cuenta en "Fallidos".
+    """
+    print(f"☁️ Subiendo a Google Drive ({len(data) / 1024:.0f} KB)...")
+    try:
+        upload_bytes(data, filename, mimetype)
+    except Exception:
+        tracer.finish(trace, "upload_failed")
+        raise
+    tracer.finish(trace, "uploaded")
+    print(f"✅ Subido exitosamente: {filename}")
+
+def create_transcriber(upload):
+    """
+    Backend de transcripción según TRANSCRIBER. Drive siempre existe:
+    es el camino por defecto y el respaldo del modelo local.
+    """
+    drive = DriveTranscriber(upload, workers=UPLOAD_WORKERS, maxsize=UPLOAD_QUEUE_SIZE)
+    if TRANSCRIBER != "local":
+        return drive
+    print(f"🧠 Transcripción local ({LOCAL_MODEL}) -> {NODE_URL}, Drive como respaldo")
+    return LocalTranscriber(LOCAL_MODEL, NODE_URL, DEVICE_ID, max_batch=LOCAL_BATCH,
+                            maxsize=UPLOAD_QUEUE_SIZE, fallback=drive, tracer=tracer,
+                            outbox=Outbox(LOCAL_OUTBOX_PATH), ttl=LOCAL_OUTBOX_TTL)
+
+def start_pipeline(recorder):
+    """Crea el backend que transcribe (o guarda y sube) los enunciados"""
+    return create_transcriber(lambda item: upload_utterance(recorder, item))
+
+def enqueue_utterance(recorder, pipeline, trace=None):
+    """Copia el enunciado fuera del buffer circular y lo encola"""
+    audio = recorder.get_utterance().copy()
+    recorder.archive_utterance(audio, trace)
+    enqueue_audio(pipeline, audio, trace)
+
+def enqueue_audio(pipeline, audio, trace=None):
+    tracer.mark(trace, "queued")
+    
+    if pipeline.submit((audio, trace)):
+        stats = pipeline.stats()
+        print(f"📦 En cola para subir ({stats['depth']}/{stats['maxsize']})")
+    else:
+        tracer.discard(trace)
+        print(f"⚠️ Cola llena, enunciado descartado ({pipeline.dropped} descartados)")
+
+def report_stream_upload(upload, filename, trace=None, fallback=None):
+    """Espera la subida en streaming e informa la latencia ahorrada"""
+    result = upload.wait()
+    if result is None:
+        if fallback is not None:
+            tracer.mark(trace, "stream_failed")
+            print("☁️ El stream falló, el enunciado sigue por el pipeline")
+            fallback()
+        else:
+            tracer.finish(trace, "upload_failed")
+        return
+    
+    stats = upload.stats()
+    if isinstance(upload, AudioStream):
+        transcript = result.get("transcript")
+        if not transcript and fallback is not None:
+            # El servidor recibió el audio pero no lo transcribe (STT sin implementar
+            # o falló): sin esto el comando se perdería en silencio
+            tracer.mark(trace, "stream_no_transcript")
+            print(f"☁️ El servidor no devolvió transcripción, {filename} sigue por el pipeline")
+            fallback()
+            return
+        tracer.finish(trace, "acked")
+        print(f"✅ Audio recibido por el servidor: {filename}"
+              + (f" -> \"{transcript}\"" if transcript else ""))
+        print(f"   ⏱️ {stats['tail_ms']:.0f} ms tras el fin de la voz, "
+              f"{stats['bytes_before_close'] / 1024:.0f}/{stats['bytes'] / 1024:.0f} KB enviados antes del fin, "
+              f"{stats['reconnects']} reconexión(es)")
+    else:
+        tracer.finish(trace, "uploaded")
+        print(f"✅ Subido en streaming: {filename}")
+        print(f"   ⏱️ {stats['tail_ms']:.0f} ms tras el fin de la voz, "
+              f"{stats['overlap_ms']:.0f} ms de red solapados con la grabación "
+              f"({stats['bytes_before_close'] / 1024:.0f}/{stats['bytes'] / 1024:.0f} KB antes del fin)")
+
+def open_stream(trace=None):
+    """Subida mientras se habla según STREAM_TARGET: (destino, subida)"""
+    if STREAM_TARGET == "node":
+        stream = AudioStream(NODE_URL, DEVICE_ID, trace, RATE, CHANNELS, max_lag=STREAM_MAX_LAG)
+        return f"{NODE_URL}{STT_PATH}", stream
+    
+    filename = f"{audio_basename(trace)}.wav"
+    upload = start_resumable(filename, "audio/wav")
+    upload.write(wav_header(RATE, CHANNELS))
+    return filename, upload
+
+def stream_utterance(recorder, trace=None, pipeline=None):
+    """
+    Abre la subida al detectar voz y la alimenta mientras se graba.
+    Si el stream al servidor falla, el enunciado pasa a `pipeline`.
+    
+    El filtro de palabra clave solo mira el principio del enunciado
+    (search_seconds, ~1 s): apenas se grabó eso se decide, y si no está
+    la palabra clave se corta la subida en ese momento en vez de seguir
+    enviando hasta el silencio. La grabación sigue (sin enviar) hasta el
+    silencio para que el resto de la frase no dispare otro enunciado.
+    """
+    filename, upload = open_stream(trace)
+    wake = {"checked": wake_filter is None, "passed": True}
+    
+    def on_audio(data):
+        if wake["passed"]:
+            upload.write(data)
+        if not wake["checked"] and len(recorder.get_utterance()) >= wake_filter.search_seconds * RATE:
+            wake["checked"] = True
+            wake["passed"] = passes_wake_word(recorder.get_utterance(), trace)
+            if not wake["passed"]:
+                upload.abort()  # La sesión se descarta: nunca aparece el archivo en Drive
+    
+    success = recorder.record_until_silence(pre_roll=PRE_ROLL, on_audio=on_audio)
+    if not wake["passed"]:
+        return False
+    if not success:
+        upload.abort()
+        tracer.discard(trace)
+        return False
+    tracer.mark(trace, "utterance_end")
+    
+    # Enunciado más corto que la ventana del filtro: se decide al final
+    if not wake["checked"] and not passes_wake_word(recorder.get_utterance(), trace):
+        upload.abort()
+        return False
+    recorder.archive_utterance(trace=trace)
+    
+    # Si el audio cupo en un solo trozo, la cabecera lleva el tamaño real
+    nframes = (recorder.utterance_end - recorder.utterance_start) // CHANNELS
+    upload.close(wav_header(RATE, CHANNELS, nframes))
+    
+    # Si el stream falla (Drive o servidor), el audio sigue por el pipeline
+    fallback = None
+    if pipeline is not None:
+        audio = recorder.get_utterance().copy()
+        fallback = lambda: enqueue_audio(pipeline, audio, trace)
+    report = threading.Thread(
+        target=report_stream_upload, args=(upload, filename, trace, fallback), daemon=True
+    )
+    report.start()
+    stream_reports[:] = [t for t in stream_reports if t.is_alive()] + [report]
+    return True
+
+def wait_streams(timeout=STREAM_DRAIN_TIMEOUT):
+    """
+    Antes de cerrar el pipeline: espera las subidas en streaming en curso
+    (y sus respaldos al pipeline); si no, el proceso termina a mitad de subida
+    """
+    pending = [t for t in stream_reports if t.is_alive()]
+    if not pending:
+        return
+    print(f"⏳ Esperando {len(pending)} subida(s) en streaming...")
+    deadline = time.monotonic() + timeout
+    for report in pending:
+        report.join(max(0.0, deadline - time.monotonic()))
+    left = sum(t.is_alive() for t in pending)
+    if left:
+        print(f"⚠️ {left} subida(s) en streaming sin terminar tras {timeout}s")
+    stream_reports.clear()
+
+def print_transcriber_stats(pipeline):
+    """Solo el backend local: latencia hasta el servidor y lo que pasó a Drive"""
+    if not isinstance(pipeline, LocalTranscriber):
+        return
+    stats = pipeline.stats()
+    print(f"🧠 Local: {stats['processed']} transcritos en {stats['batches']} lotes, "
+          f"p50 {stats['latency_p50_ms']:.0f} ms  p95 {stats['latency_p95_ms']:.0f} ms "
+          f"hasta el servidor, {stats['fallbacks']} a Drive, "
+          f"{stats['retried']} reintentados ({stats['outbox']} pendientes, {stats['expired']} vencidos)")
+    stats = pipeline.fallback.stats()
+    print(f"☁️ Drive (respaldo): {stats['processed']} subidos, {stats['failed']} fallidos")
+
+def print_dsp_stats(recorder):
+    if not recorder.dsp or not recorder.dsp.chunks:
+        return
+    stages = recorder.dsp.stats(RATE)["stages"]
+    print("🎛️ DSP: " + "  ".join(f"{s['name']} {s['us_per_chunk']:.0f} µs/chunk" for s in stages))
+
+def print_pipeline_stats(recorder, pipeline):
+    stats = pipeline.stats()
+    print(f"📦 Subidos: {stats['processed']}  Fallidos: {stats['failed']}  "
+          f"Descartados: {stats['dropped']}  Overflows: {recorder.overflows}")
+    print_dsp_stats(recorder)
+    print_transcriber_stats(pipeline)
+    print_wake_stats()
+    print_archive_stats()
+    tracer.print_stats()
 
 # =====================================================
 # MODO AUTO: Detección automática de voz
 # =====================================================
 
-def modo_auto():
+def modo_auto(source=None):
     print("╔═══════════════════════════════════════╗")
     print("║  Modo AUTO - Detección de voz        ║")
     print("╚═══════════════════════════════════════╝\n")
     
-    recorder = VoiceRecorder()
+    setup_wake_filter()
+    setup_archive()
+    recorder = VoiceRecorder(source)
+    pipeline = start_pipeline(recorder)
     
     print("🎙 Escuchando... (habla cerca del micrófono)\n")
     
     try:
         while True:
-            level, _ = recorder.get_audio_level()
+            speech, level, _ = recorder.listen()
             
             # Mostrar nivel actual
             if level > 50:
-                print(f"📊 Nivel: {level:4.0f}", end="\r")
+                print(f"📊 Nivel: {level:4.0f}  {recorder.noise_status()}", end="\r")
             
-            # Si supera umbral, iniciar grabación
-            if level > THRESHOLD:
+            # Si el VAD detecta voz, iniciar grabación
+            if speech:
                 print(f"\n🟢 VOZ DETECTADA (nivel: {level:.0f})")
+                trace = tracer.start()
                 
-                # Grabar hasta silencio
-                success = recorder.record_until_silence()
-                
-                if success:
-                    # Guardar y subir
-                    filename = recorder.save_recording()
+                if STREAM_UPLOAD:
+                    # Grabar y subir a la vez
+                    stream_utterance(recorder, trace, pipeline)
+                else:
+                    # Grabar hasta silencio (con el audio previo al disparo)
+                    success = recorder.record_until_silence(pre_roll=PRE_ROLL)
                     
-                    if filename:
-                        print("☁️ Subiendo a Google Drive...")
-                        try:
-                            file_id = upload_file(filename)
-                            if file_id:
-                                print(f"✅ Subido exitosamente")
-                            else:
-                                print("⚠️ No se pudo subir")
-                        except Exception as e:
-                            print(f"❌ Error: {e}")
+                    if success:
+                        # Guardar y subir en segundo plano
+                        tracer.mark(trace, "utterance_end")
+                        if passes_wake_word(recorder.get_utterance(), trace):
+                            enqueue_utterance(recorder, pipeline, trace)
+                    else:
+                        tracer.discard(trace)
                 
                 print("\n🎙 Esperando próximo comando...\n")
-                time.sleep(1)
     
     except KeyboardInterrupt:
         print("\n\n⏹️ Detenido por usuario")
+    except EndOfAudio:
+        print("\n\n⏹️ Fin del audio")
     finally:
         recorder.close()
+        wait_streams()
+        pipeline.close()
+        print_pipeline_stats(recorder, pipeline)
 
 # =====================================================
 # MODO HOTKEY: Presionar tecla para grabar
@@ -222,7 +697,13 @@ def modo_hotkey():
     print("║  Modo HOTKEY - Manual                 ║")
     print("╚═══════════════════════════════════════╝\n")
     
+    if keyboard is None:
+        print("❌ Falta la librería keyboard (pip install keyboard)")
+        return
+    
+    setup_archive()
     recorder = VoiceRecorder()
+    pipeline = start_pipeline(recorder)
     
     print(f"💡 Presiona {HOTKEY} para grabar")
     print("   Suelta para terminar\n")
@@ -233,14 +714,15 @@ def modo_hotkey():
             keyboard.wait(HOTKEY)
             
             print("🔴 Grabando...")
-            recorder.frames = []
+            trace = tracer.start(stage="key_down")
+            recorder.drain()  # Descartar lo capturado mientras se esperaba
+            recorder.start_utterance()
             start = time.time()
             
             # Grabar mientras se mantiene presionado
             while keyboard.is_pressed(HOTKEY.split('+')[-1]):
                 level, data = recorder.get_audio_level()
-                if len(data) > 0:
-                    recorder.frames.append(data)
+                recorder.end_utterance()
                 
                 elapsed = time.time() - start
                 print(f"🔴 Grabando... {elapsed:.1f}s", end="\r")
@@ -248,19 +730,12 @@ def modo_hotkey():
             duration = time.time() - start
             print(f"\n⏹️ Grabación completa ({duration:.1f}s)")
             
-            # Guardar y subir
+            # Guardar y subir en segundo plano
             if duration >= MIN_RECORD_DURATION:
-                filename = recorder.save_recording()
-                
-                if filename:
-                    print("☁️ Subiendo a Google Drive...")
-                    try:
-                        file_id = upload_file(filename)
-                        if file_id:
-                            print(f"✅ Subido exitosamente")
-                    except Exception as e:
-                        print(f"❌ Error: {e}")
+                tracer.mark(trace, "utterance_end")
+                enqueue_utterance(recorder, pipeline, trace)
             else:
+                tracer.discard(trace)
                 print("⚠️ Audio muy corto, descartado")
             
             print(f"\n💡 Listo para grabar (presiona {HOTKEY})\n")
@@ -269,17 +744,190 @@ def modo_hotkey():
         print("\n\n⏹️ Detenido por usuario")
     finally:
         recorder.close()
+        pipeline.close()
+        print_pipeline_stats(recorder, pipeline)
+
+# =====================================================
+# MODO MULTI: Varios micrófonos en un solo proceso
+# =====================================================
+
+class StreamCapture:
+    """
+    Un micrófono del modo multi: su propio VoiceRecorder (buffer, VAD,
+    piso de ruido) leído en su propio hilo. Los enunciados no se suben
+    directo: pasan por el deduplicador compartido con los demás.
+    """
+    
+    def __init__(self, device, source, deduper):
+        self.device = device
+        self.recorder = VoiceRecorder(source, device)
+        self.deduper = deduper
+        self.utterances = 0
+        self.cpu_seconds = 0.0
+        self.finished = False
+        self._t0 = None  # Epoch de la muestra 0 (reloj común entre micrófonos)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"mic-{device}", daemon=True)
+    
+    def start(self):
+        self._t0 = time.time()
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def join(self):
+        self._thread.join()
+    
+    def _run(self):
+        recorder = self.recorder
+        segmenter = recorder.segmenter
+        cpu_start = time.thread_time()  # CPU solo de este hilo
+        trace = None
+        try:
+            while not self._stop.is_set():
+                speech, level, data = recorder.listen()
+                self.cpu_seconds = time.thread_time() - cpu_start
+                position = recorder.buffer.total
+                
+                if trace is None:
+                    if speech:
+                        trace = tracer.start()
+                        recorder.start_utterance(PRE_ROLL)
+                        segmenter.start(position)
+                    continue
+                
+                recorder.end_utterance()
+                if segmenter.update(speech, position):
+                    if segmenter.accept(position):
+                        self._offer(trace)
+                    else:
+                        tracer.discard(trace)
+                    trace = None
+        except EndOfAudio:
+            if trace is not None and segmenter.accept(recorder.buffer.total):
+                self._offer(trace)
+        except Exception as e:
+            print(f"\n❌ [{self.device}] {e}")
+        finally:
+            self.cpu_seconds = time.thread_time() - cpu_start
+            self.finished = True
+    
+    def _offer(self, trace):
+        recorder = self.recorder
+        tracer.mark(trace, "utterance_end")
+        audio = recorder.get_utterance().copy()
+        if not passes_wake_word(audio, trace, self.device):
+            return
+        recorder.archive_utterance(audio, trace)  # Todas las tomas, también las que el dedup descarte
+        
+        # Relación señal/ruido: decide qué micrófono se queda con la frase
+        level = float(np.abs(audio, dtype=np.float32).mean())
+        floor = recorder.noise.floor if recorder.noise else THRESHOLD / TRIGGER_RATIO
+        score = level / max(floor, 1.0)
+        
+        start = self._t0 + recorder.utterance_start / RATE
+        end = self._t0 + recorder.utterance_end / RATE
+        self.utterances += 1
+        print(f"\n🟢 [{self.device}] Enunciado de {end - start:.1f}s (S/R {score:.1f})")
+        self.deduper.offer(self.device, start, end, score, (audio, trace, self.device))
+    
+    def stats(self):
+        audio_seconds = self.recorder.buffer.total / RATE
+        pending = getattr(self.recorder.source, "chunks", None)
+        queued = pending.qsize() * CHUNK * 2 if pending is not None else 0
+        return {
+            "device": self.device,
+            "utterances": self.utterances,
+            "audio_seconds": audio_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "cpu_pct": 100 * self.cpu_seconds / max(audio_seconds, 1e-9),
+            "memory_kb": (self.recorder.buffer.nbytes + queued) / 1024,
+            "overflows": self.recorder.overflows,
+        }
+
+def print_stream_stats(streams):
+    for stream in streams.values():
+        s = stream.stats()
+        print(f"   🎤 {s['device']:12s} {s['utterances']:3d} enunciados  "
+              f"CPU {s['cpu_pct']:5.2f}% del tiempo de audio ({s['cpu_seconds']:.2f}s)  "
+              f"memoria {s['memory_kb']:6.0f} KB  overflows {s['overflows']}")
+
+def modo_multi(devices=None):
+    print("╔═══════════════════════════════════════╗")
+    print("║  Modo MULTI - Varios micrófonos       ║")
+    print("╚═══════════════════════════════════════╝\n")
+    
+    devices = devices or DEVICES
+    if not devices:
+        print("❌ Configura DEVICES o pasa etiqueta=fuente,etiqueta=fuente")
+        return
+    
+    setup_wake_filter()
+    setup_archive()
+    streams = {}
+    pipeline = create_transcriber(
+        lambda item: upload_utterance(streams[item[2]].recorder, item[:2])
+    )
+    
+    def submit(item):
+        tracer.mark(item[1], "deduped")
+        if not pipeline.submit(item):
+            tracer.discard(item[1])
+            print(f"⚠️ Cola llena, enunciado descartado ({pipeline.dropped} descartados)")
+    
+    def duplicate(item):
+        tracer.discard(item[1])
+        print(f"🔁 [{item[2]}] Misma frase que otro micrófono, se descarta")
+    
+    deduper = UtteranceDeduper(submit, DEDUP_WINDOW, DEDUP_OVERLAP, on_drop=duplicate)
+    for device, source in devices.items():
+        streams[device] = StreamCapture(device, source, deduper)
+    for stream in streams.values():
+        stream.start()
+    
+    print(f"🎙 Escuchando {len(streams)} micrófonos: {', '.join(streams)}\n")
+    
+    last_report = time.monotonic()
+    try:
+        while not all(stream.finished for stream in streams.values()):
+            time.sleep(0.2)
+            if time.monotonic() - last_report >= STATS_INTERVAL:
+                last_report = time.monotonic()
+                print()
+                print_stream_stats(streams)
+    except KeyboardInterrupt:
+        print("\n\n⏹️ Detenido por usuario")
+    finally:
+        for stream in streams.values():
+            stream.stop()
+        for stream in streams.values():
+            stream.join()
+            stream.recorder.close()
+        deduper.close()
+        pipeline.close()
+        
+        stats = deduper.stats()
+        print(f"\n📊 Enunciados: {stats['offered']}  Duplicados descartados: {stats['duplicates']}")
+        print_stream_stats(streams)
+        stats = pipeline.stats()
+        print(f"📦 Subidos: {stats['processed']}  Fallidos: {stats['failed']}  "
+              f"Descartados: {stats['dropped']}")
+        print_transcriber_stats(pipeline)
+        print_wake_stats()
+        print_archive_stats()
+        tracer.print_stats()
 
 # =====================================================
 # MODO TEST: Calibración del umbral
 # =====================================================
 
-def modo_test():
+def modo_test(source=None):
     print("╔═══════════════════════════════════════╗")
     print("║  Modo TEST - Calibración              ║")
     print("╚═══════════════════════════════════════╝\n")
     
-    recorder = VoiceRecorder()
+    recorder = VoiceRecorder(source)
     
     print("🔧 Midiendo nivel de audio...")
     print("   Habla cerca del micrófono\n")
@@ -287,28 +935,167 @@ def modo_test():
     levels = []
     
     try:
-        for i in range(100):  # 10 segundos aprox
-            level, _ = recorder.get_audio_level()
+        for i in range(int(10 * RATE / CHUNK)):  # 10 segundos
+            speech, level, _ = recorder.listen()
             levels.append(level)
             
             # Mostrar en tiempo real
             bars = int(level / 100)
-            print(f"📊 {'█' * min(bars, 40)} {level:.0f}", end="\r")
-            
-            time.sleep(0.1)
+            mark = "🗣" if speech else "  "
+            print(f"📊 {mark} {'█' * min(bars, 40):40s} {level:5.0f}  {recorder.noise_status()}", end="\r")
         
         print("\n\n📊 Resultados:")
         print(f"   Nivel mínimo: {min(levels):.0f}")
         print(f"   Nivel máximo: {max(levels):.0f}")
         print(f"   Nivel promedio: {np.mean(levels):.0f}")
-        print(f"\n💡 Umbral recomendado: {np.mean(levels) * 1.5:.0f}")
-        print(f"   (ajustar THRESHOLD en el código)")
+        print(f"   {recorder.noise_status()}")
+        if ADAPTIVE_THRESHOLD:
+            print("\n💡 El umbral sigue al piso de ruido automáticamente")
+        else:
+            print(f"\n💡 Umbral recomendado: {np.mean(levels) * 1.5:.0f}")
+            print(f"   (ajustar THRESHOLD en el código)")
     
     except KeyboardInterrupt:
         print("\n\n⏹️ Detenido")
+    except EndOfAudio:
+        print("\n\n⏹️ Fin del audio")
     finally:
         recorder.close()
 
+# =====================================================
+# MODO BATCH: Segmentar grabaciones largas
+# =====================================================
+
+def segment_file(path, out_dir):
+    """Worker (proceso): segmenta un WAV mapeado en memoria y guarda los enunciados"""
+    start_cpu = time.process_time()
+    samples, rate = memmap_wav(path)
+    if rate != RATE:
+        samples = PolyphaseResampler(rate, RATE).resample(samples)
+    dsp = create_dsp(DSP_STAGES, RATE)
+    if dsp:
+        samples = dsp.apply(samples)  # Igual que en vivo, alineado con el original
+    
+    base = os.path.splitext(os.path.basename(path))[0]
+    entries = []
+    
+    for n, (start, end, peak) in enumerate(create_segmenter().segments(samples, CHUNK)):
+        data, _, ext = encode_audio(samples[start:end], RATE, CODEC, CHANNELS)
+        filename = f"{base}_{n:04d}.{ext}"
+        with open(os.path.join(out_dir, filename), 'wb') as f:
+            f.write(data)
+        
+        entries.append({
+            "file": filename,
+            "source": os.path.basename(path),
+            "start": start / RATE,
+            "end": end / RATE,
+            "duration": (end - start) / RATE,
+            "peak_level": round(peak, 1),
+        })
+    
+    return {
+        "source": path,
+        "audio_seconds": len(samples) / RATE,
+        "cpu_seconds": time.process_time() - start_cpu,
+        "utterances": entries,
+    }
+
+def modo_batch(directory, out_dir=None):
+    print("╔═══════════════════════════════════════╗")
+    print("║  Modo BATCH - Segmentar grabaciones   ║")
+    print("╚═══════════════════════════════════════╝\n")
+    
+    files = sorted(
+        os.path.join(directory, f) for f in os.listdir(directory)
+        if f.lower().endswith('.wav')
+    )
+    if not files:
+        print(f"❌ No hay archivos .wav en {directory}")
+        return
+    
+    out_dir = out_dir or os.path.join(directory, "utterances")
+    os.makedirs(out_dir, exist_ok=True)
+    workers = BATCH_WORKERS or os.cpu_count()
+    
+    print(f"📁 {len(files)} archivos → {out_dir}")
+    print(f"⚙️ {workers} procesos\n")
+    
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(segment_file, path, out_dir) for path in files]
+        for future in futures:
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                continue
+            results.append(result)
+            print(f"   {os.path.basename(result['source'])}: "
+                  f"{len(result['utterances'])} enunciados, "
+                  f"{result['audio_seconds'] / max(result['cpu_seconds'], 1e-9):.0f}x tiempo real")
+    wall = time.perf_counter() - start
+    
+    index = [entry for result in results for entry in result["utterances"]]
+    with open(os.path.join(out_dir, "index.json"), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    
+    audio_seconds = sum(r["audio_seconds"] for r in results)
+    cpu_seconds = sum(r["cpu_seconds"] for r in results)
+    print(f"\n📊 {len(index)} enunciados en {audio_seconds / 3600:.2f} h de audio")
+    print(f"   Tiempo total: {wall:.1f}s ({audio_seconds / max(wall, 1e-9):.0f}x tiempo real)")
+    print(f"   Por núcleo: {audio_seconds / max(cpu_seconds, 1e-9):.0f}x tiempo real")
+    print(f"   Índice: {os.path.join(out_dir, 'index.json')}")
+
+# =====================================================
+# MODO REUPLOAD: Volver a subir desde el archivo
+# =====================================================
+
+def upload_archived(item):
+    """Worker: (audio del mmap, id de traza, micrófono, epoch de captura) -> codificar y subir"""
+    audio, trace, device, when = item
+    filename, data, mimetype = encode_utterance(audio, trace, device, when)
+    tracer.mark(trace, "encoded")
+    upload_encoded(filename, data, mimetype, trace)
+
+def modo_reupload(directory, since=None):
+    """
+    Sube de nuevo los enunciados archivados (p. ej. tras días sin red),
+    leídos directo de los segmentos. `since`: AAAA-MM-DD[THH:MM].
+    
+    Solo por Drive, y con la fecha de captura original en el nombre: la
+    transcripción queda en Drive, pero el monitor descarta por OUTBOX_TTL
+    los comandos viejos en vez de ejecutarlos ahora. El backend local no
+    se usa porque entrega directo al servidor, sin TTL.
+    """
+    print("╔═══════════════════════════════════════╗")
+    print("║  Modo REUPLOAD - Desde el archivo     ║")
+    print("╚═══════════════════════════════════════╝\n")
+    
+    archive = UtteranceArchive(directory, RATE, read_only=True)
+    start = datetime.fromisoformat(since).timestamp() if since else None
+    keys = archive.find(since=start)
+    print(f"🗄️ {len(keys)} enunciados en {directory}\n")
+    
+    pipeline = DriveTranscriber(upload_archived, workers=UPLOAD_WORKERS, maxsize=UPLOAD_QUEUE_SIZE)
+    try:
+        for key in keys:
+            record = archive.entry(key)
+            trace = tracer.start(record["trace"].decode() or None, stage="archived")
+            item = (archive.read(key), trace, record["device"].decode() or None, float(record["time"]))
+            while not pipeline.submit(item):
+                time.sleep(0.1)  # Cola llena: esperar en vez de descartar
+            tracer.mark(trace, "queued")
+    except KeyboardInterrupt:
+        print("\n\n⏹️ Detenido por usuario")
+    finally:
+        pipeline.close()
+        archive.close()
+        stats = pipeline.stats()
+        print(f"📦 Subidos: {stats['processed']}  Fallidos: {stats['failed']}")
+        tracer.print_stats()
+
 # =====================================================
 # MAIN
 # =====================================================
@@ -321,18 +1108,37 @@ def main():
     else:
         mode = MODE
     
-    if mode == "auto":
-        modo_auto()
+    # Fuente opcional: auto/test pueden reproducir grabaciones
+    source = sys.argv[2] if len(sys.argv) > 2 else None
+    
+    if mode == "batch" and source:
+        modo_batch(source, sys.argv[3] if len(sys.argv) > 3 else None)
+    elif mode == "reupload" and source:
+        modo_reupload(source, sys.argv[3] if len(sys.argv) > 3 else None)
+    elif mode == "auto":
+        modo_auto(source)
     elif mode == "hotkey":
         modo_hotkey()
+    elif mode == "multi":
+        # multi [etiqueta=fuente,etiqueta=fuente,...]
+        devices = dict(item.split("=", 1) for item in source.split(",")) if source else None
+        modo_multi(devices)
     elif mode == "test":
-        modo_test()
+        modo_test(source)
     else:
-        print("Uso: python laptop_mic_recorder.py [auto|hotkey|test]")
+        print("Uso: python laptop_mic_recorder.py [auto|hotkey|test] [fuente]")
+        print("     python laptop_mic_recorder.py batch <carpeta_wav> [salida]")
+        print("     python laptop_mic_recorder.py multi [etiqueta=fuente,etiqueta=fuente]")
+        print("     python laptop_mic_recorder.py reupload <carpeta_archivo> [desde AAAA-MM-DD]")
         print("\nModos:")
         print("  auto    - Detecta voz automáticamente (default)")
         print("  hotkey  - Presiona Ctrl+Space para grabar")
         print("  test    - Calibrar umbral de detección")
+        print("  batch   - Segmentar grabaciones largas (varios procesos)")
+        print("  multi   - Varios micrófonos a la vez, sin subir la misma frase dos veces")
+        print("  reupload - Volver a subir lo guardado con ARCHIVE_MODE = \"segments\"")
+        print("\nFuentes (auto/test):")
+        print("  mic, mic:<índice>, wav:<ruta>[@velocidad], archive:<carpeta>[@velocidad], pipe, synthetic")
 
 if __name__ == "__main__":
     # Instalar dependencias:
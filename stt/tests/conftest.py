@@ -0,0 +1,33 @@
+"""
+Pruebas de los módulos de stt/ contra los servidores falsos (fake_drive, fake_node)
+Se corren desde la raíz del repo o desde stt/: python -m pytest -q stt/tests
+"""
+
+import os
+import sys
+
+import pytest
+
+# Los módulos de stt/ se importan por nombre, como los scripts entre sí
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def fake_node():
+    from fake_node import start_fake_node
+
+    server, url = start_fake_node()
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fake_drive():
+    from fake_drive import start_fake_drive
+
+    server, url = start_fake_drive()
+    server.keep_data = True
+    yield server, url
+    server.shutdown()
+    server.server_close()
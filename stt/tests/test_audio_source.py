@@ -0,0 +1,96 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from audio_source import open_source, memmap_wav, EndOfAudio, PipeSource, SyntheticSource
+from audio_source import ResampledSource
+
+
+def _write_wav(path, samples, rate=16000):
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.tobytes())
+
+
+def _read_all(source):
+    chunks = []
+    while True:
+        try:
+            data = source.read()
+        except EndOfAudio:
+            return chunks
+        if data:
+            chunks.append(data)
+
+
+def test_wav_replay_returns_the_whole_file(tmp_path):
+    samples = np.arange(5000, dtype=np.int16)
+    _write_wav(tmp_path / "a.wav", samples)
+
+    source = open_source(f"wav:{tmp_path / 'a.wav'}", chunk=1024)
+    chunks = _read_all(source)
+    source.close()
+
+    assert [len(c) for c in chunks] == [2048] * 4 + [2 * 904]
+    assert np.array_equal(np.frombuffer(b"".join(chunks), dtype=np.int16), samples)
+    assert not source.realtime
+
+
+def test_wav_speed_makes_it_realtime(tmp_path):
+    _write_wav(tmp_path / "a.wav", np.zeros(100, dtype=np.int16))
+    assert open_source(f"wav:{tmp_path / 'a.wav'}@2").realtime
+
+
+def test_pipe_drops_a_trailing_odd_byte():
+    source = PipeSource(chunk=4, stream=io.BytesIO(b"\x01\x00" * 6 + b"\x07"))
+    chunks = _read_all(source)
+    assert b"".join(chunks) == b"\x01\x00" * 6
+
+
+def test_synthetic_source_plays_the_given_samples():
+    samples = np.arange(3000, dtype=np.int16)
+    source = SyntheticSource(chunk=1024, samples=samples)
+    assert np.array_equal(np.frombuffer(b"".join(_read_all(source)), dtype=np.int16), samples)
+
+
+def test_unknown_source_is_rejected():
+    with pytest.raises(ValueError):
+        open_source("bluetooth:0")
+
+
+def test_memmap_wav_reads_a_wav_written_in_streaming(tmp_path):
+    samples = np.arange(-500, 500, dtype=np.int16)
+    path = tmp_path / "stream.wav"
+    _write_wav(path, samples, rate=22050)
+    # Cabecera de un WAV que se escribía en streaming: tamaños "desconocidos"
+    data = bytearray(path.read_bytes())
+    data[4:8] = data[40:44] = b"\xff\xff\xff\xff"
+    path.write_bytes(bytes(data))
+
+    mapped, rate = memmap_wav(str(path))
+    assert rate == 22050
+    assert np.array_equal(mapped, samples)
+
+
+def test_memmap_wav_rejects_other_files(tmp_path):
+    (tmp_path / "a.txt").write_bytes(b"no es audio, solo texto")
+    with pytest.raises(ValueError):
+        memmap_wav(str(tmp_path / "a.txt"))
+
+
+def test_wav_at_another_rate_is_resampled_in_full_chunks(tmp_path):
+    t = np.arange(48000) / 48000
+    _write_wav(tmp_path / "48k.wav", np.rint(8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16),
+               rate=48000)
+
+    source = open_source(f"wav:{tmp_path / '48k.wav'}", rate=16000, chunk=1024)
+    chunks = _read_all(source)
+
+    assert isinstance(source, ResampledSource)
+    assert source.rate == 16000
+    assert all(len(c) == 2048 for c in chunks[:-1])
+    assert sum(len(c) for c in chunks) // 2 == 16000
@@ -0,0 +1,56 @@
+import os
+import time
+
+from debounce import SettleScheduler
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_burst_of_events_fires_once(tmp_path):
+    path = str(tmp_path / "audio_1.txt")
+    ready = []
+    settle = SettleScheduler(ready.append, window=0.1)
+    for i in range(5):
+        with open(path, "a") as f:
+            f.write(f"parte {i}\n")
+        settle.touch(path)
+
+    assert _wait_for(lambda: ready)
+    time.sleep(0.2)
+    settle.close()
+    assert ready == [path]
+    assert settle.stats() == {"pending": 0, "fired": 1, "coalesced": 4}
+
+
+def test_deleted_file_is_never_delivered(tmp_path):
+    path = str(tmp_path / "audio_1.txt")
+    open(path, "w").close()
+    ready = []
+    settle = SettleScheduler(ready.append, window=0.05)
+    settle.touch(path)
+    os.remove(path)
+
+    assert _wait_for(lambda: settle.stats()["pending"] == 0)
+    settle.close()
+    assert ready == []
+
+
+def test_file_that_keeps_changing_is_delivered_after_max_wait(tmp_path):
+    path = str(tmp_path / "audio_1.txt")
+    ready = []
+    settle = SettleScheduler(ready.append, window=0.1, max_wait=0.3)
+    start = time.monotonic()
+    while not ready and time.monotonic() - start < 5:
+        with open(path, "a") as f:
+            f.write("x")
+        settle.touch(path)
+        time.sleep(0.02)
+    settle.close()
+
+    assert ready == [path]
+    assert time.monotonic() - start < 2
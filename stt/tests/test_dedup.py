@@ -0,0 +1,46 @@
+import time
+
+from dedup import UtteranceDeduper, overlap_ratio
+
+
+def test_overlap_is_relative_to_the_shorter_interval():
+    assert overlap_ratio((0, 10), (2, 4)) == 1.0
+    assert overlap_ratio((0, 2), (1, 3)) == 0.5
+    assert overlap_ratio((0, 1), (2, 3)) < 0
+
+
+def test_cross_mic_duplicate_keeps_the_best_take():
+    submitted, dropped = [], []
+    dedup = UtteranceDeduper(submitted.append, window=0.2, on_drop=dropped.append)
+    dedup.offer("cocina", 100.0, 102.0, 8.0, "cocina")
+    dedup.offer("sala", 100.1, 102.2, 15.0, "sala")  # La misma frase, mejor SNR
+    dedup.offer("sala", 110.0, 111.0, 5.0, "otra")   # Otra frase
+    dedup.close()
+
+    assert sorted(submitted) == ["otra", "sala"]
+    assert dropped == ["cocina"]
+    assert dedup.stats()["duplicates"] == 1
+
+
+def test_same_mic_back_to_back_is_not_a_duplicate():
+    submitted = []
+    dedup = UtteranceDeduper(submitted.append, window=0.2)
+    dedup.offer("sala", 100.0, 102.0, 8.0, "uno")
+    dedup.offer("sala", 101.5, 103.0, 8.0, "dos")
+    dedup.close()
+
+    assert sorted(submitted) == ["dos", "uno"]
+
+
+def test_late_take_after_the_group_left_is_dropped():
+    submitted, dropped = [], []
+    dedup = UtteranceDeduper(submitted.append, window=0.05, on_drop=dropped.append)
+    dedup.offer("cocina", 100.0, 102.0, 8.0, "cocina")
+    deadline = time.monotonic() + 5
+    while not submitted and time.monotonic() < deadline:
+        time.sleep(0.01)
+    dedup.offer("sala", 100.0, 102.0, 20.0, "sala")
+    dedup.close()
+
+    assert submitted == ["cocina"]
+    assert dropped == ["sala"]
@@ -0,0 +1,82 @@
+import os
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from drive_upload import DriveUploader, ResumableUpload
+
+
+def test_uploads_from_several_threads_run_in_parallel(fake_drive, tmp_path):
+    drive, endpoint = fake_drive
+    drive.delay = 0.3  # Red lenta
+    uploader = DriveUploader(api_endpoint=endpoint)
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"audio_{i}.wav"
+        path.write_bytes(os.urandom(1000))
+        paths.append(str(path))
+
+    ids = []
+    start = time.monotonic()
+    threads = [threading.Thread(target=lambda p=p: ids.append(uploader.upload(p))) for p in paths]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(ids)) == 4
+    assert drive.files == 4
+    # En serie serían 4 x 0.3 s
+    assert time.monotonic() - start < 0.9
+    assert uploader.stats()["uploads"] == 4
+
+
+def test_resumable_upload_sends_full_chunks_while_writing(fake_drive):
+    drive, endpoint = fake_drive
+    uploader = DriveUploader(api_endpoint=endpoint)
+    data = os.urandom(2500)
+
+    upload = ResumableUpload(uploader, "audio.wav", "audio/wav", chunk_size=1000)
+    for i in range(0, len(data), 300):
+        upload.write(data[i:i + 300])
+    deadline = time.monotonic() + 10
+    while upload.sent < 2000 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    upload.close()
+
+    file_id = upload.wait(10)
+    assert file_id is not None
+    assert upload.error is None
+    assert drive.uploaded[file_id] == data
+    # Los trozos completos salieron antes de cerrar; al final solo el resto
+    assert upload.stats()["bytes_before_close"] == 2000
+    assert upload.stats()["bytes"] == 2500
+    assert drive.sessions == {}
+
+
+def test_header_replaces_start_when_nothing_was_sent(fake_drive):
+    drive, endpoint = fake_drive
+    upload = ResumableUpload(DriveUploader(api_endpoint=endpoint), "a.wav", "audio/wav",
+                             chunk_size=1 << 20)
+    upload.write(b"\0" * 44 + b"audio")
+    upload.close(header=b"H" * 44)
+
+    file_id = upload.wait(10)
+    assert drive.uploaded[file_id] == b"H" * 44 + b"audio"
+
+
+def test_abort_discards_the_session(fake_drive):
+    drive, endpoint = fake_drive
+    upload = ResumableUpload(DriveUploader(api_endpoint=endpoint), "a.wav", "audio/wav",
+                             chunk_size=100)
+    upload.write(b"x" * 250)
+    upload.abort()
+
+    assert upload.wait(10) is None
+    assert upload.error is None
+    assert drive.files == 0
+    assert drive.sessions == {}
+    assert drive.session_data == {}
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from dsp import HighPass, NoiseSuppressor, create_dsp
+
+RATE = 16000
+
+
+def _signal(seconds=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * RATE)) / RATE
+    tone = 3000 * np.sin(2 * np.pi * 440 * t) + 2000 * np.sin(2 * np.pi * 30 * t)
+    return (tone + rng.normal(0, 300, len(t))).astype(np.float32)
+
+
+def _in_chunks(stage, x, sizes):
+    out, i, k = [], 0, 0
+    while i < len(x):
+        n = sizes[k % len(sizes)]
+        out.append(stage.process(x[i:i + n]))
+        i, k = i + n, k + 1
+    return np.concatenate(out)
+
+
+@pytest.mark.parametrize("stage", [HighPass, NoiseSuppressor])
+def test_state_carries_across_chunks(stage):
+    x = _signal()
+    whole = stage(rate=RATE).process(x)
+    # Chunks de tamaño irregular (incluso más chicos que un bloque/trama)
+    chunked = _in_chunks(stage(rate=RATE), x, [1024, 100, 333, 2048])
+
+    assert len(chunked) == len(x)
+    assert np.allclose(whole, chunked, atol=1e-2)
+
+
+def test_highpass_removes_dc_and_keeps_voice_band():
+    t = np.arange(RATE) / RATE
+    hum = np.full(RATE, 3000, dtype=np.float32)  # Offset de continua
+    voice = (3000 * np.sin(2 * np.pi * 1000 * t)).astype(np.float32)
+    hp = HighPass(rate=RATE)
+
+    def rms(x):
+        return np.sqrt(np.mean(x[RATE // 2:] ** 2))  # Sin el transitorio inicial
+
+    assert rms(hp.process(hum)) < 0.01 * rms(hum)
+    hp.reset()
+    assert rms(hp.process(voice)) > 0.9 * rms(voice)
+
+
+def test_chain_apply_is_aligned_with_the_input():
+    chain = create_dsp("highpass,denoise", rate=RATE)
+    samples = np.clip(_signal(), -32768, 32767).astype(np.int16)
+
+    out = chain.apply(samples, chunk=1000)
+    assert out.dtype == np.int16
+    assert len(out) == len(samples)
+    assert chain.latency > 0
+
+
+def test_unknown_stage_is_rejected():
+    assert create_dsp("") is None
+    with pytest.raises(ValueError):
+        create_dsp("highpass,reverb")
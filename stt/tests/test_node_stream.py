@@ -0,0 +1,85 @@
+import time
+
+from node_stream import AudioStream, StreamOverrun
+
+RATE = 16000
+
+
+def _pcm(seconds):
+    return bytes(range(256)) * int(seconds * RATE * 2 / 256)
+
+
+def test_stream_delivers_the_whole_utterance(fake_node):
+    node, url = fake_node
+    node.stt_text = "enciende la luz"
+    audio = _pcm(1.0)
+
+    stream = AudioStream(url, trace="abcd1234", max_lag=None)
+    stream.write(audio)
+    stream.close()
+
+    result = stream.wait(10)
+    assert result["transcript"] == "enciende la luz"
+    assert result["bytes"] == len(audio)
+    assert node.stt_streams[-1]["trace"] == "abcd1234"
+
+
+def test_reconnect_resends_from_the_start(fake_node):
+    node, url = fake_node
+    node.stt_text = "ok"
+    node.stt_drop = 1  # Corta la primera conexión a mitad del audio
+    audio = _pcm(1.0)
+
+    stream = AudioStream(url, max_lag=None, write_size=4096)
+    stream.write(audio)
+    stream.close()
+
+    assert stream.wait(10) is not None
+    assert stream.reconnects == 1
+    assert len(node.stt_streams) == 1
+    assert node.stt_streams[0]["bytes"] == len(audio)
+    assert node.stt_streams[0]["attempt"] == 2
+
+
+def test_retry_after_5xx_is_not_processed_twice(fake_node):
+    node, url = fake_node
+    node.stt_errors = 1  # Procesa el audio pero responde 503
+
+    stream = AudioStream(url, max_lag=None)
+    stream.write(_pcm(0.5))
+    stream.close()
+
+    assert stream.wait(10) is not None
+    assert stream.reconnects == 1
+    assert len(node.stt_streams) == 1
+    assert node.stt_duplicates == 1
+
+
+def test_reconnect_of_a_long_utterance_is_not_an_overrun(fake_node):
+    node, url = fake_node
+    stream = AudioStream(url, max_lag=0.5, write_size=3200)
+    piece = _pcm(0.1)
+    for i in range(15):  # 1.5 s al ritmo de la captura, con un corte a la mitad
+        if i == 8:
+            node.stt_drop = 1
+        stream.write(piece)
+        time.sleep(0.1)
+    stream.close()
+
+    assert stream.wait(10) is not None
+    assert stream.error is None
+    assert stream.reconnects == 1
+    assert node.stt_streams[-1]["bytes"] == 15 * len(piece)
+
+
+def test_slow_server_overruns(fake_node):
+    node, url = fake_node
+    node.stt_delay = 0.05  # Lee un chunk cada 50 ms
+
+    stream = AudioStream(url, max_lag=0.2, write_size=1024, sndbuf=4096)
+    stream.write(_pcm(2.0))
+    stream.close()
+
+    assert stream.wait(10) is None
+    assert isinstance(stream.error, StreamOverrun)
+    assert node.stt_streams == []
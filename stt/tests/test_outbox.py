@@ -0,0 +1,60 @@
+import time
+
+from outbox import Outbox, backoff_delay
+
+
+def test_fifo_per_device(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    for i in range(3):
+        outbox.put("a", f"a{i}")
+        outbox.put("b", f"b{i}")
+
+    assert sorted(outbox.devices()) == ["a", "b"]
+    assert [row[1] for row in outbox.head("a", 10)] == ["a0", "a1", "a2"]
+    assert [row[1] for row in outbox.head("b", 2)] == ["b0", "b1"]
+
+
+def test_retry_keeps_position_and_ack_removes(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    ids = [outbox.put("a", text) for text in ("uno", "dos", "tres")]
+
+    outbox.retry(ids[:1])
+    outbox.retry(ids[:1])
+    head = outbox.head("a", 10)
+    assert [row[1] for row in head] == ["uno", "dos", "tres"]
+    assert head[0][3] == 2  # Intentos
+
+    outbox.ack(ids[:2])
+    assert [row[1] for row in outbox.head("a", 10)] == ["tres"]
+    assert len(outbox) == 1
+
+
+def test_survives_reopen(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(path)
+    outbox.put("a", "abre la puerta", trace="abcd1234")
+    outbox.close()
+
+    reopened = Outbox(path)
+    assert [(row[1], row[4]) for row in reopened.head("a", 10)] == [("abre la puerta", "abcd1234")]
+
+
+def test_expire_by_creation_time(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    now = time.time()
+    outbox.put("a", "viejo", created=now - 300, trace="t1")
+    outbox.put("a", "nuevo", created=now - 10)
+
+    assert 299 < outbox.oldest_age() < 310
+    expired = outbox.expire(120)
+    assert [(device, text, trace) for device, text, _, trace in expired] == [("a", "viejo", "t1")]
+    assert expired[0][2] >= 300
+    assert [row[1] for row in outbox.head("a", 10)] == ["nuevo"]
+    assert outbox.expire(120) == []
+
+
+def test_backoff_delay_grows_and_is_capped():
+    for attempts in range(1, 10):
+        delay = min(60.0, 2 ** (attempts - 1))
+        assert delay / 2 <= backoff_delay(attempts, 1.0, 60.0) <= delay
+    assert backoff_delay(50, 1.0, 60.0) <= 60.0
@@ -0,0 +1,40 @@
+import threading
+
+from pipeline import UploadPipeline
+
+
+def test_workers_process_everything_before_close():
+    done = []
+    pipeline = UploadPipeline(done.append, workers=3, maxsize=100)
+    for i in range(50):
+        assert pipeline.submit(i)
+    pipeline.close()
+
+    assert sorted(done) == list(range(50))
+    assert pipeline.stats()["processed"] == 50
+
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    pipeline = UploadPipeline(lambda item: release.wait(), workers=1, maxsize=2)
+    results = [pipeline.submit(i) for i in range(6)]
+    release.set()
+    pipeline.close()
+
+    # Uno en el worker (o todavía en la cola), dos en la cola, el resto descartado
+    assert results.count(False) == pipeline.stats()["dropped"] >= 3
+    assert pipeline.stats()["processed"] == results.count(True)
+
+
+def test_failing_item_does_not_stop_the_worker():
+    def handler(item):
+        if item == 1:
+            raise IOError("Drive no responde")
+
+    pipeline = UploadPipeline(handler, workers=1)
+    for i in range(3):
+        pipeline.submit(i)
+    pipeline.close()
+
+    stats = pipeline.stats()
+    assert (stats["processed"], stats["failed"]) == (2, 1)
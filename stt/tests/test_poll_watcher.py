@@ -0,0 +1,79 @@
+import os
+import time
+
+from poll_watcher import ScanWatcher
+
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+
+    def on_created(self, event):
+        self.events.append(("created", os.path.basename(event.src_path)))
+
+    def on_modified(self, event):
+        self.events.append(("modified", os.path.basename(event.src_path)))
+
+    def on_deleted(self, event):
+        self.events.append(("deleted", os.path.basename(event.src_path)))
+
+
+def _watcher(directory, **kwargs):
+    handler = Recorder()
+    watcher = ScanWatcher(**kwargs)
+    watcher.schedule(handler, str(directory))
+    watcher.seed([])
+    return watcher, handler
+
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_new_modified_and_deleted_files(tmp_path):
+    watcher, handler = _watcher(tmp_path, full_scan_every=1000)
+    _write(tmp_path / "a.txt", "uno")
+    _write(tmp_path / "ignorado.flac", "audio")
+    watcher.scan()
+    assert handler.events == [("created", "a.txt")]
+
+    # Recién creado: está "caliente", se ve cambiar sin listar el directorio
+    _write(tmp_path / "a.txt", "uno dos")
+    watcher.scan()
+    assert handler.events[-1] == ("modified", "a.txt")
+
+    os.remove(tmp_path / "a.txt")
+    watcher.scan()
+    assert handler.events[-1] == ("deleted", "a.txt")
+    assert watcher.stats()["files"] == 0
+
+
+def test_full_scan_sees_an_old_file_rewritten(tmp_path):
+    _write(tmp_path / "viejo.txt", "uno")
+    watcher, handler = _watcher(tmp_path, full_scan_every=0, hot_seconds=0)
+    watcher.scan()
+    handler.events.clear()
+
+    _write(tmp_path / "viejo.txt", "otro texto")
+    watcher.scan()
+    assert handler.events == [("modified", "viejo.txt")]
+    assert watcher.full_scans == 2
+
+
+def test_racy_directory_is_listed_again_on_coarse_mtime_mounts(tmp_path):
+    watcher, handler = _watcher(tmp_path, full_scan_every=1000)
+    second = (int(time.time()) + 1) * 10 ** 9
+
+    def coarse():
+        # Montaje de segundos enteros: los dos archivos dejan el mismo mtime
+        os.utime(tmp_path, ns=(second, second))
+
+    _write(tmp_path / "a.txt", "uno")
+    coarse()
+    watcher.scan()
+    _write(tmp_path / "b.txt", "dos")
+    coarse()
+    watcher.scan()
+
+    assert handler.events == [("created", "a.txt"), ("created", "b.txt")]
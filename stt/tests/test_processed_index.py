@@ -0,0 +1,68 @@
+import os
+
+from processed_index import ProcessedIndex, LRUDict, content_hash
+
+
+def test_mark_and_is_current(tmp_path):
+    index = ProcessedIndex(str(tmp_path / "index.db"))
+    path = str(tmp_path / "audio_1.txt")
+    digest = content_hash("prende la luz")
+
+    assert not index.is_current(path, 10.0, 13)
+    index.mark(path, 10.0, 13, digest)
+    assert index.is_current(path, 10.0, 13)
+    assert not index.is_current(path, 11.0, 13)
+    # Drive solo tocó el mtime: el contenido es el mismo
+    assert index.same_content(path, digest)
+    assert not index.same_content(path, content_hash("apaga la luz"))
+
+
+def test_relative_and_absolute_paths_are_the_same_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    index = ProcessedIndex("index.db")
+    index.mark("audio_1.txt", 1.0, 5, "x")
+
+    assert index.is_current(os.path.join(str(tmp_path), "audio_1.txt"), 1.0, 5)
+
+
+def test_changed_prune_and_reopen(tmp_path):
+    db = str(tmp_path / "index.db")
+    index = ProcessedIndex(db)
+    a, b, c = (str(tmp_path / name) for name in ("a.txt", "b.txt", "c.txt"))
+    index.mark_many([(a, 1.0, 1, "ha"), (b, 2.0, 2, "hb")])
+
+    entries = [(a, 1.0, 1), (b, 2.5, 2), (c, 3.0, 3)]
+    assert index.changed(entries) == [(b, 2.5, 2), (c, 3.0, 3)]
+    index.close()
+
+    # Sobrevive el reinicio; lo que ya no existe se borra del índice
+    reopened = ProcessedIndex(db)
+    assert len(reopened) == 2
+    assert reopened.prune([a]) == 1
+    assert len(reopened) == 1
+    assert reopened.is_current(a, 1.0, 1)
+    assert not reopened.is_current(b, 2.0, 2)
+
+
+def test_lru_dict_evicts_least_recently_used():
+    cache = LRUDict(maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache["a"]  # "a" pasa a ser la más reciente
+    cache["c"] = 3
+
+    assert list(cache) == ["a", "c"]
+
+
+def test_first_open_only_for_a_new_index(tmp_path):
+    db = str(tmp_path / "index.db")
+    index = ProcessedIndex(db)
+    assert index.first_open
+    index.mark(str(tmp_path / "a.txt"), 1.0, 1, "ha")
+    index.prune([])  # Todo lo procesado ya se borró de Drive
+    index.close()
+
+    # Índice vacío pero ya existente: no es la primera vez (no hay backfill)
+    reopened = ProcessedIndex(db)
+    assert len(reopened) == 0
+    assert not reopened.first_open
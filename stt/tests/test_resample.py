@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from resample import PolyphaseResampler
+
+
+def _tone(rate, seconds, freq):
+    t = np.arange(int(rate * seconds)) / rate
+    return np.rint(8000 * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+@pytest.mark.parametrize("in_rate", [44100, 48000, 22050, 8000])
+def test_streaming_equals_block(in_rate):
+    x = _tone(in_rate, 1.0, 440)
+    block = PolyphaseResampler(in_rate, 16000).resample(x)
+
+    resampler = PolyphaseResampler(in_rate, 16000, max_chunk=4096)
+    sizes = [1, 17, 1024, 4096, 10000, 333]  # Incluye chunks más grandes que max_chunk
+    out, i, k = [], 0, 0
+    while i < len(x):
+        n = sizes[k % len(sizes)]
+        out.append(resampler.process(x[i:i + n]).copy())  # process() devuelve una vista
+        i, k = i + n, k + 1
+
+    streamed = np.concatenate(out)
+    assert len(streamed) == len(block)
+    # Mismas muestras y coeficientes; solo el orden de suma en float32 puede
+    # mover el redondeo un LSB
+    assert np.abs(streamed.astype(np.int32) - block).max() <= 1
+    assert abs(len(block) - len(x) * 16000 / in_rate) <= 1
+
+
+def test_tone_survives_and_alias_is_removed():
+    resampler = PolyphaseResampler(48000, 16000)
+    delay = int(resampler.delay) + 1
+
+    kept = resampler.resample(_tone(48000, 1.0, 1000)).astype(np.float64)[delay:]
+    assert 5000 < np.sqrt((kept ** 2).mean()) < 6000  # 8000/√2
+
+    alias = resampler.resample(_tone(48000, 1.0, 11000)).astype(np.float64)[delay:]
+    assert np.sqrt((alias ** 2).mean()) < 50
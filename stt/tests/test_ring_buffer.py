@@ -0,0 +1,42 @@
+import numpy as np
+
+from ring_buffer import AudioRingBuffer
+
+
+def test_view_is_contiguous_across_wrap():
+    buffer = AudioRingBuffer(10)
+    buffer.write(np.arange(7, dtype=np.int16))
+    buffer.write(np.arange(7, 13, dtype=np.int16))
+
+    assert buffer.total == 13
+    assert buffer.oldest == 3
+    view = buffer.view(3)
+    assert view.tolist() == list(range(3, 13))
+    # Vista, no copia: comparte memoria con el buffer
+    assert np.shares_memory(view, buffer._buf)
+
+
+def test_old_positions_are_clamped_to_what_is_left():
+    buffer = AudioRingBuffer(8)
+    for start in range(0, 20, 4):
+        buffer.write(np.arange(start, start + 4, dtype=np.int16))
+
+    assert buffer.view(0).tolist() == list(range(12, 20))
+    assert buffer.view(14, 17).tolist() == [14, 15, 16]
+    assert len(buffer.view(18, 15)) == 0
+
+
+def test_write_larger_than_capacity_keeps_the_tail():
+    buffer = AudioRingBuffer(5)
+    buffer.write(np.arange(12, dtype=np.int16))
+
+    assert buffer.total == 12
+    assert buffer.view(0).tolist() == [7, 8, 9, 10, 11]
+
+
+def test_position_counts_back_in_samples():
+    buffer = AudioRingBuffer(16000)
+    buffer.write(np.zeros(8000, dtype=np.int16))
+
+    assert buffer.position(0.25, 16000) == 4000
+    assert buffer.position(10.0, 16000) == 0  # No más atrás que lo grabado
@@ -0,0 +1,45 @@
+import numpy as np
+
+from segmenter import Segmenter
+from vad import create_vad, synthetic_corpus, NoiseFloorTracker
+
+RATE = 16000
+CHUNK = 1024
+
+
+def _segmenter(**kwargs):
+    noise = NoiseFloorTracker(CHUNK / RATE)
+    return Segmenter(create_vad("multi", RATE), noise, rate=RATE, **kwargs)
+
+
+def test_finds_each_labelled_utterance():
+    _, samples, _, labels = synthetic_corpus(RATE)[0]
+    found = list(_segmenter(pre_roll=0.3).segments(samples, CHUNK))
+
+    assert len(found) == len(labels)
+    for (start, end, peak), (label_start, label_end) in zip(found, labels):
+        # Empieza con el pre-roll antes de la voz y termina tras el silencio
+        assert label_start - 0.5 < start / RATE < label_start
+        assert min(label_end + 1.5, len(samples) / RATE) <= end / RATE < label_end + 2.5
+        assert peak > 1000
+
+
+def test_utterances_shorter_than_min_duration_are_dropped():
+    rng = np.random.default_rng(0)
+    samples = rng.normal(0, 50, 6 * RATE)
+    t = np.arange(int(0.2 * RATE)) / RATE
+    burst = sum(np.sin(2 * np.pi * k * 150 * t) / k for k in range(1, 12)) * 3000
+    samples[2 * RATE:2 * RATE + len(burst)] += burst
+    samples = samples.astype(np.int16)
+
+    # Como en vivo, la duración incluye el silencio que cierra el enunciado
+    assert list(_segmenter(min_duration=2.5).segments(samples, CHUNK)) == []
+    assert len(list(_segmenter(min_duration=0.5).segments(samples, CHUNK))) == 1
+
+
+def test_same_result_on_every_run():
+    _, samples, _, _ = synthetic_corpus(RATE)[0]
+    segmenter = _segmenter(pre_roll=0.3)
+    # El VAD se reinicia en cada pasada (el piso de ruido se conserva)
+    assert list(segmenter.segments(samples, CHUNK))[0][:2] == \
+        list(segmenter.segments(samples, CHUNK))[0][:2]
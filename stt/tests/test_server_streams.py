@@ -0,0 +1,51 @@
+import threading
+
+import server
+
+
+class FakeUpload:
+    """Subida en streaming que termina cuando el test lo decide"""
+
+    def __init__(self, result=None):
+        self.result = result
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return self.result
+
+
+def test_failed_stream_goes_through_the_pipeline():
+    upload = FakeUpload(result=None)
+    upload.done.set()
+    fallback = []
+    server.report_stream_upload(upload, "audio.wav", fallback=lambda: fallback.append(True))
+    assert fallback == [True]
+
+
+def test_wait_streams_joins_uploads_in_flight():
+    upload = FakeUpload(result=None)
+    fallback = []
+    report = threading.Thread(target=server.report_stream_upload, args=(upload, "audio.wav"),
+                              kwargs={"fallback": lambda: fallback.append(True)}, daemon=True)
+    report.start()
+    server.stream_reports.append(report)
+
+    threading.Timer(0.1, upload.done.set).start()
+    server.wait_streams(timeout=10)
+
+    assert not report.is_alive()
+    assert fallback == [True]  # El respaldo llegó al pipeline antes de cerrarlo
+    assert server.stream_reports == []
+
+
+def test_wait_streams_gives_up_after_the_timeout():
+    upload = FakeUpload(result=None)
+    report = threading.Thread(target=upload.wait, daemon=True)
+    report.start()
+    server.stream_reports.append(report)
+
+    server.wait_streams(timeout=0.05)
+    assert report.is_alive()
+    assert server.stream_reports == []
+    upload.done.set()
@@ -0,0 +1,51 @@
+import json
+import time
+
+from tracing import Tracer, trace_from_name, load_traces, stage_latencies
+
+
+def test_trace_id_comes_from_the_file_name():
+    assert trace_from_name("/x/audio_20240101_120000_0a1b2c3d.flac") == "0a1b2c3d"
+    assert trace_from_name("/x/audio_20240101_120000_0a1b2c3d.txt") == "0a1b2c3d"
+    assert trace_from_name("/x/audio_20240101_120000.txt") is None
+
+
+def test_finish_exports_each_stage(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    tracer = Tracer(path, process="capture")
+    trace = tracer.start()
+    tracer.mark(trace, "end")
+    tracer.finish(trace, "uploaded")
+
+    events = [json.loads(line) for line in open(path)]
+    assert [e["stage"] for e in events] == ["onset", "end", "uploaded"]
+    assert {e["trace"] for e in events} == {trace}
+    assert set(tracer.stats()) == {"end", "uploaded", "total"}
+    assert trace not in tracer.active
+
+
+def test_report_joins_processes(tmp_path):
+    capture, monitor = str(tmp_path / "capture.jsonl"), str(tmp_path / "monitor.jsonl")
+    first = Tracer(capture, process="capture")
+    trace = first.start()
+    first.finish(trace, "uploaded")
+    second = Tracer(monitor, process="monitor")
+    second.start(trace, stage="seen")
+    second.finish(trace, "acked")
+
+    latencies = stage_latencies(load_traces([capture, monitor]))
+    assert set(latencies) == {"uploaded", "uploaded->seen", "acked", "end_to_end"}
+
+
+def test_forgotten_traces_are_dropped():
+    tracer = Tracer(max_active=3, max_age=3600)
+    traces = [tracer.start() for _ in range(5)]
+    assert list(tracer.active) == traces[2:]
+    assert tracer.abandoned == 2
+
+    old = Tracer(max_age=0.05)
+    stale = old.start()
+    time.sleep(0.1)
+    fresh = old.start()
+    assert list(old.active) == [fresh]
+    assert stale not in old.active
@@ -0,0 +1,96 @@
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("requests")
+
+from transcriber import LocalTranscriber
+
+
+class FakeFallback:
+    def __init__(self):
+        self.items = []
+
+    def submit(self, item):
+        self.items.append(item)
+        return True
+
+    def close(self):
+        pass
+
+
+def _audio():
+    return np.random.default_rng(0).normal(0, 2000, 16000).astype(np.int16)
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def _transcriber(url, model="stub", **kwargs):
+    transcriber = LocalTranscriber(model, url, device_id="test", verbose=False,
+                                   retry_base=0.1, retry_max=0.3, **kwargs)
+    assert _wait_for(lambda: transcriber.ready or transcriber.broken)
+    return transcriber
+
+
+def test_stub_model_posts_the_transcript(fake_node):
+    node, url = fake_node
+    fallback = FakeFallback()
+    transcriber = _transcriber(url, fallback=fallback)
+    for i in range(3):
+        assert transcriber.submit((_audio(), f"trace{i}"))
+    assert transcriber.wait_idle(10)
+    transcriber.close()
+
+    assert node.received == [("test", "enciende la luz")] * 3
+    assert transcriber.stats()["processed"] == 3
+    assert fallback.items == []
+
+
+def test_failed_post_is_retried_not_transcribed_again(fake_node):
+    node, url = fake_node
+    node.status = 503
+    fallback = FakeFallback()
+    transcriber = _transcriber(url, fallback=fallback)
+    for i in range(2):
+        transcriber.submit((_audio(), f"trace{i}"))
+    assert transcriber.wait_idle(10)
+    assert _wait_for(lambda: transcriber.stats()["outbox"] == 2)
+
+    node.status = 200
+    assert _wait_for(lambda: transcriber.stats()["outbox"] == 0)
+    transcriber.close()
+
+    stats = transcriber.stats()
+    assert node.received == [("test", "enciende la luz")] * 2
+    assert (stats["retried"], stats["processed"]) == (2, 2)
+    assert fallback.items == []  # El texto ya existía: Drive no lo vuelve a transcribir
+
+
+def test_rejected_transcript_is_not_retried(fake_node):
+    node, url = fake_node
+    node.status = 400
+    transcriber = _transcriber(url)
+    transcriber.submit((_audio(), "trace"))
+    assert transcriber.wait_idle(10)
+    transcriber.close()
+
+    stats = transcriber.stats()
+    assert (stats["rejected"], stats["outbox"], stats["retried"]) == (1, 0, 0)
+
+
+def test_broken_model_falls_back(fake_node):
+    _, url = fake_node
+    fallback = FakeFallback()
+    transcriber = _transcriber(url, model="no-such-model", fallback=fallback)
+    assert transcriber.broken
+    item = (_audio(), "trace")
+    assert transcriber.submit(item)
+    transcriber.close()
+
+    assert fallback.items == [item]
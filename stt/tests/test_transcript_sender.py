@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+pytest.importorskip("watchdog")
+
+from outbox import Outbox
+from transcript_monitor import TranscriptSender
+
+
+def _sender(url, tmp_path, **kwargs):
+    return TranscriptSender(url, device_id="test", window=0.05,
+                            outbox=Outbox(str(tmp_path / "outbox.db")), **kwargs)
+
+
+def test_burst_goes_out_in_one_batch(fake_node, tmp_path):
+    node, url = fake_node
+    sender = _sender(url, tmp_path)
+    for i in range(5):
+        sender.send(f"comando {i}")
+    assert sender.flush(10)
+
+    assert node.received == [("test", f"comando {i}") for i in range(5)]
+    assert node.requests == 1
+    assert sender.stats()["sent"] == 5
+
+
+@pytest.mark.parametrize("status", [201, 202, 204])
+def test_any_2xx_is_delivered(fake_node, tmp_path, status):
+    node, url = fake_node
+    node.ok_status = status
+    sender = _sender(url, tmp_path)
+    sender.send("abre la puerta")
+    assert sender.flush(10)
+
+    stats = sender.stats()
+    assert (stats["sent"], stats["rejected"], stats["backlog"]) == (1, 0, 0)
+
+
+def test_server_down_keeps_them_in_order_until_it_returns(fake_node, tmp_path):
+    node, url = fake_node
+    node.status = 503
+    sender = _sender(url, tmp_path)
+    for text in ("uno", "dos", "tres"):
+        sender.send(text)
+    assert sender.flush(10)
+    assert sender.stats()["backlog"] == 3
+    assert node.received == []
+
+    node.status = 200
+    deadline = time.monotonic() + 10
+    # La bandeja se vacía antes de contar las reenviadas: esperar al contador
+    while sender.stats()["replayed"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert [text for _, text in node.received] == ["uno", "dos", "tres"]
+    assert sender.stats()["replayed"] == 3
+    assert sender.stats()["backlog"] == 0
+
+
+def test_old_commands_expire_instead_of_running_late(fake_node, tmp_path):
+    node, url = fake_node
+    sender = _sender(url, tmp_path, ttl=60)
+    sender.send("abre la puerta", created=time.time() - 300)
+    sender.send("prende la luz")
+    assert sender.flush(10)
+
+    assert node.received == [("test", "prende la luz")]
+    assert sender.stats()["expired"] == 1
+
+
+def test_reuploaded_audio_keeps_its_capture_time():
+    from transcript_monitor import captured_at, command_created, OUTBOX_TTL
+
+    path = "/drive/transcripts/audio_20240101_120000_0a1b2c3d.txt"
+    captured = captured_at(path)
+    assert captured is not None
+    # Transcrito enseguida: cuenta desde el archivo
+    assert command_created(path, captured + 5) == captured + 5
+    # Resubido días después: cuenta desde la captura y vence
+    assert command_created(path, captured + 3 * 86400) == captured
+    assert command_created("/drive/transcripts/nota.txt", 1000.0) == 1000.0
+    assert OUTBOX_TTL < 3 * 86400
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from vad import create_vad, evaluate, synthetic_corpus, EnergyVAD, MultiFeatureVAD, NoiseFloorTracker
+
+RATE = 16000
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return synthetic_corpus(RATE)[0]
+
+
+def test_multi_feature_ignores_fan_and_doors(corpus):
+    _, samples, rate, segments = corpus
+    result = evaluate(create_vad("multi", rate), samples, rate, segments)
+
+    assert result["false_triggers"] == 0
+    assert result["recall"] >= 0.95
+    assert result["precision"] >= 0.9
+
+
+def test_energy_vad_triggers_on_noise(corpus):
+    # La referencia: solo energía se dispara con el ventilador y los golpes
+    _, samples, rate, segments = corpus
+    assert evaluate(create_vad("energy", rate), samples, rate, segments)["false_triggers"] > 0
+
+
+def test_silence_is_not_speech():
+    quiet = np.random.default_rng(0).normal(0, 50, 1024).astype(np.int16)
+    for vad in (EnergyVAD(RATE), MultiFeatureVAD(RATE)):
+        speech, level = vad.process(quiet)
+        assert not speech
+        assert level < 100
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        create_vad("webrtc")
+
+
+def test_noise_floor_follows_the_room_but_not_the_voice(corpus):
+    _, samples, rate, _ = corpus
+    chunk = 1024
+    vad = create_vad("multi", rate)
+    noise = NoiseFloorTracker(chunk / rate)
+    floors = {}
+    for i in range(0, len(samples) - chunk + 1, chunk):
+        _, level = vad.process(samples[i:i + chunk])
+        noise.update(level)
+        floors[round(i / rate, 1)] = noise.floor
+
+    def floor_at(seconds):
+        return floors[min(floors, key=lambda t: abs(t - seconds))]
+
+    quiet = floor_at(1.9)
+    assert floor_at(5.9) > 2 * quiet          # Aprende el ventilador
+    assert floor_at(9.9) < 1.5 * quiet        # Y lo olvida al apagarse
+    assert floor_at(11.9) < 4 * floor_at(9.9)  # Dos segundos de voz apenas lo mueven
+
+
+def test_thresholds_never_fall_below_the_minimum():
+    noise = NoiseFloorTracker(0.064, min_threshold=150)
+    for _ in range(200):
+        noise.update(0.0)
+
+    assert noise.trigger_threshold == 150
+    assert noise.silence_threshold == 100
+    assert noise.stats()["noise_floor"] < 1
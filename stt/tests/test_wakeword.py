@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from wakeword import WakeWordFilter, mfcc, trim_silence, synthetic_utterance, WAKE_VOWELS
+
+RATE = 16000
+
+
+@pytest.fixture(scope="module")
+def spotter():
+    rng = np.random.default_rng(0)
+    templates = [trim_silence(*mfcc(synthetic_utterance(WAKE_VOWELS, rng), RATE))
+                 for _ in range(4)]
+    return WakeWordFilter(templates, RATE)
+
+
+@pytest.mark.parametrize("vowels", [WAKE_VOWELS + "eu", WAKE_VOWELS + "ae", WAKE_VOWELS + "iou"])
+def test_command_starting_with_the_wake_word_passes(spotter, vowels):
+    accepted, distance = spotter.check(synthetic_utterance(vowels, np.random.default_rng(1)))
+    assert accepted, distance
+
+
+@pytest.mark.parametrize("vowels", ["eueae", "aiouea", "uaeio"])
+def test_other_speech_is_rejected(spotter, vowels):
+    accepted, distance = spotter.check(synthetic_utterance(vowels, np.random.default_rng(2)))
+    assert not accepted, distance
+
+
+def test_stats_count_avoided_uploads():
+    rng = np.random.default_rng(0)
+    templates = [trim_silence(*mfcc(synthetic_utterance(WAKE_VOWELS, rng), RATE))
+                 for _ in range(2)]
+    spotter = WakeWordFilter(templates, RATE, threshold=-1.0)  # Rechaza todo
+    spotter.check(synthetic_utterance("aeiou", rng))
+
+    stats = spotter.stats()
+    assert (stats["checked"], stats["passed"], stats["rejected"]) == (1, 0, 1)
+    assert stats["avoided_pct"] == 100.0
+
+
+def test_needs_a_template():
+    with pytest.raises(ValueError):
+        WakeWordFilter([], RATE)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Trazas de latencia por enunciado, de la voz al acuse del servidor
+Cada enunciado lleva un id corto en el nombre del archivo (audio_..._<id>.flac
+-> audio_..._<id>.txt), así la captura y el monitor anotan la misma traza
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import threading
+from collections import deque, OrderedDict
+
+TRACE_ID = re.compile(r"_([0-9a-f]{8})\.[^.]+$")
+
+# Cubetas del histograma (ms)
+BUCKETS = [10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+def new_trace_id():
+    return uuid.uuid4().hex[:8]
+
+
+def trace_from_name(path):
+    """Id de traza del nombre de archivo (None si el archivo no tiene)"""
+    match = TRACE_ID.search(os.path.basename(path))
+    return match.group(1) if match else None
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    return {
+        "count": len(values),
+        "p50_ms": values[len(values) // 2],
+        "p95_ms": values[int(len(values) * 0.95)],
+        "max_ms": values[-1],
+    }
+
+
+class Tracer:
+    """
+    `mark()` solo agrega (etapa, monotónico, epoch) a una lista: sin lock
+    ni I/O, apto para el hilo de captura. `finish()` (desde un worker)
+    calcula la duración de cada etapa respecto a la anterior, la suma a
+    los histogramas en memoria y la agrega como JSON por línea a `path`.
+
+    Dentro de un proceso las duraciones salen del reloj monotónico; el
+    epoch solo se usa para unir etapas de procesos distintos (report).
+
+    Una traza que nunca llega a `finish()`/`discard()` (un camino de
+    error que se la olvida) no debe quedar para siempre: `start()` tira
+    las abiertas hace más de `max_age` segundos y, si aun así hay más de
+    `max_active`, las más viejas. Se cuentan en `abandoned`.
+    """
+
+    def __init__(self, path=None, process="capture", keep=1000, max_active=1000, max_age=3600):
+        self.path = path
+        self.process = process
+        self.keep = keep
+        self.max_active = max_active
+        self.max_age = max_age
+        self.active = OrderedDict()  # id -> [(etapa, monotónico, epoch)], en orden de start()
+        self.durations = {}   # etapa -> deque de ms
+        self.abandoned = 0
+        self._lock = threading.Lock()
+
+    def start(self, trace=None, stage="onset"):
+        """Abre una traza (nueva o con el id recibido) y marca su primera etapa"""
+        trace = trace or new_trace_id()
+        now = time.monotonic()
+        self.active[trace] = [(stage, now, time.time())]
+        self._expire(now)
+        return trace
+
+    def _expire(self, now):
+        while len(self.active) > 1:
+            try:
+                trace, events = next(iter(self.active.items()))
+            except (StopIteration, RuntimeError):
+                return  # Otro hilo la cerró mientras tanto
+            if len(self.active) <= self.max_active and now - events[0][1] < self.max_age:
+                return
+            if self.active.pop(trace, None) is not None:
+                self.abandoned += 1
+
+    def mark(self, trace, stage):
+        events = self.active.get(trace)
+        if events is not None:
+            events.append((stage, time.monotonic(), time.time()))
+
+    def discard(self, trace):
+        self.active.pop(trace, None)
+
+    def finish(self, trace, stage=None):
+        """Cierra la traza (marcando `stage` si se da) y la exporta"""
+        if stage:
+            self.mark(trace, stage)
+        events = self.active.pop(trace, None)
+        if not events:
+            return
+
+        lines = []
+        start = prev = events[0][1]
+        with self._lock:
+            for i, (name, mono, wall) in enumerate(events):
+                step = (mono - prev) * 1000
+                if i:
+                    self.durations.setdefault(name, deque(maxlen=self.keep)).append(step)
+                lines.append(json.dumps({
+                    "trace": trace,
+                    "process": self.process,
+                    "stage": name,
+                    "wall": wall,
+                    "step_ms": round(step, 3),
+                    "since_start_ms": round((mono - start) * 1000, 3),
+                }))
+                prev = mono
+            total = (events[-1][1] - start) * 1000
+            self.durations.setdefault("total", deque(maxlen=self.keep)).append(total)
+
+            if self.path:
+                try:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write("\n".join(lines) + "\n")
+                except OSError as e:
+                    print(f"⚠️ No se pudo escribir la traza: {e}")
+
+    def stats(self):
+        """{etapa: {count, p50_ms, p95_ms, max_ms}} de lo terminado en este proceso"""
+        with self._lock:
+            return {stage: percentiles(values) for stage, values in self.durations.items()}
+
+    def print_stats(self):
+        stats = self.stats()
+        if not stats:
+            return
+        print("⏱️ Latencia por etapa (desde la anterior):")
+        for stage, s in stats.items():
+            print(f"   {stage:16s} n={s['count']:<4d} p50 {s['p50_ms']:8.0f} ms  "
+                  f"p95 {s['p95_ms']:8.0f} ms  máx {s['max_ms']:8.0f} ms")
+        if self.abandoned:
+            print(f"   {self.abandoned} traza(s) abandonadas sin cerrar")
+
+
+# =====================================================
+# REPORTE: une las trazas de captura y monitor
+# =====================================================
+
+def load_traces(paths):
+    """{id: [eventos ordenados por epoch]} de uno o más archivos JSONL"""
+    traces = {}
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    event = json.loads(line)
+                    traces.setdefault(event["trace"], []).append(event)
+    for events in traces.values():
+        events.sort(key=lambda e: e["wall"])
+    return traces
+
+
+def stage_latencies(traces):
+    """
+    {etapa: [ms]} de principio a fin. Entre procesos (p. ej. subida a Drive
+    -> archivo visto por el monitor) la etapa se llama "anterior->siguiente"
+    y sale de la diferencia de epoch.
+    """
+    latencies = {}
+    for events in traces.values():
+        for prev, event in zip(events, events[1:]):
+            if event["process"] == prev["process"]:
+                name, ms = event["stage"], event["step_ms"]
+            else:
+                name = f"{prev['stage']}->{event['stage']}"
+                ms = (event["wall"] - prev["wall"]) * 1000
+            latencies.setdefault(name, []).append(ms)
+        if len(events) > 1:
+            latencies.setdefault("end_to_end", []).append(
+                (events[-1]["wall"] - events[0]["wall"]) * 1000)
+    return latencies
+
+
+def histogram(values):
+    counts = [0] * (len(BUCKETS) + 1)
+    for v in values:
+        i = 0
+        while i < len(BUCKETS) and v >= BUCKETS[i]:
+            i += 1
+        counts[i] += 1
+    return counts
+
+
+def report(paths):
+    traces = load_traces(paths)
+    latencies = stage_latencies(traces)
+    print(f"📊 {len(traces)} traza(s) de {', '.join(paths)}\n")
+
+    labels = [f"<{b}" for b in BUCKETS] + [f">={BUCKETS[-1]}"]
+    for stage, values in latencies.items():
+        s = percentiles(values)
+        print(f"⏱️ {stage}: n={s['count']}  p50 {s['p50_ms']:.0f} ms  "
+              f"p95 {s['p95_ms']:.0f} ms  máx {s['max_ms']:.0f} ms")
+        counts = histogram(values)
+        peak = max(counts)
+        for label, count in zip(labels, counts):
+            if count:
+                print(f"   {label:>7s} ms {'█' * max(1, count * 30 // peak)} {count}")
+    return latencies
+
+
+if __name__ == "__main__":
+    # python tracing.py report traces.jsonl [otra_máquina.jsonl ...]
+    import sys
+
+    if len(sys.argv) > 2 and sys.argv[1] == "report":
+        report(sys.argv[2:])
+    else:
+        print("Uso: python tracing.py report traces.jsonl [...]")
@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Backends de transcripción intercambiables
+"drive": sube el audio a Drive (Colab + Whisper + monitor hacen el resto)
+"local": modelo cargado en un proceso aparte, directo a /api/voice/transcript
+"""
+
+import time
+import queue
+import threading
+import multiprocessing
+from collections import deque
+
+import numpy as np
+import requests
+
+from pipeline import UploadPipeline
+from outbox import Outbox, backoff_delay
+
+
+class Transcriber:
+    """
+    Interfaz común (la misma que UploadPipeline, así server.py no cambia):
+    submit((audio, traza[, micrófono])) nunca bloquea y devuelve False si
+    el enunciado se descartó; stats() devuelve al menos depth, maxsize,
+    submitted, dropped, processed y failed.
+    """
+
+    name = "?"
+    dropped = 0
+
+    def submit(self, item):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class DriveTranscriber(Transcriber):
+    """Camino original: un pool de workers codifica y sube a Drive (ver upload_utterance)"""
+
+    name = "drive"
+
+    def __init__(self, upload, workers=2, maxsize=8):
+        self.pipeline = UploadPipeline(upload, workers=workers, maxsize=maxsize)
+
+    @property
+    def dropped(self):
+        return self.pipeline.dropped
+
+    def submit(self, item):
+        return self.pipeline.submit(item)
+
+    def stats(self):
+        return self.pipeline.stats()
+
+    def close(self):
+        self.pipeline.close()
+
+
+# =====================================================
+# MODELOS (se cargan dentro del proceso worker)
+# =====================================================
+
+class StubModel:
+    """
+    Modelo falso para pruebas: tarda como uno real (costo fijo por lote
+    + proporcional al audio) y devuelve un texto fijo.
+    """
+
+    def __init__(self, text="enciende la luz", load_seconds=0.0, batch_overhead=0.03,
+                 seconds_per_audio_second=0.05, rate=16000):
+        time.sleep(load_seconds)
+        self.text = text
+        self.batch_overhead = batch_overhead
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.rate = rate
+
+    def transcribe(self, batch):
+        audio_seconds = sum(len(a) for a in batch) / self.rate
+        time.sleep(self.batch_overhead + self.seconds_per_audio_second * audio_seconds)
+        return [self.text for _ in batch]
+
+
+class WhisperModel:
+    """openai-whisper o faster-whisper en CPU; el audio llega como int16 a 16 kHz"""
+
+    def __init__(self, engine, size, language="es"):
+        self.engine = engine
+        self.language = language
+        if engine == "faster-whisper":
+            try:
+                from faster_whisper import WhisperModel as FasterWhisper
+            except ImportError:
+                raise RuntimeError("faster-whisper no instalado (pip install faster-whisper)")
+            self.model = FasterWhisper(size, device="cpu", compute_type="int8")
+        else:
+            try:
+                import whisper
+            except ImportError:
+                raise RuntimeError("whisper no instalado (pip install openai-whisper)")
+            self.model = whisper.load_model(size, device="cpu")
+
+    def transcribe(self, batch):
+        texts = []
+        for audio in batch:
+            samples = np.asarray(audio, dtype=np.float32) / 32768.0
+            if self.engine == "faster-whisper":
+                segments, _ = self.model.transcribe(samples, language=self.language, beam_size=1)
+                texts.append("".join(s.text for s in segments).strip())
+            else:
+                result = self.model.transcribe(samples, language=self.language, fp16=False)
+                texts.append(result["text"].strip())
+        return texts
+
+
+def load_model(spec):
+    """"stub" | "whisper:<tamaño>" | "faster-whisper:<tamaño>" (p. ej. "faster-whisper:base")"""
+    engine, _, size = spec.partition(":")
+    if engine == "stub":
+        return StubModel()
+    if engine in ("whisper", "faster-whisper"):
+        return WhisperModel(engine, size or "base")
+    raise ValueError(f"Modelo desconocido: {spec}")
+
+
+def _model_worker(spec, inbox, results, max_batch, window):
+    """
+    Proceso worker: carga el modelo una vez y transcribe por lotes lo
+    que haya en la cola, hasta `max_batch` enunciados. Con `window=0` no
+    espera a nadie: en reposo cada enunciado sale solo y, si se acumulan
+    mientras el modelo trabaja, el próximo lote los toma juntos.
+    """
+    start = time.monotonic()
+    try:
+        model = load_model(spec)
+    except Exception as e:
+        results.put(("error", f"{type(e).__name__}: {e}"))
+        return
+    results.put(("ready", time.monotonic() - start))
+
+    while True:
+        first = inbox.get()
+        if first is None:
+            return
+        batch = [first]
+        deadline = time.monotonic() + window
+        closing = False
+        while len(batch) < max_batch:
+            try:
+                item = inbox.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                closing = True
+                break
+            batch.append(item)
+
+        ids = [key for key, _ in batch]
+        start = time.monotonic()
+        try:
+            texts = model.transcribe([audio for _, audio in batch])
+            results.put(("done", ids, texts, time.monotonic() - start))
+        except Exception as e:
+            results.put(("failed", ids, f"{type(e).__name__}: {e}"))
+        if closing:
+            return
+
+
+class LocalTranscriber(Transcriber):
+    """
+    Modelo caliente en un proceso aparte (el GIL y la carga del modelo
+    no tocan la captura). Los enunciados viajan por una cola acotada; el
+    worker los transcribe en lotes y un hilo de este proceso envía cada
+    texto a /api/voice/transcript con una sesión keep-alive.
+
+    Si el modelo no carga, falla o la cola está llena, el enunciado pasa
+    a `fallback` (normalmente DriveTranscriber). Si lo que falla es el
+    envío del texto ya transcrito, no se vuelve a transcribir por Drive
+    (sería el mismo comando dos veces): el texto queda en `outbox` y un
+    hilo lo reintenta en orden con espera exponencial hasta `ttl`
+    segundos desde que se grabó. Mientras haya pendientes, lo nuevo
+    también pasa por la bandeja para no adelantarse.
+    """
+
+    name = "local"
+
+    def __init__(self, model="stub", server_url="http://127.0.0.1:5000", device_id="ESP32_GATEWAY_01",
+                 max_batch=4, window=0.0, maxsize=8, fallback=None, tracer=None, verbose=True,
+                 outbox=None, ttl=120, retry_base=1.0, retry_max=30.0):
+        self.server_url = server_url
+        self.device_id = device_id
+        self.maxsize = maxsize
+        self.fallback = fallback
+        self.tracer = tracer
+        self.verbose = verbose
+        self.session = requests.Session()
+        self.outbox = outbox if outbox is not None else Outbox(":memory:")
+        self.ttl = ttl
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.attempts = 0     # Fallos seguidos del envío (para la espera)
+
+        self.pending = {}     # id -> (item, monotónico al encolar)
+        self.next_id = 0
+        self.ready = False
+        self.broken = None    # Mensaje de error si el modelo no cargó
+        self.load_seconds = None
+        self.submitted = 0
+        self.dropped = 0
+        self.processed = 0
+        self.failed = 0
+        self.fallbacks = 0
+        self.retried = 0      # Envíos fallidos que quedaron en la bandeja
+        self.rejected = 0     # El servidor respondió 4xx: no se reintenta
+        self.expired = 0
+        self.empty = 0
+        self.batches = 0
+        self.latencies = deque(maxlen=1000)  # De submit() al 200 del servidor
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+
+        ctx = multiprocessing.get_context("spawn")  # Sin heredar hilos ni PyAudio
+        self.inbox = ctx.Queue(maxsize=maxsize)
+        self.results = ctx.Queue()
+        self.process = ctx.Process(target=_model_worker, name="transcriber",
+                                   args=(model, self.inbox, self.results, max_batch, window),
+                                   daemon=True)
+        self.process.start()
+        self._thread = threading.Thread(target=self._collect, name="transcriber-results", daemon=True)
+        self._thread.start()
+        self._wake = threading.Event()
+        if len(self.outbox):
+            print(f"📬 {len(self.outbox)} transcripción(es) pendientes de la ejecución anterior")
+            self._wake.set()
+        self._stopping = False
+        self._sender = threading.Thread(target=self._resend, name="transcriber-outbox", daemon=True)
+        self._sender.start()
+
+    def submit(self, item):
+        if self.broken is not None:
+            return self._fall_back([item])
+        with self._lock:
+            key = self.next_id
+            self.next_id += 1
+            self.pending[key] = (item, time.monotonic())
+        try:
+            self.inbox.put_nowait((key, item[0]))
+        except queue.Full:
+            with self._lock:
+                del self.pending[key]
+            if self.fallback is not None:
+                return self._fall_back([item])
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _fall_back(self, items):
+        if self.fallback is None:
+            with self._lock:
+                self.failed += len(items)
+            return False
+        with self._lock:
+            self.fallbacks += len(items)
+        ok = True
+        for item in items:
+            ok = self.fallback.submit(item) and ok
+        return ok
+
+    def _take(self, ids):
+        with self._lock:
+            return [self.pending.pop(key) for key in ids if key in self.pending]
+
+    def _collect(self):
+        while True:
+            try:
+                message = self.results.get(timeout=1.0)
+            except queue.Empty:
+                if self.process.is_alive() or self.broken is not None:
+                    continue
+                message = ("error", f"el proceso terminó (código {self.process.exitcode})")
+            kind = message[0]
+            if kind == "stop":
+                return
+            if kind == "ready":
+                self.ready = True
+                self.load_seconds = message[1]
+                print(f"🧠 Modelo local listo ({self.load_seconds:.1f}s de carga)")
+            elif kind == "error":
+                self.broken = message[1]
+                print(f"❌ Modelo local no disponible ({message[1]}), se usa Drive")
+                with self._lock:
+                    leftover = list(self.pending.values())
+                    self.pending.clear()
+                self._fall_back([item for item, _ in leftover])
+            elif kind == "failed":
+                print(f"❌ Error transcribiendo: {message[2]}")
+                self._fall_back([item for item, _ in self._take(message[1])])
+            else:
+                _, ids, texts, _ = message
+                self.batches += 1
+                for (item, queued), text in zip(self._take(ids), texts):
+                    self._deliver(item, queued, text)
+            with self._idle:
+                self._idle.notify_all()
+
+    def _deliver(self, item, queued, text):
+        trace = item[1]
+        if self.tracer:
+            self.tracer.mark(trace, "transcribed")
+        if not text:
+            with self._lock:
+                self.empty += 1
+                self.processed += 1
+            if self.tracer:
+                self.tracer.discard(trace)
+            return
+
+        microphone = item[2] if len(item) > 2 else None
+        created = time.time() - (time.monotonic() - queued)
+        if len(self.outbox):
+            # Hay anteriores esperando reintento: detrás de ellas, en orden
+            self._queue_retry(text, created, trace, microphone)
+            return
+        status = self._post(text, trace, microphone)
+        if status is None or status == 429 or status >= 500:
+            print(f"⚠️ El servidor no recibió \"{text}\", queda para reintentar")
+            if self.tracer:
+                self.tracer.mark(trace, "post_failed")
+            self._queue_retry(text, created, trace, microphone)
+        elif self._settle(status, text, trace):
+            with self._lock:
+                self.latencies.append(time.monotonic() - queued)
+
+    def _post(self, text, trace, microphone=None, session=None):
+        """Código HTTP de la respuesta, o None si no hubo conexión"""
+        payload = {"deviceId": self.device_id, "transcript": text, "traceId": trace,
+                   "source": "local_whisper"}
+        if microphone is not None:
+            payload["microphone"] = microphone
+        try:
+            response = (session or self.session).post(f"{self.server_url}/api/voice/transcript",
+                                         json=payload, timeout=5)
+            return response.status_code
+        except requests.exceptions.RequestException:
+            return None
+
+    def _settle(self, status, text, trace):
+        """Cierra una entrega que el servidor contestó (2xx o 4xx); True si fue aceptada"""
+        accepted = 200 <= status < 300
+        with self._lock:
+            self.processed += accepted
+            self.rejected += not accepted
+        if self.tracer:
+            self.tracer.finish(trace, "acked" if accepted else "rejected")
+        if not accepted:
+            print(f"❌ El servidor rechazó \"{text}\" ({status}), se descarta")
+        elif self.verbose:
+            print(f"✅ Transcripción local: \"{text}\"")
+        return accepted
+
+    def _queue_retry(self, text, created, trace, microphone):
+        # El micrófono va en la columna del dispositivo: la bandeja es de este transcriptor
+        self.outbox.put(microphone or "", text, created, trace)
+        with self._lock:
+            self.retried += 1
+        self._wake.set()
+
+    def _resend(self):
+        """Reintenta la bandeja en orden; espera exponencial mientras el servidor no conteste"""
+        session = requests.Session()  # La de _collect no se comparte entre hilos
+        delay = None
+        while not self._stopping:
+            self._wake.wait(delay)
+            self._wake.clear()
+            for device, text, age, trace in self.outbox.expire(self.ttl):
+                with self._lock:
+                    self.expired += 1
+                if self.tracer:
+                    self.tracer.finish(trace, "expired")
+                print(f"⌛ Descartada por vieja ({age:.0f}s): \"{text}\"")
+            delay = None
+            for device in self.outbox.devices():
+                for row_id, text, created, _, trace in self.outbox.head(device, 100):
+                    status = self._post(text, trace, device or None, session)
+                    if status is None or status == 429 or status >= 500:
+                        self.outbox.retry([row_id])
+                        self.attempts += 1
+                        delay = backoff_delay(self.attempts, self.retry_base, self.retry_max)
+                        break
+                    self.attempts = 0
+                    self.outbox.ack([row_id])
+                    self._settle(status, text, trace)
+                if delay is not None:
+                    break
+            if delay is None and len(self.outbox):
+                delay = 0.0  # Quedan más de 100: seguir sin esperar
+
+    def wait_idle(self, timeout=None):
+        """Espera a que no quede nada en vuelo (benchmarks)"""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self.pending, timeout)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                "depth": len(self.pending),
+                "maxsize": self.maxsize,
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "processed": self.processed,
+                "failed": self.failed,
+                "fallbacks": self.fallbacks,
+                "retried": self.retried,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "outbox": len(self.outbox),
+                "empty": self.empty,
+                "batches": self.batches,
+                "load_s": self.load_seconds,
+                "latency_p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+                "latency_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+            }
+
+    def close(self, timeout=30):
+        """Termina lo encolado, cierra el worker y el fallback"""
+        if self.broken is None:
+            self.wait_idle(timeout)
+            self.inbox.put(None)
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.inbox.cancel_join_thread()  # Lo que quedó sin leer ya pasó al fallback
+        self.results.put(("stop",))
+        self._thread.join()
+        self._stopping = True
+        self._wake.set()
+        self._sender.join()
+        if len(self.outbox):
+            print(f"📬 {len(self.outbox)} transcripción(es) sin entregar quedan en la bandeja")
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+# =====================================================
+# BENCHMARK: latencia local (modelo falso) vs la subida a Drive
+# =====================================================
+
+def benchmark(n=24, seconds=2.0, traces=None):
+    """
+    `n` enunciados de `seconds` al servidor Node falso, espaciados (uno
+    cada 250 ms) y en ráfaga (todos juntos), con lotes de 1 y de 4. Del lado de Drive solo
+    se puede medir acá la subida (Drive falso); el resto (Colab, sync,
+    monitor) sale de las trazas reales si se pasa `traces`.
+    """
+    from fake_node import start_fake_node
+    from fake_drive import start_fake_drive
+    from drive_upload import DriveUploader
+    from encoding import encode_audio
+    from tracing import load_traces, stage_latencies, percentiles
+
+    rate = 16000
+    audio = (np.random.default_rng(0).normal(0, 2000, int(seconds * rate))).astype(np.int16)
+    node, url = start_fake_node()
+    print(f"📊 {n} enunciados de {seconds:.0f}s (modelo falso: "
+          f"{StubModel().seconds_per_audio_second * 1000:.0f} ms por s de audio + "
+          f"{StubModel().batch_overhead * 1000:.0f} ms por lote)\n")
+
+    results = {}
+    for label, gap in (("espaciados", 0.25), ("ráfaga", 0.0)):
+        for max_batch in (1, 4):
+            local = LocalTranscriber("stub", url, max_batch=max_batch, maxsize=n, verbose=False)
+            while not local.ready:
+                time.sleep(0.01)
+            for i in range(n):
+                local.submit((audio, None))
+                time.sleep(gap)
+            local.wait_idle(60)
+            s = local.stats()
+            local.close()
+            results[f"local_{label}_batch{max_batch}"] = s
+            print(f"   local, {label:10s} lotes de {max_batch}: p50 {s['latency_p50_ms']:6.0f} ms  "
+                  f"p95 {s['latency_p95_ms']:6.0f} ms  ({s['batches']} lotes)")
+
+    drive, endpoint = start_fake_drive()
+    uploader = DriveUploader(api_endpoint=endpoint)
+    data, mimetype, ext = encode_audio(audio, rate)
+    uploader.upload_bytes(data, f"calentar.{ext}", mimetype)
+    upload_ms = []
+    for i in range(n):
+        start = time.perf_counter()
+        uploader.upload_bytes(data, f"bench_{i}.{ext}", mimetype)
+        upload_ms.append((time.perf_counter() - start) * 1000)
+    drive.shutdown()
+    node.shutdown()
+    s = percentiles(upload_ms)
+    results["drive_upload"] = s
+    print(f"   Drive, solo la subida:             p50 {s['p50_ms']:6.0f} ms  p95 {s['p95_ms']:6.0f} ms  "
+          f"(+ Colab + sincronización + monitor)")
+
+    if traces:
+        s = percentiles(stage_latencies(load_traces(traces)).get("end_to_end", []))
+        results["drive_end_to_end"] = s
+        print(f"   Drive, de punta a punta (trazas): p50 {s['p50_ms']:6.0f} ms  "
+              f"p95 {s['p95_ms']:6.0f} ms  (n={s['count']})")
+    return results
+
+
+if __name__ == "__main__":
+    # python transcriber.py bench [traces.jsonl ...]
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark(traces=sys.argv[2:] or None)
+    else:
+        print("Uso: python transcriber.py bench [traces.jsonl ...]")
@@ -6,10 +6,21 @@ VERSIÓN SIMPLIFICADA: Solo reenvía, el React procesa con Ollama
 """
 
 import os
+import re
 import time
+import threading
+from collections import deque
 import requests
+from requests.adapters import HTTPAdapter
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from datetime import datetime
+from processed_index import ProcessedIndex, content_hash
+from debounce import SettleScheduler
+from pipeline import UploadPipeline
+from poll_watcher import ScanWatcher, scan_directory
+from outbox import Outbox, backoff_delay
+from tracing import Tracer, trace_from_name
 
 # =====================================================
 # CONFIGURACIÓN
@@ -25,49 +36,144 @@ TRANSCRIPTS_DIR = "G:/Mi unidad/ESP32_AUDIO/transcripts"
 SERVER_URL = "http://10.134.23.93:5000"
 DEVICE_ID = "ESP32_GATEWAY_01"
 
+# Envío
+BATCH_WINDOW = 0.2     # Segundos para juntar transcripciones que llegan en ráfaga
+BATCH_MAX = 20         # Máximo de transcripciones por petición
+POOL_SIZE = 4          # Conexiones keep-alive al servidor
+
+# Bandeja de salida (lo que no se pudo enviar espera acá, en orden)
+OUTBOX_PATH = "transcripts_outbox.db"
+OUTBOX_TTL = 120       # Segundos: un comando más viejo ya no se ejecuta
+RETRY_BASE = 1.0       # Primer reintento (se duplica en cada fallo)
+RETRY_MAX = 60.0       # Tope de espera entre reintentos
+
+# Índice de archivos ya enviados (sobrevive reinicios)
+INDEX_PATH = "transcripts_index.db"
+BACKFILL_ON_FIRST_RUN = False  # Sin índice previo: ¿enviar el historial existente?
+MAX_TRACKED = 1000     # Archivos recordados en memoria (LRU)
+
+# Detección de archivo "terminado de escribir"
+SETTLE_WINDOW = 0.5    # Segundos sin cambios de tamaño/mtime antes de leerlo
+SETTLE_MAX_WAIT = 10   # Si no deja de cambiar, leerlo igual tras este tiempo
+READ_WORKERS = 4       # Hilos que leen y envían
+READ_QUEUE_SIZE = 1000 # Archivos asentados esperando worker
+
+# Cómo detectar archivos nuevos
+# "events": eventos del sistema (watchdog); "poll": escaneo periódico, más
+# confiable en Google Drive montado / unidades de red donde se pierden eventos
+WATCHER = "events"
+POLL_MIN_INTERVAL = 0.5   # Segundos entre escaneos con actividad
+POLL_MAX_INTERVAL = 5.0   # ... y con la carpeta quieta
+POLL_FULL_SCAN = 30.0     # Cada cuánto revisar también los archivos viejos (bajarlo si el
+                          # montaje no actualiza el mtime de la carpeta al crear archivos)
+
+# Trazas de latencia (mismo archivo que server.py para unir ambas mitades)
+TRACE_FILE = "traces.jsonl"
+
+tracer = Tracer(TRACE_FILE, "monitor")
+
+# audio_<fecha>_<hora>_...: fecha de captura que server.py pone en el nombre
+CAPTURED_AT = re.compile(r"^audio_(\d{8}_\d{6})")
+
+def captured_at(path):
+    """Epoch de captura según el nombre del archivo (None si no la tiene)"""
+    match = CAPTURED_AT.match(os.path.basename(path))
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').timestamp()
+    except ValueError:
+        return None
+
+def command_created(path, mtime):
+    """
+    Desde cuándo cuenta el TTL: cuando se escribió la transcripción, salvo
+    que el audio se haya capturado más de OUTBOX_TTL antes (p. ej. resubido
+    desde el archivo días después): entonces cuenta desde la captura y el
+    comando vence en vez de ejecutarse tarde.
+    """
+    captured = captured_at(path)
+    if captured is not None and mtime - captured > OUTBOX_TTL:
+        return captured
+    return mtime
+
 # =====================================================
 # HANDLER
 # =====================================================
 
 class TranscriptHandler(FileSystemEventHandler):
-    def __init__(self):
-        self.processed = set()
-        self.last_process_time = {}
+    """
+    El hilo del observer solo avisa al scheduler (sin sleeps ni I/O).
+    Cuando el archivo se asienta, un pool de workers lo lee y lo envía.
+    """
+    
+    def __init__(self, index=None):
+        self.index = index if index is not None else ProcessedIndex(INDEX_PATH, MAX_TRACKED)
+        self.workers = UploadPipeline(self._work, READ_WORKERS, READ_QUEUE_SIZE, name="transcript")
+        self.scheduler = SettleScheduler(self.enqueue, SETTLE_WINDOW, SETTLE_MAX_WAIT)
+        self._in_flight = set()
+        self._lock = threading.Lock()
     
     def on_created(self, event):
-        if event.is_directory:
-            return
-        
-        if event.src_path.endswith('.txt'):
-            self.process_transcript(event.src_path)
+        if not event.is_directory and event.src_path.endswith('.txt'):
+            self._seen(event.src_path)
     
     def on_modified(self, event):
-        if event.is_directory:
-            return
-        
-        if event.src_path.endswith('.txt'):
-            # Evitar procesar múltiples veces en modificaciones rápidas
-            now = time.time()
-            if event.src_path in self.last_process_time:
-                if now - self.last_process_time[event.src_path] < 2:
-                    return  # Muy pronto desde última vez
-            
-            self.last_process_time[event.src_path] = now
-            self.process_transcript(event.src_path)
+        if not event.is_directory and event.src_path.endswith('.txt'):
+            self._seen(event.src_path)
+    
+    def on_moved(self, event):
+        # Drive suele escribir un temporal y renombrarlo al final
+        if not event.is_directory and event.dest_path.endswith('.txt'):
+            self._seen(event.dest_path)
+    
+    def _seen(self, filepath):
+        trace = trace_from_name(filepath)
+        if trace and trace not in tracer.active:
+            tracer.start(trace, "file_seen")
+        self.scheduler.touch(filepath)
+    
+    def enqueue(self, filepath):
+        """Archivo asentado: pasarlo a los workers (llamado desde el scheduler)"""
+        if not self.workers.submit(filepath):
+            print(f"⚠️ Cola llena, {os.path.basename(filepath)} se procesará al reiniciar")
+    
+    def _work(self, filepath):
+        # Un mismo archivo nunca en dos workers a la vez: si ya está en
+        # curso, se reprograma y se vuelve a mirar cuando se asiente
+        with self._lock:
+            if filepath in self._in_flight:
+                self.scheduler.touch(filepath)
+                return
+            self._in_flight.add(filepath)
+        try:
+            self.process_transcript(filepath)
+        finally:
+            with self._lock:
+                self._in_flight.discard(filepath)
     
-    def process_transcript(self, filepath):
-        """Procesa nueva transcripción"""
+    def process_transcript(self, filepath, mtime=None, size=None):
+        """
+        Procesa nueva transcripción (el archivo ya está completamente escrito).
+        `mtime` y `size` si ya se conocen (escaneo inicial); si no, un solo os.stat
+        """
         filename = os.path.basename(filepath)
+        trace = trace_from_name(filepath)
         
-        # Evitar procesar múltiples veces
-        if filepath in self.processed:
+        # Evitar procesar múltiples veces (índice persistente)
+        if mtime is None or size is None:
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                tracer.discard(trace)
+                return
+            mtime, size = stat.st_mtime, stat.st_size
+        if self.index.is_current(filepath, mtime, size):
+            tracer.discard(trace)
             return
         
         print(f"\n📄 Nuevo archivo: {filename}")
         
-        # Esperar que el archivo esté completamente escrito
-        time.sleep(0.5)
-        
         try:
             # Leer transcripción
             with open(filepath, 'r', encoding='utf-8') as f:
@@ -75,47 +181,313 @@ class TranscriptHandler(FileSystemEventHandler):
             
             if not transcript:
                 print("⚠️ Archivo vacío, ignorando")
+                tracer.discard(trace)
+                return
+            tracer.mark(trace, "read")
+            
+            # Drive a veces solo toca el mtime: mismo contenido, no reenviar
+            digest = content_hash(transcript)
+            if self.index.same_content(filepath, digest):
+                self.index.mark(filepath, mtime, size, digest)
+                print("   Contenido ya enviado, ignorando")
+                tracer.discard(trace)
                 return
             
             print(f"📝 Transcripción: \"{transcript}\"")
             print(f"📤 Enviando a servidor...")
             
-            # Enviar al servidor (solo reenvío)
-            send_to_server(transcript)
+            # Enviar al servidor (solo reenvío); el TTL cuenta desde que se escribió
+            # (o desde la captura, si el audio es mucho más viejo)
+            send_to_server(transcript, command_created(filepath, mtime), trace)
+            tracer.mark(trace, "outbox")
             
             # Marcar como procesado
-            self.processed.add(filepath)
+            self.index.mark(filepath, mtime, size, digest)
             
         except Exception as e:
+            tracer.discard(trace)
             print(f"❌ Error procesando {filename}: {e}")
     
-def send_to_server(transcript):
-    """Envía transcripción al servidor para que React la procese"""
-    try:
-        response = requests.post(
-            f"{SERVER_URL}/api/voice/transcript-drive",
-            json={
-                "deviceId": DEVICE_ID,
-                "transcript": transcript,
-                "source": "google_drive_colab"
-            },
-            timeout=5
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"✅ Servidor: {data.get('message', 'OK')}")
-            print(f"   React procesará con Ollama automáticamente")
-        else:
-            print(f"⚠️ Servidor respondió: {response.status_code}")
+    def close(self):
+        """Detiene el scheduler y espera a que los workers terminen lo encolado"""
+        self.scheduler.close()
+        self.workers.close()
     
-    except requests.exceptions.ConnectionError:
-        print(f"❌ No se puede conectar al servidor: {SERVER_URL}")
-        print(f"   Verifica que el servidor Node.js esté ejecutándose")
-    except requests.exceptions.Timeout:
-        print(f"❌ Timeout conectando al servidor")
-    except Exception as e:
-        print(f"❌ Error: {e}")
+# =====================================================
+# ENVÍO AL SERVIDOR
+# =====================================================
+
+class TranscriptSender:
+    """
+    Envío en segundo plano con una sesión HTTP keep-alive y una bandeja
+    de salida en disco (Outbox).
+
+    `send()` guarda la transcripción en la bandeja y vuelve: desde ese
+    momento ya no se pierde aunque el servidor esté caído o el monitor
+    se reinicie. Un hilo la entrega en orden por dispositivo, en lotes
+    a /api/voice/transcript-drive/batch (o de a una si el servidor no
+    tiene esa ruta). Si falla la conexión, reintenta con espera
+    exponencial + jitter; lo que supera OUTBOX_TTL se descarta para que
+    un "abre la puerta" viejo nunca se ejecute tarde.
+    """
+    
+    def __init__(self, server_url=SERVER_URL, device_id=DEVICE_ID,
+                 window=BATCH_WINDOW, max_batch=BATCH_MAX, pool_size=POOL_SIZE,
+                 outbox=None, ttl=OUTBOX_TTL):
+        self.server_url = server_url
+        self.device_id = device_id
+        self.window = window
+        self.max_batch = max_batch
+        self.ttl = ttl
+        self.batch_supported = True
+        self.outbox = outbox if outbox is not None else Outbox(OUTBOX_PATH)
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Reintentos por dispositivo: {device: (intentos, próximo intento)}
+        self.backoff = {}
+        self.replay_started = None  # Cuándo volvió el servidor con pendientes
+        self.replay_count = 0
+        
+        # Métricas
+        self.sent = 0
+        self.failed = 0       # Intentos fallidos (quedan en la bandeja)
+        self.expired = 0
+        self.rejected = 0     # El servidor las rechazó (4xx): no se reintentan
+        self.replayed = 0     # Entregadas después de al menos un fallo
+        self.replay_rate = 0.0
+        self.requests = 0
+        self.latencies = deque(maxlen=1000)  # Desde que se escribió la transcripción
+        
+        self._wake = threading.Event()
+        self._idle = threading.Condition()
+        self._idle_passes = 0
+        if len(self.outbox):
+            print(f"📬 {len(self.outbox)} transcripción(es) pendientes de la ejecución anterior")
+        threading.Thread(target=self._run, daemon=True).start()
+    
+    def send(self, transcript, created=None, trace=None):
+        """Guarda la transcripción en la bandeja (en disco) y despierta al envío"""
+        self.outbox.put(self.device_id, transcript, created, trace)
+        self._wake.set()
+    
+    def flush(self, timeout=None):
+        """
+        Espera a que se entregue todo lo que se puede entregar ahora
+        (con el servidor caído vuelve en cuanto todo queda en espera de reintento)
+        """
+        with self._idle:
+            target = self._idle_passes + 1
+            self._wake.set()
+            return self._idle.wait_for(lambda: self._idle_passes >= target, timeout)
+    
+    def _next_wakeup(self):
+        """Segundos hasta el próximo reintento (o un chequeo periódico del TTL)"""
+        if not self.backoff:
+            return None if not len(self.outbox) else 1.0
+        now = time.monotonic()
+        return max(0.0, min(when for _, when in self.backoff.values()) - now)
+    
+    def _run(self):
+        progress = False
+        while True:
+            # Con pendientes entregables se sigue sin esperar; si no, se
+            # duerme hasta un send() (y se junta la ráfaga) o un reintento
+            if not progress and self._wake.wait(self._next_wakeup()):
+                time.sleep(self.window)
+            self._wake.clear()
+            
+            try:
+                progress = self._drain_once()
+            except Exception as e:
+                print(f"❌ Error en la bandeja de salida: {e}")
+                progress = False
+            
+            if not progress:
+                with self._idle:
+                    self._idle_passes += 1
+                    self._idle.notify_all()
+    
+    def _drain_once(self):
+        """Un lote por dispositivo disponible. True si se entregó algo"""
+        for device, text, age, trace in self.outbox.expire(self.ttl):
+            self.expired += 1
+            tracer.finish(trace, "expired")
+            print(f"⌛ Descartada por vieja ({age:.0f}s, {device}): \"{text}\"")
+        
+        progress = False
+        now = time.monotonic()
+        devices = self.outbox.devices()
+        for device in set(self.backoff) - set(devices):
+            del self.backoff[device]  # Se vació por TTL mientras esperaba
+        for device in devices:
+            attempts, retry_at = self.backoff.get(device, (0, 0))
+            if retry_at > now:
+                continue
+            rows = self.outbox.head(device, self.max_batch)
+            if rows and self._deliver(device, rows):
+                progress = True
+        
+        if self.replay_started and not len(self.outbox):
+            elapsed = time.monotonic() - self.replay_started
+            self.replay_rate = self.replay_count / max(elapsed, 1e-9)
+            print(f"📬 Bandeja vacía: {self.replay_count} reenviadas en {elapsed:.1f}s "
+                  f"({self.replay_rate:.0f}/s)")
+            self.replay_started = None
+        return progress
+    
+    def _post(self, path, payload):
+        self.requests += 1
+        return self.session.post(f"{self.server_url}{path}", json=payload, timeout=5)
+    
+    def _deliver(self, device, rows):
+        """Entrega en orden; False si hubo que dejar el resto para un reintento"""
+        try:
+            if len(rows) > 1 and self.batch_supported:
+                response = self._post("/api/voice/transcript-drive/batch", {
+                    "deviceId": device,
+                    "source": "google_drive_colab",
+                    "transcripts": [{"transcript": row[1], "traceId": row[4]} for row in rows]
+                })
+                if response.status_code == 404:
+                    print("⚠️ El servidor no soporta envío por lotes, se envía de a uno")
+                    self.batch_supported = False
+                else:
+                    return self._record(device, rows, response)
+            
+            for row in rows:
+                response = self._post("/api/voice/transcript-drive", {
+                    "deviceId": device,
+                    "transcript": row[1],
+                    "traceId": row[4],
+                    "source": "google_drive_colab"
+                })
+                if not self._record(device, [row], response):
+                    return False
+            return True
+        
+        except requests.exceptions.ConnectionError:
+            print(f"❌ No se puede conectar al servidor: {self.server_url}")
+            print(f"   Verifica que el servidor Node.js esté ejecutándose")
+        except requests.exceptions.Timeout:
+            print(f"❌ Timeout conectando al servidor")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+        self._retry_later(device, rows)
+        return False
+    
+    def _retry_later(self, device, rows):
+        attempts = self.backoff.get(device, (0, 0))[0] + 1
+        delay = backoff_delay(attempts, RETRY_BASE, RETRY_MAX)
+        self.backoff[device] = (attempts, time.monotonic() + delay)
+        self.failed += len(rows)
+        self.outbox.retry([row[0] for row in rows])
+        print(f"   📬 {len(self.outbox)} en la bandeja, reintento #{attempts} en {delay:.1f}s")
+    
+    def _record(self, device, rows, response):
+        status = response.status_code
+        if status == 429 or status >= 500:
+            print(f"⚠️ Servidor respondió: {status}")
+            self._retry_later(device, rows)
+            return False
+        
+        self.outbox.ack([row[0] for row in rows])
+        if not 200 <= status < 300:
+            # Error del pedido: reintentarlo no lo va a arreglar
+            self.rejected += len(rows)
+            for row in rows:
+                tracer.finish(row[4], "rejected")
+            print(f"⚠️ Servidor rechazó {len(rows)} transcripción(es): {status}")
+            return True
+        
+        if device in self.backoff:
+            del self.backoff[device]
+            self.replay_started = time.monotonic()
+            self.replay_count = 0
+            print(f"🔁 Servidor de vuelta, vaciando la bandeja ({len(self.outbox) + len(rows)} pendientes)")
+        
+        now = time.time()
+        retried = sum(1 for row in rows if row[3] > 0)
+        self.sent += len(rows)
+        self.replayed += retried
+        if self.replay_started:
+            self.replay_count += len(rows)
+        self.latencies.extend(now - row[2] for row in rows)
+        for row in rows:
+            tracer.finish(row[4], "acked")
+        
+        try:
+            message = response.json().get('message', 'OK')
+        except ValueError:  # 204 u otra respuesta 2xx sin JSON
+            message = 'OK'
+        print(f"✅ Servidor: {message} ({len(rows)} transcripción(es))")
+        print(f"   React procesará con Ollama automáticamente")
+        return True
+    
+    def stats(self):
+        latencies = sorted(self.latencies)
+        p50 = latencies[len(latencies) // 2] if latencies else 0
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "expired": self.expired,
+            "rejected": self.rejected,
+            "replayed": self.replayed,
+            "replay_rate": self.replay_rate,
+            "backlog": len(self.outbox),
+            "oldest_s": self.outbox.oldest_age(),
+            "requests": self.requests,
+            "latency_p50_ms": p50 * 1000,
+            "latency_p95_ms": p95 * 1000,
+        }
+
+
+_sender = None
+
+def get_sender():
+    """Sender compartido por todo el monitor"""
+    global _sender
+    if _sender is None:
+        _sender = TranscriptSender()
+    return _sender
+
+def send_to_server(transcript, created=None, trace=None):
+    """
+    Envía transcripción al servidor para que React la procese (en segundo plano).
+    Al volver ya está guardada en la bandeja de salida.
+    """
+    get_sender().send(transcript, created, trace)
+
+# =====================================================
+# ESCANEO INICIAL
+# =====================================================
+
+def scan_transcripts(directory):
+    """[(ruta, mtime, tamaño)] de los .txt del directorio (una sola pasada de scandir)"""
+    return [(path, mtime, size) for path, (mtime, size) in scan_directory(directory).items()]
+
+def create_observer(entries):
+    """Observer según WATCHER; el de escaneo parte del listado inicial"""
+    if WATCHER == "poll":
+        observer = ScanWatcher(POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_FULL_SCAN)
+        observer.seed(entries)
+        return observer
+    if WATCHER == "events":
+        return Observer()
+    raise ValueError(f"WATCHER desconocido: {WATCHER}")
+
+def fingerprint(path, mtime, size):
+    """Entrada del índice para un archivo (lee el contenido para el hash)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            digest = content_hash(f.read().strip())
+    except (OSError, UnicodeDecodeError):
+        digest = ""
+    return path, mtime, size, digest
 
 # =====================================================
 # MAIN
@@ -143,9 +515,10 @@ def main():
     
     # Verificar conectividad con servidor
     print("🔍 Verificando servidor...")
+    sender = get_sender()
     try:
-        response = requests.get(f"{SERVER_URL}/api/status", timeout=3)
-        if response.status_code == 200:
+        response = sender.session.get(f"{SERVER_URL}/api/status", timeout=3)
+        if response.ok:
             print("✅ Servidor Node.js accesible")
         else:
             print(f"⚠️ Servidor respondió con código {response.status_code}")
@@ -155,24 +528,43 @@ def main():
     
     print()
     
-    # Procesar archivos existentes
+    # Procesar archivos existentes (solo los que no están en el índice)
     print("🔍 Procesando archivos existentes...")
-    handler = TranscriptHandler()
-    
-    existing_files = [f for f in os.listdir(TRANSCRIPTS_DIR) if f.endswith('.txt')]
-    if existing_files:
-        print(f"   Encontrados {len(existing_files)} archivos")
-        for filename in existing_files:
-            filepath = os.path.join(TRANSCRIPTS_DIR, filename)
-            handler.process_transcript(filepath)
-    else:
-        print("   No hay archivos existentes")
+    index = ProcessedIndex(INDEX_PATH, MAX_TRACKED)
+    handler = TranscriptHandler(index)
+    
+    entries = scan_transcripts(TRANSCRIPTS_DIR)
+    removed = index.prune(path for path, _, _ in entries)
+    first_run = index.first_open
+    pending = index.changed(entries)
+    print(f"   Encontrados {len(entries)} archivos, {len(pending)} nuevos o modificados"
+          f"{f', {removed} borrados del índice' if removed else ''}")
+    
+    if pending and first_run and not BACKFILL_ON_FIRST_RUN:
+        # Primera ejecución: el historial se registra sin reenviarlo a la casa
+        index.mark_many(fingerprint(path, mtime, size) for path, mtime, size in pending)
+        print(f"   Primera ejecución: {len(pending)} archivos registrados sin enviar")
+    elif pending:
+        start = time.perf_counter()
+        # En el orden en que se escribieron (scandir no garantiza ninguno):
+        # los comandos llegan a la bandeja en el orden en que se dijeron
+        pending.sort(key=lambda entry: entry[1])
+        for filepath, mtime, size in pending:
+            handler.process_transcript(filepath, mtime, size)
+        sender.flush()
+        
+        elapsed = time.perf_counter() - start
+        stats = sender.stats()
+        print(f"\n📊 Carga inicial: {stats['sent']} enviadas en {elapsed:.1f}s "
+              f"({stats['sent'] / max(elapsed, 1e-9):.1f}/s, {stats['requests']} peticiones)")
+        print(f"   Latencia por transcripción: p50 {stats['latency_p50_ms']:.0f} ms, "
+              f"p95 {stats['latency_p95_ms']:.0f} ms")
     
     print("\n✅ Listo, esperando nuevas transcripciones...")
     print("   (Presiona Ctrl+C para detener)\n")
     
     # Iniciar monitor
-    observer = Observer()
+    observer = create_observer(entries)
     observer.schedule(handler, TRANSCRIPTS_DIR, recursive=False)
     observer.start()
     
@@ -184,10 +576,69 @@ def main():
         observer.stop()
     
     observer.join()
+    handler.close()
+    index.close()
+    stats = sender.stats()
+    print(f"📊 Enviadas: {stats['sent']}  Fallidas: {stats['failed']}  "
+          f"Latencia p50/p95: {stats['latency_p50_ms']:.0f}/{stats['latency_p95_ms']:.0f} ms")
+    print(f"📬 En la bandeja: {stats['backlog']} (más vieja {stats['oldest_s']:.0f}s)  "
+          f"Reenviadas: {stats['replayed']}  Vencidas: {stats['expired']}")
+    settle = handler.scheduler.stats()
+    print(f"   Eventos agrupados: {settle['coalesced']}  Archivos leídos: {settle['fired']}")
+    tracer.print_stats()
     print("✅ Monitor detenido")
 
+# =====================================================
+# BENCHMARK: caída y vuelta del servidor
+# =====================================================
+
+def benchmark_outbox(n=500):
+    """
+    Contra el servidor Node falso: lo pone a responder 503, encola `n`
+    transcripciones, lo levanta y mide el vaciado de la bandeja.
+    Verifica que lleguen todas, una vez y en orden.
+    """
+    import tempfile
+    from fake_node import start_fake_node
+    
+    fake, url = start_fake_node()
+    fake.status = 503
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = Outbox(os.path.join(tmp, "outbox.db"))
+        sender = TranscriptSender(url, outbox=outbox)
+        
+        start = time.perf_counter()
+        for i in range(n):
+            sender.send(f"comando {i}")
+        enqueue = time.perf_counter() - start
+        sender.flush()
+        print(f"\n📊 {n} encoladas en {enqueue * 1000:.0f} ms "
+              f"({enqueue / n * 1000:.2f} ms c/u); servidor caído: "
+              f"{len(outbox)} en la bandeja, {sender.requests} intentos")
+        
+        fake.status = 200
+        start = time.perf_counter()
+        while len(outbox):
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        
+        texts = [text for _, text in fake.received]
+        in_order = texts == [f"comando {i}" for i in range(n)]
+        stats = sender.stats()
+        print(f"📊 Vaciado en {elapsed:.2f}s tras volver el servidor (incluye la espera de reintento), "
+              f"{stats['replay_rate']:.0f}/s, {fake.requests} peticiones")
+        print(f"   Recibidas: {len(texts)}/{n}  En orden y sin duplicados: {'sí' if in_order else 'NO'}")
+        outbox.close()
+    fake.shutdown()
+    return stats
+
 if __name__ == "__main__":
     # Dependencias:
     # pip install watchdog requests
+    # python transcript_monitor.py bench   (bandeja de salida contra un servidor falso)
+    import sys
     
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark_outbox()
+    else:
+        main()
\ No newline at end of file
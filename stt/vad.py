@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Detección de actividad de voz (VAD)
+Motores intercambiables con una sola interfaz: process(samples) -> (es_voz, nivel)
+"""
+
+import os
+import math
+import wave
+import numpy as np
+
+FRAME = 256  # 16 ms a 16 kHz (4 tramas por chunk de 1024)
+
+
+def frame_features(samples, rate, frame=FRAME):
+    """
+    Características por trama, calculadas en lote:
+    nivel (amplitud media absoluta), tasa de cruces por cero,
+    fracción de energía en la banda de voz (80-4000 Hz) y planitud espectral.
+    """
+    n = len(samples) // frame
+    frames = np.asarray(samples[:n * frame], dtype=np.float32).reshape(n, frame)
+
+    level = np.abs(frames).mean(axis=1)
+
+    signs = np.signbit(frames)
+    zcr = (signs[:, 1:] != signs[:, :-1]).mean(axis=1)
+
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(frame), axis=1)) ** 2 + 1e-10
+    freqs = np.fft.rfftfreq(frame, 1.0 / rate)
+    band = (freqs >= 80) & (freqs <= 4000)
+    band_ratio = spectrum[:, band].sum(axis=1) / spectrum.sum(axis=1)
+
+    # Media geométrica / media aritmética: ~0 tonal (voz), ~1 ruido blanco
+    flatness = np.exp(np.log(spectrum).mean(axis=1)) / spectrum.mean(axis=1)
+
+    return level, zcr, band_ratio, flatness
+
+
+class EnergyVAD:
+    """Umbral sobre la amplitud media absoluta del chunk (comportamiento original)"""
+
+    def __init__(self, rate=16000, threshold=800, silence_threshold=None):
+        self.rate = rate
+        self.set_thresholds(threshold, silence_threshold)
+        self.reset()
+
+    def set_thresholds(self, threshold, silence_threshold=None):
+        """Umbral para activarse y (opcional, más bajo) para seguir activo"""
+        self.threshold = threshold
+        self.silence_threshold = silence_threshold or threshold
+
+    def process(self, samples):
+        if len(samples) == 0:
+            return False, 0.0
+        level = float(np.abs(np.asarray(samples, dtype=np.float32)).mean())
+        gate = self.silence_threshold if self.active else self.threshold
+        self.active = level > gate
+        return self.active, level
+
+    def reset(self):
+        self.active = False
+
+
+class MultiFeatureVAD:
+    """
+    VAD por tramas: una trama es voz si supera el umbral de nivel, tiene
+    la energía concentrada en la banda de voz, es poco plana (armónica)
+    y su tasa de cruces por cero es razonable.
+
+    Suavizado: hacen falta `onset_frames` tramas de voz seguidas para
+    activarse (descarta golpes de puerta) y se mantiene activo
+    `hangover_frames` tramas después de la última trama de voz.
+    """
+
+    def __init__(self, rate=16000, threshold=800, silence_threshold=None, frame=FRAME,
+                 zcr_range=(0.01, 0.35), min_band_ratio=0.55, max_flatness=0.35,
+                 onset_frames=3, hangover_frames=8):
+        self.rate = rate
+        self.set_thresholds(threshold, silence_threshold)
+        self.frame = frame
+        self.zcr_range = zcr_range
+        self.min_band_ratio = min_band_ratio
+        self.max_flatness = max_flatness
+        self.onset_frames = onset_frames
+        self.hangover_frames = hangover_frames
+        self.reset()
+
+    def set_thresholds(self, threshold, silence_threshold=None):
+        """Umbral para activarse y (opcional, más bajo) para seguir activo"""
+        self.threshold = threshold
+        self.silence_threshold = silence_threshold or threshold
+
+    def reset(self):
+        self.active = False
+        self.run = 0       # Tramas de voz consecutivas
+        self.hangover = 0  # Tramas restantes antes de desactivar
+
+    def classify_frames(self, samples):
+        """Decisión cruda por trama (sin suavizado)"""
+        level, zcr, band_ratio, flatness = frame_features(samples, self.rate, self.frame)
+        gate = self.silence_threshold if self.active else self.threshold
+        speech = (
+            (level > gate)
+            & (zcr >= self.zcr_range[0]) & (zcr <= self.zcr_range[1])
+            & (band_ratio >= self.min_band_ratio)
+            & (flatness <= self.max_flatness)
+        )
+        return speech
+
+    def process(self, samples):
+        if len(samples) == 0:
+            return self.active, 0.0
+
+        level = float(np.abs(np.asarray(samples, dtype=np.float32)).mean())
+
+        for is_speech in self.classify_frames(samples):
+            if is_speech:
+                self.run += 1
+                if self.active or self.run >= self.onset_frames:
+                    self.active = True
+                    self.hangover = self.hangover_frames
+            else:
+                self.run = 0
+                if self.hangover > 0:
+                    self.hangover -= 1
+                else:
+                    self.active = False
+
+        return self.active, level
+
+
+class NoiseFloorTracker:
+    """
+    Piso de ruido en línea, O(1) por chunk: EMA asimétrica con seguimiento
+    de mínimos. Baja rápido cuando el nivel cae por debajo del piso y sube
+    lento si el ruido del cuarto aumenta, así la voz apenas lo mueve.
+
+    Los umbrales de disparo y de silencio son múltiplos del piso.
+    """
+
+    def __init__(self, chunk_seconds, initial=800 / 3, fall_time=0.5, rise_time=30.0,
+                 trigger_ratio=3.0, silence_ratio=2.0, min_threshold=150):
+        self.floor = initial
+        self.fall = 1 - math.exp(-chunk_seconds / fall_time)
+        self.rise = 1 - math.exp(-chunk_seconds / rise_time)
+        self.trigger_ratio = trigger_ratio
+        self.silence_ratio = silence_ratio
+        self.min_threshold = min_threshold
+
+    def update(self, level):
+        alpha = self.fall if level < self.floor else self.rise
+        self.floor += alpha * (level - self.floor)
+
+    @property
+    def trigger_threshold(self):
+        return max(self.min_threshold, self.floor * self.trigger_ratio)
+
+    @property
+    def silence_threshold(self):
+        minimum = self.min_threshold * self.silence_ratio / self.trigger_ratio
+        return max(minimum, self.floor * self.silence_ratio)
+
+    def stats(self):
+        return {
+            "noise_floor": self.floor,
+            "trigger_threshold": self.trigger_threshold,
+            "silence_threshold": self.silence_threshold,
+        }
+
+
+VAD_ENGINES = {
+    "energy": EnergyVAD,
+    "multi": MultiFeatureVAD,
+}
+
+
+def create_vad(name, rate=16000, threshold=800):
+    """Crea el motor VAD por nombre ("energy" o "multi")"""
+    if name not in VAD_ENGINES:
+        raise ValueError(f"Motor VAD desconocido: {name}")
+    return VAD_ENGINES[name](rate=rate, threshold=threshold)
+
+
+# =====================================================
+# BENCHMARK: precisión / recall sobre un corpus etiquetado
+# =====================================================
+
+def load_labels(path):
+    """Etiquetas estilo Audacity: 'inicio<TAB>fin[<TAB>texto]' en segundos"""
+    segments = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2:
+                segments.append((float(parts[0]), float(parts[1])))
+    return segments
+
+
+def load_corpus(directory):
+    """Pares (muestras, rate, segmentos) para cada WAV con su .txt de etiquetas"""
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.wav'):
+            continue
+        labels = os.path.join(directory, name[:-4] + '.txt')
+        if not os.path.exists(labels):
+            continue
+        with wave.open(os.path.join(directory, name), 'rb') as wf:
+            rate = wf.getframerate()
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        corpus.append((name, samples, rate, load_labels(labels)))
+    return corpus
+
+
+def synthetic_corpus(rate=16000, seed=0):
+    """
+    Corpus sintético: voz (armónicos con envolvente silábica) entre
+    ruido de ventilador y golpes de puerta, con sus etiquetas.
+    """
+    rng = np.random.default_rng(seed)
+    seconds = 20
+    audio = rng.normal(0, 60, rate * seconds)
+    t = np.arange(rate * seconds) / rate
+
+    # Ventilador: ruido de banda ancha por encima del umbral original
+    fan = (t >= 2) & (t < 6)
+    audio[fan] += rng.normal(0, 1400, fan.sum())
+
+    # Golpes de puerta: ráfagas cortas que decaen
+    for start in (8.0, 15.5):
+        i = int(start * rate)
+        n = int(0.08 * rate)
+        audio[i:i + n] += rng.normal(0, 9000, n) * np.exp(-np.arange(n) / (0.02 * rate))
+
+    # Voz: tono fundamental + armónicos, modulado a ~4 sílabas/s
+    segments = [(10.0, 12.0), (17.0, 18.5)]
+    for start, end in segments:
+        mask = (t >= start) & (t < end)
+        tt = t[mask] - start
+        f0 = 140 + 20 * np.sin(2 * np.pi * 0.7 * tt)
+        phase = 2 * np.pi * np.cumsum(f0) / rate
+        voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+        envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * tt) ** 2
+        audio[mask] += 2500 * voice * envelope
+
+    samples = np.clip(audio, -32768, 32767).astype(np.int16)
+    return [("sintetico.wav", samples, rate, segments)]
+
+
+def evaluate(vad, samples, rate, segments, chunk=1024):
+    """Precisión / recall por chunk y disparos falsos (activaciones fuera de voz)"""
+    vad.reset()
+    t = np.arange(len(samples)) / rate
+    truth = np.zeros(len(samples), dtype=bool)
+    for start, end in segments:
+        truth |= (t >= start) & (t < end)
+
+    tp = fp = fn = false_triggers = 0
+    was_active = False
+    for i in range(0, len(samples) - chunk + 1, chunk):
+        active, _ = vad.process(samples[i:i + chunk])
+        label = truth[i:i + chunk].mean() > 0.5
+        tp += active and label
+        fp += active and not label
+        fn += label and not active
+        if active and not was_active and not truth[i:i + chunk].any():
+            false_triggers += 1
+        was_active = active
+
+    return {
+        "precision": tp / (tp + fp) if tp + fp else 1.0,
+        "recall": tp / (tp + fn) if tp + fn else 1.0,
+        "false_triggers": false_triggers,
+    }
+
+
+def benchmark(directory=None, threshold=800):
+    corpus = load_corpus(directory) if directory else synthetic_corpus()
+    if not corpus:
+        print(f"❌ No hay pares .wav/.txt en {directory}")
+        return {}
+
+    print(f"📊 VAD sobre {len(corpus)} archivo(s){' (sintético)' if not directory else ''}\n")
+    results = {}
+    for engine in VAD_ENGINES:
+        totals = {"precision": [], "recall": [], "false_triggers": 0}
+        for name, samples, rate, segments in corpus:
+            r = evaluate(create_vad(engine, rate, threshold), samples, rate, segments)
+            totals["precision"].append(r["precision"])
+            totals["recall"].append(r["recall"])
+            totals["false_triggers"] += r["false_triggers"]
+
+        results[engine] = {
+            "precision": float(np.mean(totals["precision"])),
+            "recall": float(np.mean(totals["recall"])),
+            "false_triggers": totals["false_triggers"],
+        }
+        r = results[engine]
+        print(f"   {engine:8s} precisión {r['precision']:.2f}  recall {r['recall']:.2f}  "
+              f"disparos falsos {r['false_triggers']}")
+    return results
+
+
+if __name__ == "__main__":
+    # python vad.py bench [carpeta_con_wav_y_txt]
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark(sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        print("Uso: python vad.py bench [carpeta]")
+        print("  Cada audio.wav necesita audio.txt con 'inicio fin' (segundos) por línea")